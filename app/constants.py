@@ -17,6 +17,9 @@ from app.core.constants import (
     STATUS_PROCESSING_SUCCESS,
     STATUS_PROCESSING_FAILED,
     STATUS_PROCESSING_ERROR,
+    EXTRACTION_ERROR_TIMEOUT,
+    EXTRACTION_ERROR_TOO_MANY_PAGES,
+    EXTRACTION_ERROR_OUT_OF_MEMORY,
     STATUS_WEBHOOK_PREFIX,
     STATUS_WEBHOOK_ERROR,
     DocumentStatus,
@@ -2,6 +2,7 @@
 Configuration constants and settings
 """
 import os
+import tempfile
 from typing import Optional
 
 # HTTP Configuration
@@ -21,12 +22,113 @@ MONGO_URI: str = os.environ.get(
 )
 DB_NAME = "noizz25HR"
 COLLECTION_NAME = "basicHR"
+EXTRACTION_CACHE_COLLECTION_NAME = "pdfExtractionCache"
+EXTRACTED_TEXT_COLLECTION_NAME = "cvExtractedText"
+# ההיסטוריה המלאה של status_history - כל entry נכתב לכאן (עם גוף התשובה של webhooks), במסמך נשמרים רק האחרונים
+STATUS_HISTORY_COLLECTION_NAME = "cvStatusHistory"
+# היסטוריית הצ'אט של הבוט (נכתב ע"י n8n)
+CHAT_COLLECTION_NAME = "WhatsAPP_DB"
+# Storage Backend - "mongo" (ברירת מחדל) או "memory" (הכל בזיכרון התהליך, בלי מסד נתונים - פיתוח מקומי ובדיקות עומס)
+# עם memory: ברירת המחדל של BLOB_STORE_BACKEND היא local, ו-endpoints שדורשים Mongo (chat history, index advisor) מחזירים 503
+STORAGE_BACKEND: str = os.environ.get("STORAGE_BACKEND", "mongo")
+# יצירת האינדקסים המוגדרים ב-app/services/indexes.py ב-startup (פעולה idempotent)
+ENSURE_INDEXES_ON_STARTUP: bool = os.environ.get("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+# Extracted Text Storage - הטקסט שחולץ נשמר דחוס ב-collection נפרד
+# "zstd" (אם החבילה zstandard מותקנת) או "zlib"
+EXTRACTED_TEXT_CODEC: str = os.environ.get("EXTRACTED_TEXT_CODEC", "zstd")
+EXTRACTED_TEXT_COMPRESSION_LEVEL: int = int(os.environ.get("EXTRACTED_TEXT_COMPRESSION_LEVEL", 6))
+# מספר רשומות שמפוענחות יחד בחיפוש חופשי ובמיגרציות
+TEXT_SCAN_BATCH_SIZE = 500
+
+# Search Index - אינדקס הפוך בזיכרון לחיפוש free_text (app/services/search_index.py)
+SEARCH_INDEX_ENABLED: bool = os.environ.get("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+# בנייה מחדש מ-Mongo כל X דקות (תופס כתיבות שלא עברו דרך ה-API). 0 = רק ב-startup
+SEARCH_INDEX_REBUILD_MINUTES: int = int(os.environ.get("SEARCH_INDEX_REBUILD_MINUTES", 60))
+# אורך מינימלי ל-token האחרון בשאילתה כדי להתאים אותו כ-prefix
+SEARCH_INDEX_PREFIX_MIN_LENGTH = 2
+# לפני חיפוש האינדקס נטענים מסמכים שנכתבו מאז הסנכרון האחרון (גם מ-process אחר).
+# insert לא כותב updated_at - מסמכים עם _id מהשניות האלה לפני הסנכרון נבדקים (הפרשי שעון בין שרתים)
+SEARCH_INDEX_SYNC_MARGIN_SECONDS: int = int(os.environ.get("SEARCH_INDEX_SYNC_MARGIN_SECONDS", 60))
+
+# PDF Extraction Configuration
+# מספר תהליכי ה-worker לחילוץ טקסט מ-PDF (0 = ללא process pool, חילוץ ב-thread)
+PDF_EXTRACTION_WORKERS: int = int(os.environ.get("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+# תקציב לכל מסמך - קובץ שחורג נדחה עם processing_error (0 = ללא הגבלה)
+PDF_MAX_PAGES: int = int(os.environ.get("PDF_MAX_PAGES", 50))
+PDF_EXTRACTION_TIMEOUT_SECONDS: float = float(os.environ.get("PDF_EXTRACTION_TIMEOUT_SECONDS", 30))
+# הגבלת address space לכל תהליך worker (RLIMIT_AS)
+PDF_EXTRACTION_MEMORY_LIMIT_MB: int = int(os.environ.get("PDF_EXTRACTION_MEMORY_LIMIT_MB", 1024))
+# מספר תוצאות חילוץ שנשמרות בזיכרון (tier ראשון של ה-cache, לפני Mongo)
+EXTRACTION_CACHE_MAX_ENTRIES: int = int(os.environ.get("EXTRACTION_CACHE_MAX_ENTRIES", 512))
+# תוקף רשומה ב-tier של Mongo (אינדקס TTL על created_at, 0 - ללא תפוגה)
+EXTRACTION_CACHE_TTL_DAYS: int = int(os.environ.get("EXTRACTION_CACHE_TTL_DAYS", 30))
+
+# Deferred extraction: ההעלאה נשמרת ומוחזר id מיד, והחילוץ רץ בתור ברקע
+# ברירת המחדל של הפרמטר deferred ב-/upload-cv
+DEFERRED_EXTRACTION_DEFAULT: bool = os.environ.get("DEFERRED_EXTRACTION_DEFAULT", "false").lower() == "true"
+EXTRACTION_QUEUE_WORKERS: int = int(os.environ.get("EXTRACTION_QUEUE_WORKERS", max(PDF_EXTRACTION_WORKERS, 1)))
+# job שנכשל (חריגה, למשל DB לא זמין) חוזר לתור עד X פעמים, ואז המסמך מסומן processing_error
+EXTRACTION_QUEUE_MAX_ATTEMPTS: int = int(os.environ.get("EXTRACTION_QUEUE_MAX_ATTEMPTS", 3))
+# תיקייה לקבצים שממתינים לחילוץ - קבצים שנשארו בה משוחזרים לתור ב-startup
+PENDING_UPLOADS_DIR: str = os.environ.get(
+    "PENDING_UPLOADS_DIR",
+    os.path.join(tempfile.gettempdir(), "cv-pending-uploads")
+)
+
+# Blob Store Configuration - שמירת קובץ ה-PDF המקורי
+# "gridfs" (ברירת מחדל, באותו DB) או "local" (תיקייה על הדיסק - ברירת המחדל עם STORAGE_BACKEND=memory)
+BLOB_STORE_BACKEND: str = os.environ.get("BLOB_STORE_BACKEND", "local" if STORAGE_BACKEND == "memory" else "gridfs")
+BLOB_STORE_BUCKET_NAME = "cvFiles"
+BLOB_STORE_LOCAL_DIR: str = os.environ.get("BLOB_STORE_LOCAL_DIR", os.path.join(os.getcwd(), "cv-files"))
+# גודל chunk לשמירה ולהורדה (גודל ה-chunk הדיפולטיבי של GridFS)
+BLOB_CHUNK_SIZE = 255 * 1024
+
+# Upload Configuration
+# גודל מקסימלי לקובץ שמועלה - העלאה גדולה יותר נדחית עם 413
+MAX_UPLOAD_BYTES: int = int(os.environ.get("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+# מעבר לגודל הקובץ, גוף הבקשה (multipart) כולל גם את שדות הטופס וה-boundaries.
+# בקשה גדולה מהתקרה + המרווח נדחית עם 413 עוד לפני שהגוף נקרא (UploadSizeLimitMiddleware)
+UPLOAD_REQUEST_OVERHEAD_BYTES = 1024 * 1024
+# עד הגודל הזה ההעלאה נשמרת בזיכרון, מעבר לו - בקובץ זמני על הדיסק
+UPLOAD_SPOOL_MAX_MEMORY_BYTES: int = int(os.environ.get("UPLOAD_SPOOL_MAX_MEMORY_BYTES", 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# העלאת batch: מספר קבצים מקסימלי, גודל מקסימלי ל-zip (וגם לגוף הבקשה כולו), וכמה webhooks רצים במקביל
+MAX_BATCH_FILES: int = int(os.environ.get("MAX_BATCH_FILES", 500))
+MAX_BATCH_UPLOAD_BYTES: int = int(os.environ.get("MAX_BATCH_UPLOAD_BYTES", 500 * 1024 * 1024))
+BATCH_WEBHOOK_CONCURRENCY: int = int(os.environ.get("BATCH_WEBHOOK_CONCURRENCY", 10))
+
+# List Pagination - GET /cv
+# ברירת המחדל ל-limit כשנשלח רק after, והמקסימום לעמוד אחד
+CV_PAGE_DEFAULT_LIMIT = 100
+CV_PAGE_MAX_LIMIT = 1000
+# מספר מסמכים שה-cursor מביא מ-Mongo בכל סבב (גם ב-streaming)
+CV_CURSOR_BATCH_SIZE = 500
+
+# Status History - במסמך נשמרים רק STATUS_HISTORY_MAX_EMBEDDED ה-entries האחרונים ($push עם $slice)
+# 0 - ללא הגבלה. את archive_status_history מריצים לפני שמפעילים את ההגבלה
+STATUS_HISTORY_MAX_EMBEDDED: int = int(os.environ.get("STATUS_HISTORY_MAX_EMBEDDED", 50))
+# GET /cv/{id}/history - ברירת המחדל ל-limit והמקסימום לעמוד אחד
+CV_HISTORY_PAGE_DEFAULT_LIMIT = 100
+CV_HISTORY_PAGE_MAX_LIMIT = 1000
+
+# GET /cv/stats - תוצאת ה-aggregation נשמרת בזיכרון (לכל צירוף פילטרים), וכל כתיבה דרך ה-storage מבטלת אותה
+CV_STATS_CACHE_TTL_SECONDS: int = int(os.environ.get("CV_STATS_CACHE_TTL_SECONDS", 60))
+CV_STATS_CACHE_MAX_ENTRIES = 64
+
+# Document cache - מסמכים לפי ID בזיכרון (GET /cv/{id})
+# כל כתיבה דרך ה-storage מבטלת את המסמך. ה-cache מקומי לתהליך, ולכן הגרסה נקראת תמיד מ-Mongo -
+# כתיבה של instance אחר (גרסה אחרת) טוענת את המסמך מחדש. 0 = כבוי
+DOCUMENT_CACHE_MAX_ENTRIES: int = int(os.environ.get("DOCUMENT_CACHE_MAX_ENTRIES", 2000))
+DOCUMENT_CACHE_TTL_SECONDS: int = int(os.environ.get("DOCUMENT_CACHE_TTL_SECONDS", 30))
 
 # CORS Configuration
 CORS_ALLOW_ORIGINS = ["*"]  # In production, restrict to specific domains
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_METHODS = ["*"]
 CORS_ALLOW_HEADERS = ["*"]
+# ה-UI קורא את ה-ETag כדי לשלוח If-None-Match
+CORS_EXPOSE_HEADERS = ["ETag"]
 
 def get_port() -> int:
     """Get the port from environment variable or return default"""
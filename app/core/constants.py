@@ -65,11 +65,23 @@ class DocumentStatus(str, Enum):
     IN_CLASSIFICATION = STATUS_IN_CLASSIFICATION
 
 
+# מעבר סטטוס אחרי עדכון שדות (PATCH /cv/{id}): הסטטוס הנוכחי -> הסטטוס הבא
+UPDATE_STATUS_TRANSITIONS = {
+    STATUS_EXTRACTING: STATUS_READY_FOR_BOT_INTERVIEW,
+    STATUS_IN_CLASSIFICATION: STATUS_READY_FOR_RECRUIT,
+}
+
+
 # Processing statuses
 STATUS_PROCESSING_SUCCESS = "processing_success"
 STATUS_PROCESSING_FAILED = "processing_failed"
 STATUS_PROCESSING_ERROR = "processing_error"  # With error message appended
 
+# Extraction budget error reasons - appear as "processing_error: {reason}: {details}"
+EXTRACTION_ERROR_TIMEOUT = "timeout"
+EXTRACTION_ERROR_TOO_MANY_PAGES = "too_many_pages"
+EXTRACTION_ERROR_OUT_OF_MEMORY = "out_of_memory"
+
 # Webhook statuses
 STATUS_WEBHOOK_PREFIX = "webhook_status"  # With status code appended
 STATUS_WEBHOOK_ERROR = "webhook_error"  # With error message appended
@@ -121,3 +133,32 @@ def get_webhook_error_status(error_message: str) -> str:
     from app.core.config import ERROR_MESSAGE_MAX_LENGTH
     return f"{STATUS_WEBHOOK_ERROR}: {error_message[:ERROR_MESSAGE_MAX_LENGTH]}"
 
+
+
+# ============================================================================
+# MATCH SCORE RANGES
+# ============================================================================
+
+# טווחי match_score שמוצעים ב-/cv/search - נשאלים על search_keys.match_score (מספרי)
+MATCH_SCORE_ALL = "all match_score"
+MATCH_SCORE_RANGES = {
+    "below 70": {"$lt": 70},
+    "70-79": {"$gte": 70, "$lt": 80},
+    "80-89": {"$gte": 80, "$lt": 90},
+    "90-100": {"$gte": 90, "$lte": 100},
+}
+
+
+# ============================================================================
+# STATUS HISTORY CODES
+# ============================================================================
+
+# הקידוד הקומפקטי של status_history (app/utils/status_history.py):
+# {"c": קוד, "t": datetime, "d": פירוט אופציונלי}
+# הסטטוסים הראשיים - לפי STATUS_ID_MAP (1-7)
+HISTORY_CODE_OTHER = 0  # סטטוס שאין לו קוד - הטקסט המלא נשמר ב-d
+HISTORY_CODE_PROCESSING_SUCCESS = 20
+HISTORY_CODE_PROCESSING_FAILED = 21
+HISTORY_CODE_PROCESSING_ERROR = 22  # הודעת השגיאה ב-d
+HISTORY_CODE_WEBHOOK_ERROR = 30  # הודעת השגיאה ב-d
+HISTORY_CODE_WEBHOOK_STATUS_BASE = 1000  # + קוד ה-HTTP (webhook_status_200 -> 1200), גוף התשובה נשמר בנפרד
@@ -31,3 +31,54 @@ class ValidationError(HTTPException):
             detail=detail
         )
 
+
+class TooManyFilesError(ValidationError):
+    """Exception raised when a batch upload has more files than allowed"""
+    def __init__(self, max_files: int):
+        super().__init__(f"Too many files in batch (max {max_files})")
+
+
+class UploadTooLargeError(HTTPException):
+    """Exception raised when an uploaded file exceeds the size limit"""
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Uploaded file exceeds the maximum size of {max_bytes} bytes"
+        )
+
+
+class FileNotStoredError(HTTPException):
+    """Exception raised when a document has no stored original file"""
+    def __init__(self, document_id: str):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Original file not stored for document: {document_id}"
+        )
+
+
+class RangeNotSatisfiableError(HTTPException):
+    """Exception raised when a Range header is outside the file"""
+    def __init__(self, size_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size_bytes}"}
+        )
+
+
+class InvalidCursorError(HTTPException):
+    """Exception raised when a pagination cursor can't be decoded"""
+    def __init__(self, cursor: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor: {cursor}"
+        )
+
+
+class DatabaseRequiredError(HTTPException):
+    """Exception raised when an endpoint needs MongoDB and the storage backend is in memory"""
+    def __init__(self, feature: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{feature} requires STORAGE_BACKEND=mongo"
+        )
@@ -4,7 +4,6 @@ Uses webhook client utility for making HTTP requests
 """
 import logging
 from typing import Dict
-from app.services.storage import get_documents_by_status, add_status_to_history, update_document_status
 from app.services.config_loader import get_webhook_url
 from app.core.constants import (
     STATUS_READY_FOR_CLASSIFICATION,
@@ -20,12 +19,12 @@ def get_classification_webhook_url() -> str:
     """מחזיר את ה-URL של classification webhook מהקונפיגורציה"""
     return get_webhook_url("classification_processor")
 
-async def process_waiting_classification_records(db) -> Dict[str, any]:
+async def process_waiting_classification_records(storage) -> Dict[str, any]:
     """
     מחפש רשומות עם סטטוס waiting_classification ומבצע קריאה ל-webhook עבור כל רשומה
     
     Args:
-        db: מסד הנתונים
+        storage: ה-storage backend (app.repositories)
     
     Returns:
         dict עם סטטיסטיקות על העיבוד
@@ -33,7 +32,7 @@ async def process_waiting_classification_records(db) -> Dict[str, any]:
     logger.info(f"[CLASSIFICATION_PROCESSOR] Starting to process {STATUS_READY_FOR_CLASSIFICATION} records")
     
     # קבל את כל הרשומות עם סטטוס waiting_classification
-    records = await get_documents_by_status(db, STATUS_READY_FOR_CLASSIFICATION)
+    records = await storage.get_documents_by_status(STATUS_READY_FOR_CLASSIFICATION)
     logger.info(f"[CLASSIFICATION_PROCESSOR] Found {len(records)} records with status '{STATUS_READY_FOR_CLASSIFICATION}'")
     
     if not records:
@@ -57,19 +56,13 @@ async def process_waiting_classification_records(db) -> Dict[str, any]:
         
         # בצע קריאה ל-webhook
         try:
-            success = await call_classification_webhook(db, record_id)
+            success = await call_classification_webhook(storage, record_id)
             if success:
                 results["success"] += 1
                 results["details"].append({
                     "id": record_id,
                     "status": "success"
                 })
-                # עדכן סטטוס ל-STATUS_IN_CLASSIFICATION
-                try:
-                    await update_document_status(db, record_id, STATUS_IN_CLASSIFICATION)
-                    logger.info(f"[CLASSIFICATION_PROCESSOR] Updated record {record_id} status to '{STATUS_IN_CLASSIFICATION}'")
-                except Exception as e:
-                    logger.error(f"[CLASSIFICATION_PROCESSOR] Failed to update status for record {record_id}: {str(e)}", exc_info=True)
             else:
                 results["failed"] += 1
                 results["details"].append({
@@ -93,13 +86,13 @@ async def process_waiting_classification_records(db) -> Dict[str, any]:
     
     return results
 
-async def call_classification_webhook(db, record_id: str) -> bool:
+async def call_classification_webhook(storage, record_id: str) -> bool:
     """
-    קורא ל-webhook עם ה-ID של הרשומה
+    קורא ל-webhook עם ה-ID של הרשומה, ואם הצליח - מעדכן את הסטטוס ל-In Classification
     משתמש ב-webhook_client utility לטיפול בקריאות HTTP
     
     Args:
-        db: מסד הנתונים
+        storage: ה-storage backend (app.repositories)
         record_id: מזהה הרשומה
     
     Returns:
@@ -123,7 +116,10 @@ async def call_classification_webhook(db, record_id: str) -> bool:
     else:
         webhook_status = get_webhook_error_status(response_text or "Unknown error")
     
-    await add_status_to_history(db, record_id, webhook_status)
+    # סטטוס ה-webhook והמעבר ל-STATUS_IN_CLASSIFICATION (אם הצליח) נרשמים בעדכון אחד
+    await storage.record_webhook_result(record_id, webhook_status, STATUS_IN_CLASSIFICATION if success else None)
+    if success:
+        logger.info(f"[CLASSIFICATION_PROCESSOR] Updated record {record_id} status to '{STATUS_IN_CLASSIFICATION}'")
     
     return success
 
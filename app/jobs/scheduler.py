@@ -10,12 +10,15 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from app.services.bot_processor import process_waiting_for_bot_records
 from app.jobs.classification_processor import process_waiting_classification_records
+from app.services.search_index import rebuild_search_index
 from app.constants import STATUS_READY_FOR_BOT_INTERVIEW, STATUS_READY_FOR_CLASSIFICATION
+from app.core.config import SEARCH_INDEX_ENABLED, SEARCH_INDEX_REBUILD_MINUTES
 
 logger = logging.getLogger(__name__)
 
 scheduler = None
 _db_client = None
+_storage = None
 
 def load_scheduler_config():
     """
@@ -89,31 +92,44 @@ def load_scheduler_config():
 
 async def scheduled_bot_processor():
     """פונקציה שרצה על ידי ה-scheduler כל יום לפי ההגדרות"""
-    global _db_client
+    global _storage
     logger.info("[SCHEDULER] Starting scheduled bot processor job (triggered by daily scheduler)")
     try:
-        results = await process_waiting_for_bot_records(_db_client, trigger_source="scheduled")
+        results = await process_waiting_for_bot_records(_storage, trigger_source="scheduled")
         logger.info(f"[SCHEDULER] Scheduled job completed: {results}")
     except Exception as e:
         logger.error(f"[SCHEDULER] Error in scheduled job: {str(e)}", exc_info=True)
 
 async def scheduled_classification_processor():
     """פונקציה שרצה על ידי ה-scheduler כל X שניות לפי ההגדרות"""
-    global _db_client
+    global _storage
     logger.info("[SCHEDULER] Starting scheduled classification processor job (triggered by interval scheduler)")
     try:
-        results = await process_waiting_classification_records(_db_client)
+        results = await process_waiting_classification_records(_storage)
         logger.info(f"[SCHEDULER] Classification job completed: {results}")
     except Exception as e:
         logger.error(f"[SCHEDULER] Error in classification job: {str(e)}", exc_info=True)
 
-def setup_scheduler(db_client):
+async def scheduled_search_index_rebuild():
+    """בונה מחדש את אינדקס החיפוש - תופס כתיבות ל-Mongo שלא עברו דרך ה-API"""
+    global _db_client
+    try:
+        await rebuild_search_index(_db_client)
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error in search index rebuild: {str(e)}", exc_info=True)
+
+def setup_scheduler(db_client, storage):
     """
     מגדיר ומתחיל את ה-scheduler
     טוען את הגדרות הזמן מקובץ scheduler_config.json
+    
+    Args:
+        db_client: מסד הנתונים (לבניית אינדקס החיפוש, None עם STORAGE_BACKEND=memory)
+        storage: ה-storage backend (app.repositories) של ה-jobs
     """
-    global scheduler, _db_client
+    global scheduler, _db_client, _storage
     _db_client = db_client
+    _storage = storage
     
     # טען את כל הגדרות ה-scheduler מקובץ הקונפיגורציה
     config = load_scheduler_config()
@@ -150,6 +166,17 @@ def setup_scheduler(db_client):
         replace_existing=True
     )
     
+    # בנייה מחדש של אינדקס החיפוש (הבנייה הראשונה רצה ב-startup)
+    if db_client is not None and SEARCH_INDEX_ENABLED and SEARCH_INDEX_REBUILD_MINUTES > 0:
+        scheduler.add_job(
+            scheduled_search_index_rebuild,
+            trigger=IntervalTrigger(minutes=SEARCH_INDEX_REBUILD_MINUTES),
+            id="search_index_rebuild",
+            name=f"Rebuild search index every {SEARCH_INDEX_REBUILD_MINUTES} minutes",
+            replace_existing=True
+        )
+        logger.info(f"[STARTUP]   - Search index rebuild: every {SEARCH_INDEX_REBUILD_MINUTES} minutes")
+    
     scheduler.start()
     logger.info(f"[STARTUP] Scheduler started:")
     logger.info(f"[STARTUP]   - Classification processor: every {interval_seconds} seconds")
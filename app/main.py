@@ -1,12 +1,31 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, status, Query, BackgroundTasks, Header, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.models import CVDocumentInDB, CVUploadResponse, CVUpdateRequest, StatusUpdateRequest, RecruitNoteRequest
+from bson import ObjectId
+from app.models import CVDocumentInDB, CVUploadResponse, CVBatchUploadResponse, CVUpdateRequest, StatusUpdateRequest, RecruitNoteRequest
 from app.database import get_database
-from app.services.pdf_parser import extract_text_from_pdf
-from app.services.storage import insert_cv_document, get_all_documents, get_document_by_id, delete_document_by_id, restore_document_by_id, add_status_to_history, update_document_full, update_document_status, update_document_fields_only, search_documents_advanced
+from app.services.extraction_pool import start_extraction_pool, shutdown_extraction_pool
+from app.services.extraction_cache import extract_text_cached, get_cache_stats
+from app.services.cv_documents import build_file_metadata, build_cv_document, get_processing_status
+from app.services.batch_upload import process_batch_upload
+from app.services.extraction_queue import start_extraction_queue, stop_extraction_queue, enqueue_extraction, get_pending_path, get_queue_size
+from app.services.blob_store import get_blob_store, save_original_file
+from app.services.indexes import ensure_indexes, run_index_advisor
+from app.services.document_cache import get_document_cache_stats
+from app.services.search_index import start_search_index, stop_search_index, get_search_index_stats
+from app.services.status_history_store import flush_archive
+from app.utils.upload_stream import spool_upload, spool_zip_members, UploadSizeLimitMiddleware
+from app.utils.http_range import parse_range_header
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.etag import make_etag, etag_matches, hash_params
+from app.utils.json_response import FastJSONResponse
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson, iter_ndjson
+from app.utils.projection import VIEW_FULL, validate_view, parse_fields
+from app.utils.search_keys import MATCH_MODE_PREFIX, parse_match_score_range, validate_match_mode
+from app.utils.status_history import validate_entered_range, to_utc
+from app.repositories import get_storage_backend, STORAGE_BACKEND_MONGO
 from app.services.bot_processor import process_waiting_for_bot_records, process_single_bot_record
 from app.services.chat_service import get_chat_history_by_id
 from app.jobs.classification_processor import process_waiting_classification_records
@@ -14,28 +33,40 @@ from app.jobs.scheduler import setup_scheduler, shutdown_scheduler
 from app.services.config_loader import get_webhook_url
 from app.core.constants import (
     STATUS_EXTRACTING,
-    STATUS_READY_FOR_BOT_INTERVIEW,
-    STATUS_IN_CLASSIFICATION,
-    STATUS_READY_FOR_RECRUIT,
-    STATUS_PROCESSING_SUCCESS,
-    STATUS_PROCESSING_FAILED,
     DocumentStatus,
-    get_processing_error_status,
     get_webhook_status,
     get_webhook_error_status,
     get_status_by_id,
     get_all_statuses,
-    STATUS_ID_MAP
+    STATUS_ID_MAP,
+    MATCH_SCORE_ALL,
+    UPDATE_STATUS_TRANSITIONS
 )
 from app.core.config import (
     CORS_ALLOW_ORIGINS,
     CORS_ALLOW_CREDENTIALS,
     CORS_ALLOW_METHODS,
     CORS_ALLOW_HEADERS,
+    CORS_EXPOSE_HEADERS,
+    MAX_UPLOAD_BYTES,
+    MAX_BATCH_FILES,
+    MAX_BATCH_UPLOAD_BYTES,
+    BATCH_WEBHOOK_CONCURRENCY,
+    DEFERRED_EXTRACTION_DEFAULT,
+    CV_PAGE_DEFAULT_LIMIT,
+    CV_PAGE_MAX_LIMIT,
+    CV_HISTORY_PAGE_DEFAULT_LIMIT,
+    CV_HISTORY_PAGE_MAX_LIMIT,
+    ENSURE_INDEXES_ON_STARTUP,
+    STORAGE_BACKEND,
     get_port
 )
-from app.core.exceptions import DocumentNotFoundError, InvalidStatusError, ValidationError
+from app.core.exceptions import DocumentNotFoundError, InvalidStatusError, ValidationError, TooManyFilesError, UploadTooLargeError, FileNotStoredError, DatabaseRequiredError
+from urllib.parse import quote
+import asyncio
 import datetime
+import json
+import zipfile
 import logging
 
 # הגדרת logging
@@ -45,7 +76,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# FastJSONResponse - orjson, מקודד ObjectId ו-datetime בלי jsonable_encoder
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -54,21 +86,51 @@ app.add_middleware(
     allow_credentials=CORS_ALLOW_CREDENTIALS,
     allow_methods=CORS_ALLOW_METHODS,
     allow_headers=CORS_ALLOW_HEADERS,
+    expose_headers=CORS_EXPOSE_HEADERS,
 )
 
+# תקרת גוף הבקשה של ההעלאות - 413 לפני שהטופס נקרא (לא רק אחרי שהקובץ כבר התקבל)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={"/upload-cv": MAX_UPLOAD_BYTES, "/upload-cv/batch": MAX_BATCH_UPLOAD_BYTES},
+)
+
+# db_client הוא None עם STORAGE_BACKEND=memory - כל הגישה למסמכים עוברת דרך storage_backend
 db_client = None
+storage_backend = None
 
 @app.on_event("startup")
 async def startup_event():
-    global db_client
-    db_client = get_database()
+    global db_client, storage_backend
+    if STORAGE_BACKEND == STORAGE_BACKEND_MONGO:
+        db_client = get_database()
+    storage_backend = get_storage_backend(db_client)
+    logger.info(f"[STARTUP] Storage backend: {storage_backend.name}")
+    
+    if db_client is not None:
+        # אינדקסים ל-queries של ה-storage (idempotent)
+        if ENSURE_INDEXES_ON_STARTUP:
+            await ensure_indexes(db_client)
+        
+        # אינדקס החיפוש נבנה ברקע - עד שהוא מוכן free_text משתמש ב-regex
+        start_search_index(db_client)
+    
+    # הרם את ה-process pool לחילוץ PDF (pdfminer נטען מראש בכל worker)
+    await start_extraction_pool()
+    
+    # תור החילוץ של מצב deferred - ה-webhook נקרא אחרי שהחילוץ נשמר
+    await start_extraction_queue(db_client, storage_backend, on_extracted=call_webhook)
     
     # הגדר את ה-scheduler
-    setup_scheduler(db_client)
+    setup_scheduler(db_client, storage_backend)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     shutdown_scheduler()
+    await stop_search_index()
+    await stop_extraction_queue()
+    await flush_archive()
+    shutdown_extraction_pool()
 
 async def call_webhook(document_id: str):
     """
@@ -93,11 +155,9 @@ async def call_webhook(document_id: str):
     else:
         webhook_status = get_webhook_error_status(response_text or "Unknown error")
     
-    await add_status_to_history(db_client, document_id, webhook_status)
-    
-    # If successful, update status to "Extracting"
+    # Record the webhook status and, if successful, move to "Extracting" - in one update
+    await storage_backend.record_webhook_result(document_id, webhook_status, STATUS_EXTRACTING if success else None)
     if success:
-        await update_document_status(db_client, document_id, STATUS_EXTRACTING)
         logger.info(f"[WEBHOOK] Updated document {document_id} status to '{STATUS_EXTRACTING}'")
 
 @app.post("/upload-cv", response_model=CVUploadResponse)
@@ -108,75 +168,267 @@ async def upload_cv(
     phone: Optional[str] = Form(None),
     email: Optional[str] = Form(None),
     campaign: Optional[str] = Form(None),
-    notes: Optional[str] = Form(None)
+    notes: Optional[str] = Form(None),
+    deferred: Optional[bool] = Form(None, description="True - מחזיר id מיד והחילוץ רץ ברקע")
 ):
     """
     Upload a new CV document
     
     Accepts either a PDF file or metadata (or both)
+    In deferred mode the file is persisted and the id returned before extraction;
+    the processing status and the webhook follow from the extraction queue
     """
     if not file and not any([name, phone, email, campaign, notes]):
         raise ValidationError("Must provide either PDF file or metadata")
 
+    if deferred is None:
+        deferred = DEFERRED_EXTRACTION_DEFAULT
+    if deferred and file is not None:
+        return await upload_cv_deferred(file, name, phone, email, campaign, notes)
+
     file_metadata = None
     extracted_text = ""
-    parse_success = False
     error_message = None
-    pdf_bytes = None
 
     if file is not None:
-        pdf_bytes = await file.read()
-        file_metadata = {
-            "filename": file.filename,
-            "size_bytes": len(pdf_bytes),
-            "content_type": file.content_type,
-            "uploaded_at": datetime.datetime.utcnow().isoformat() + "Z"
-        }
-        extracted_text, error_message = extract_text_from_pdf(pdf_bytes) if pdf_bytes else ("", "empty upload")
-        parse_success = bool(extracted_text)
-
-    document = {
-        "file_metadata": file_metadata,
-        "extracted_text": extracted_text,
-        "known_data": {
-            "name": name,
-            "phone_number": phone,  # שמירה כ-phone_number במקום phone
-            "email": email,
-            "campaign": campaign,
-            "notes": notes,
-            "job_type": None,
-            "match_score": None,
-            "class_explain": None
-        }
-    }
+        # הקובץ נקרא ב-chunks (עם תקרת גודל) - ה-hash והגודל מחושבים תוך כדי
+        with await spool_upload(file) as upload:
+            file_metadata = build_file_metadata(file.filename, file.content_type, upload)
+            if upload.size_bytes:
+                # החילוץ רץ ב-process pool, וקובץ שכבר נראה (לפי SHA-256) נלקח מה-cache
+                # הקובץ המקורי נשמר ב-blob store במקביל לחילוץ
+                (extracted_text, error_message), _ = await asyncio.gather(
+                    extract_text_cached(db_client, upload),
+                    save_original_file(db_client, upload, file_metadata)
+                )
+            else:
+                extracted_text, error_message = "", "empty upload"
+
+    document = build_cv_document(file_metadata, extracted_text, name, phone, email, campaign, notes)
 
-    inserted_id = await insert_cv_document(db_client, document)
+    # סטטוס ה-processing נכנס ל-history כבר ב-insert - כתיבה אחת למסמך
+    processing_status = get_processing_status(extracted_text, error_message)
+    inserted_id = await storage_backend.insert_cv_document(document, [processing_status])
     logger.info(f"[UPLOAD] Document saved with ID: {inserted_id}")
     
-    # הוסף סטטוס processing ל-history אחרי יצירת המסמך
-    if error_message:
-        processing_status = get_processing_error_status(error_message)
-    elif parse_success:
-        processing_status = STATUS_PROCESSING_SUCCESS
-    else:
-        processing_status = STATUS_PROCESSING_FAILED
-    
-    await add_status_to_history(db_client, inserted_id, processing_status)
-    
     # קריאה ל-webhook אחרי השמירה (ב-background כדי לא לחסום את התגובה)
     background_tasks.add_task(call_webhook, inserted_id)
     logger.info(f"[UPLOAD] Webhook task added to background for document_id: {inserted_id}")
     
     return {"id": str(inserted_id), "status": "stored"}
 
+async def upload_cv_deferred(
+    file: UploadFile,
+    name: Optional[str],
+    phone: Optional[str],
+    email: Optional[str],
+    campaign: Optional[str],
+    notes: Optional[str]
+) -> dict:
+    """
+    Deferred upload: persist the raw file, store the document and queue the extraction
+    The extraction queue records the processing status and calls the webhook afterwards
+    """
+    # ה-id נוצר מראש כדי שהקובץ יישמר בתיקיית ה-pending לפני ה-insert
+    document_id = ObjectId()
+    with await spool_upload(file) as upload:
+        file_metadata = build_file_metadata(file.filename, file.content_type, upload)
+        await save_original_file(db_client, upload, file_metadata)
+        pending_path = get_pending_path(str(document_id))
+        upload.persist(pending_path)
+
+    document = build_cv_document(file_metadata, "", name, phone, email, campaign, notes)
+    document["_id"] = document_id
+    inserted_id = await storage_backend.insert_cv_document(document)
+    logger.info(f"[UPLOAD] Document saved with ID: {inserted_id} (extraction deferred)")
+
+    enqueue_extraction(inserted_id, pending_path, file_metadata["sha256"])
+    logger.info(f"[UPLOAD] Extraction queued for document_id: {inserted_id} (queue size: {get_queue_size()})")
+
+    return {"id": inserted_id, "status": "queued"}
+
+async def _list_etag(endpoint: str, **params) -> str:
+    """
+    ETag של רשימה: גרסת ה-collection + hash של הפרמטרים אחרי validation (view, fields, פילטרים, פורמט) -
+    לא ה-query string וה-Accept כמו שהם, כך שסדר פרמטרים או Accept אחר לא יוצרים ETag אחר
+    הגרסה נקראת לפני המסמכים - כתיבה שקרתה באמצע תשנה את ה-ETag בבקשה הבאה
+    """
+    version = await storage_backend.get_collection_version()
+    return make_etag("cv", version, hash_params({"endpoint": endpoint, **params}))
+
 @app.get("/cv")
-async def get_all(deleted: Optional[bool] = Query(None, description="True - רק מחוקים, False/None - רק לא מחוקים")):
+async def get_all(
+    deleted: Optional[bool] = Query(None, description="True - רק מחוקים, False/None - רק לא מחוקים"),
+    limit: Optional[int] = Query(None, ge=1, le=CV_PAGE_MAX_LIMIT, description="גודל עמוד (keyset pagination)"),
+    after: Optional[str] = Query(None, description="next_after מהעמוד הקודם"),
+    view: str = Query(VIEW_FULL, description="full - מסמך מלא, summary - שורה מקוצרת (CVSummary)"),
+    fields: Optional[str] = Query(None, description="רשימת שדות מופרדת בפסיקים, למשל known_data.name,current_status"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     מחזיר את כל המסמכים
     - deleted=None או False: רק מסמכים שלא מחוקים (ברירת מחדל)
     - deleted=True: רק מסמכים מחוקים
+    - limit/after: עמוד אחד - {"items": [...], "next_after": token או null}
+    - Accept: application/x-ndjson - מסמך אחד בכל שורה, ב-streaming
+    - view/fields: רק השדות הנדרשים (Mongo projection)
+    - ETag / If-None-Match: 304 אם אף מסמך לא השתנה (בלי לקרוא את המסמכים)
+    """
+    view = validate_view(view)
+    field_paths = parse_fields(fields)
+    after_id = decode_cursor(after) if after else None
+    ndjson = wants_ndjson(accept)
+    etag = await _list_etag(
+        "list", deleted=bool(deleted), limit=limit, after=after_id, view=view, fields=field_paths,
+        format=NDJSON_MEDIA_TYPE if ndjson else "json"
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if ndjson:
+        return StreamingResponse(
+            iter_ndjson(storage_backend.iter_documents(deleted, after_id, limit or 0, view, field_paths)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"ETag": etag}
+        )
+    # FastJSONResponse ישירות - בלי המעבר של jsonable_encoder על כל המסמכים
+    if limit is None and after_id is None:
+        # ללא pagination - המערך המלא כמו קודם
+        docs = await storage_backend.get_all_documents(deleted, view, field_paths)
+        return FastJSONResponse(docs, headers={"ETag": etag})
+    items, next_id = await storage_backend.get_documents_page(
+        deleted, limit or CV_PAGE_DEFAULT_LIMIT, after_id, view, field_paths
+    )
+    page = {"items": items, "next_after": encode_cursor(next_id) if next_id else None}
+    return FastJSONResponse(page, headers={"ETag": etag})
+
+async def call_webhooks_for_batch(document_ids: List[str]):
+    """
+    Call the upload webhook for every document of a batch upload
+    Runs with bounded concurrency so a large import doesn't flood n8n
+    """
+    semaphore = asyncio.Semaphore(BATCH_WEBHOOK_CONCURRENCY)
+
+    async def call_one(document_id: str):
+        async with semaphore:
+            try:
+                await call_webhook(document_id)
+            except Exception as e:
+                logger.error(f"[BATCH_UPLOAD] Webhook failed for document {document_id}: {str(e)}", exc_info=True)
+
+    await asyncio.gather(*[call_one(document_id) for document_id in document_ids])
+
+@app.post("/upload-cv/batch", response_model=CVBatchUploadResponse)
+async def upload_cv_batch(
+    background_tasks: BackgroundTasks,
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None, description="קובץ zip עם קבצי PDF"),
+    metadata: Optional[str] = Form(None, description='JSON: {"<filename>": {"name", "phone", "email", "campaign", "notes"}}'),
+    campaign: Optional[str] = Form(None, description="קמפיין לכל הקבצים (אלא אם הוגדר אחרת ב-metadata)"),
+    notes: Optional[str] = Form(None)
+):
     """
-    return await get_all_documents(db_client, deleted)
+    Upload many CV documents in one request
+    
+    Accepts PDF files and/or a zip archive of PDFs. Files are extracted in parallel,
+    stored with a single insert and the webhooks run in the background.
+    Returns an id or an error per file.
+    """
+    files = files or []
+    if not files and archive is None:
+        raise ValidationError("Must provide PDF files or a zip archive")
+
+    try:
+        item_metadata = json.loads(metadata) if metadata else {}
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"Invalid metadata JSON: {str(e)}")
+    if not isinstance(item_metadata, dict) or not all(isinstance(v, dict) for v in item_metadata.values()):
+        raise ValidationError("metadata must be a JSON object mapping filename to fields")
+
+    items = []
+    try:
+        for file in files:
+            if len(items) >= MAX_BATCH_FILES:
+                raise TooManyFilesError(MAX_BATCH_FILES)
+            try:
+                # max_memory_bytes=0 - כל קובץ נשמר על הדיסק, כך שהזיכרון לא גדל עם גודל ה-batch
+                upload = await spool_upload(file, max_memory_bytes=0)
+                items.append((file.filename, file.content_type, upload, None))
+            except UploadTooLargeError as e:
+                items.append((file.filename, file.content_type, None, e.detail))
+
+        if archive is not None:
+            with await spool_upload(archive, max_bytes=MAX_BATCH_UPLOAD_BYTES, max_memory_bytes=0) as archive_upload:
+                with archive_upload.open() as archive_file:
+                    try:
+                        # פריסת ה-zip חוסמת (CPU) - רצה ב-thread
+                        members = await asyncio.to_thread(
+                            spool_zip_members,
+                            archive_file,
+                            max_member_bytes=MAX_UPLOAD_BYTES,
+                            max_members=MAX_BATCH_FILES - len(items),
+                            max_memory_bytes=0
+                        )
+                    except zipfile.BadZipFile as e:
+                        raise ValidationError(f"Invalid zip archive: {str(e)}")
+                    except TooManyFilesError:
+                        # max_members הוא מה שנשאר אחרי הקבצים - השגיאה עם המגבלה של כל ה-batch
+                        raise TooManyFilesError(MAX_BATCH_FILES)
+            items.extend((name, "application/pdf", upload, error) for name, upload, error in members)
+    except BaseException:
+        for _, _, upload, _ in items:
+            if upload is not None:
+                upload.close()
+        raise
+
+    if not items:
+        raise ValidationError("No PDF files found in request")
+
+    results, inserted_ids = await process_batch_upload(
+        db_client,
+        storage_backend,
+        items,
+        item_metadata,
+        {"campaign": campaign, "notes": notes}
+    )
+
+    # webhook אחד ב-background לכל ה-batch, עם מקביליות חסומה
+    background_tasks.add_task(call_webhooks_for_batch, inserted_ids)
+    logger.info(f"[BATCH_UPLOAD] Webhook task added to background for {len(inserted_ids)} documents")
+
+    return {
+        "total": len(results),
+        "stored": len(inserted_ids),
+        "rejected": len(results) - len(inserted_ids),
+        "items": results
+    }
+
+@app.get("/extraction-cache/stats")
+async def get_extraction_cache_stats():
+    """
+    מחזיר מוני hit/miss של ה-cache של חילוץ ה-PDF (זיכרון ו-Mongo)
+    """
+    return get_cache_stats()
+
+@app.get("/admin/index-advisor")
+async def index_advisor():
+    """
+    מריץ explain על ה-queries של ה-storage ומחזיר אילו מהם סורקים את כל ה-collection,
+    אילו ממיינים בזיכרון, ואילו אינדקסים מוגדרים חסרים
+    """
+    if db_client is None:
+        raise DatabaseRequiredError("Index advisor")
+    return await run_index_advisor(db_client)
+
+@app.get("/document-cache/stats")
+async def document_cache_stats():
+    """מונים של ה-document cache: גודל, hits, misses ו-hit rate"""
+    return get_document_cache_stats()
+
+@app.get("/search-index/stats")
+async def search_index_stats():
+    """מצב אינדקס החיפוש: מוכן או בבנייה, מספר מסמכים ו-terms, זמן הבנייה האחרונה"""
+    return get_search_index_stats()
 
 @app.get("/statuses")
 async def get_statuses():
@@ -194,10 +446,22 @@ async def search_cv(
     job_type: Optional[str] = Query(None, description="חיפוש לפי סוג עבודה"),
     match_score: Optional[str] = Query(
         None,
-        description="חיפוש לפי טווח ציון התאמה: 'below 70', '70-79', '80-89', '90-100', 'all match_score'"
+        description="חיפוש לפי טווח ציון התאמה: 'below 70', '70-79', '80-89', '90-100', 'all match_score' או טווח 'min-max'"
     ),
+    min_score: Optional[float] = Query(None, description="ציון התאמה מינימלי (כולל)"),
+    max_score: Optional[float] = Query(None, description="ציון התאמה מקסימלי (כולל)"),
     campaign: Optional[str] = Query(None, description="חיפוש לפי קמפיין"),
-    country: Optional[str] = Query(None, description="חיפוש לפי ארץ (nationality)")
+    country: Optional[str] = Query(None, description="חיפוש לפי ארץ (nationality)"),
+    match_mode: str = Query(
+        MATCH_MODE_PREFIX,
+        description="job_type / campaign / country: exact - ערך מלא, prefix - תחילת הערך (לא תלוי רישיות)"
+    ),
+    entered_status: Optional[str] = Query(None, description="מסמכים שנכנסו לסטטוס הזה (לפי status_history)"),
+    entered_from: Optional[datetime.datetime] = Query(None, description="עם entered_status - נכנסו מהזמן הזה (כולל), ISO 8601"),
+    entered_to: Optional[datetime.datetime] = Query(None, description="עם entered_status - נכנסו לפני הזמן הזה, ISO 8601"),
+    view: str = Query(VIEW_FULL, description="full - מסמך מלא, summary - שורה מקוצרת (CVSummary)"),
+    fields: Optional[str] = Query(None, description="רשימת שדות מופרדת בפסיקים, למשל known_data.name,current_status"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     חיפוש מתקדם במסמכי CV
@@ -205,49 +469,168 @@ async def search_cv(
     תומך בחיפוש חופשי (בכל השדות) ובחיפוש לפי שדות ספציפיים:
     - current_status: סטטוס נוכחי
     - job_type: סוג עבודה
-    - match_score: טווח ציון התאמה (below 70, 70-79, 80-89, 90-100, all match_score)
+    - match_score: טווח ציון התאמה (below 70, 70-79, 80-89, 90-100, all match_score, או "min-max")
+    - min_score / max_score: טווח ציון התאמה מספרי
     - campaign: קמפיין
     - country: ארץ (nationality)
+    - entered_status (+ entered_from / entered_to): נכנסו לסטטוס בטווח הזמן
     
+    job_type, campaign ו-country לא תלויים רישיות ומתאימים לפי match_mode (exact או prefix).
     ניתן לשלב מספר קריטריונים - החיפוש יחזיר מסמכים התואמים לכל הקריטריונים.
+    view/fields קובעים אילו שדות יוחזרו (כמו ב-GET /cv), וה-ETag עובד כמו ב-GET /cv.
     """
     # בדוק שיש לפחות קריטריון חיפוש אחד
-    if not any([free_text, current_status, job_type, match_score, campaign, country]):
+    if not any([free_text, current_status, job_type, match_score, campaign, country, entered_status]) \
+            and min_score is None and max_score is None:
         raise ValidationError("יש לספק לפחות קריטריון חיפוש אחד")
+    validate_entered_range(entered_status, entered_from, entered_to)
     
     # בדוק שהערך של match_score תקף
-    if match_score and match_score not in ["below 70", "70-79", "80-89", "90-100", "all match_score"]:
-        raise ValidationError(
-            f"ערך לא תקף ל-match_score: '{match_score}'. "
-            "הערכים התקפים: 'below 70', '70-79', '80-89', '90-100', 'all match_score'"
-        )
+    if match_score and match_score != MATCH_SCORE_ALL:
+        parse_match_score_range(match_score)
+    if min_score is not None and max_score is not None and min_score > max_score:
+        raise ValidationError("min_score גדול מ-max_score")
     
-    results = await search_documents_advanced(
-        db_client,
+    search = dict(
         free_text=free_text,
         current_status=current_status,
         job_type=job_type,
         match_score=match_score,
         campaign=campaign,
-        country=country
+        country=country,
+        min_score=min_score,
+        max_score=max_score,
+        match_mode=validate_match_mode(match_mode),
+        entered_status=entered_status,
+        entered_from=to_utc(entered_from) if entered_from else None,
+        entered_to=to_utc(entered_to) if entered_to else None,
+        view=validate_view(view),
+        fields=parse_fields(fields)
     )
+    etag = await _list_etag("search", **search)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    results = await storage_backend.search_documents_advanced(**search)
     
-    return results
+    return FastJSONResponse(results, headers={"ETag": etag})
+
+@app.get("/cv/stats")
+async def get_cv_stats(
+    free_text: Optional[str] = Query(None, description="חיפוש חופשי"),
+    current_status: Optional[str] = Query(None, description="סטטוס נוכחי"),
+    job_type: Optional[str] = Query(None, description="סוג עבודה"),
+    match_score: Optional[str] = Query(None, description="טווח ציון התאמה (כמו ב-/cv/search)"),
+    campaign: Optional[str] = Query(None, description="קמפיין"),
+    country: Optional[str] = Query(None, description="ארץ (nationality)"),
+    min_score: Optional[float] = Query(None, description="ציון התאמה מינימלי (כולל)"),
+    max_score: Optional[float] = Query(None, description="ציון התאמה מקסימלי (כולל)"),
+    match_mode: str = Query(MATCH_MODE_PREFIX, description="exact / prefix עבור job_type, campaign, country")
+):
+    """
+    ספירות ל-dashboard: סה"כ, ולפי current_status, campaign, job_type, nationality ו-bucket של match_score
+    
+    כל הפילטרים אופציונליים ופועלים כמו ב-/cv/search. התוצאה נשמרת בזיכרון
+    (CV_STATS_CACHE_TTL_SECONDS) ומתבטלת בכל כתיבה.
+    """
+    if match_score and match_score != MATCH_SCORE_ALL:
+        parse_match_score_range(match_score)
+    return await storage_backend.get_document_stats(
+        free_text=free_text,
+        current_status=current_status,
+        job_type=job_type,
+        match_score=match_score,
+        campaign=campaign,
+        country=country,
+        min_score=min_score,
+        max_score=max_score,
+        match_mode=validate_match_mode(match_mode)
+    )
 
 @app.get("/cv/{id}")
-async def get_cv_by_id(id: str):
-    """Get a CV document by ID (returns deleted documents too)"""
-    doc = await get_document_by_id(db_client, id)
+async def get_cv_by_id(id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Get a CV document by ID (returns deleted documents too)
+    
+    The ETag is the document version; If-None-Match with the current one returns 304
+    without loading the extracted text.
+    """
+    if if_none_match:
+        version = await storage_backend.get_document_version(id)
+        if version is None:
+            raise DocumentNotFoundError(id)
+        etag = make_etag("cv", id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    doc = await storage_backend.get_document_by_id(id, include_text=True)
     if not doc:
         raise DocumentNotFoundError(id)
-    return doc
+    return FastJSONResponse(doc, headers={"ETag": make_etag("cv", id, doc.get("version", 0))})
+
+@app.get("/cv/{id}/history")
+async def get_cv_history(
+    id: str,
+    limit: int = Query(CV_HISTORY_PAGE_DEFAULT_LIMIT, ge=1, le=CV_HISTORY_PAGE_MAX_LIMIT, description="גודל עמוד"),
+    after: Optional[str] = Query(None, description="next_after מהעמוד הקודם")
+):
+    """
+    The full status history of a CV document, oldest first (returns deleted documents too)
+    
+    The document itself keeps only the last entries of status_history; this pages
+    through all of them - {"items": [...], "next_after": token או null}
+    """
+    after_id = decode_cursor(after) if after else None
+    page = await storage_backend.get_document_history(id, limit, after_id)
+    if page is None:
+        raise DocumentNotFoundError(id)
+    items, next_id = page
+    return FastJSONResponse({"items": items, "next_after": encode_cursor(next_id) if next_id else None})
+
+@app.get("/cv/{id}/file")
+async def download_cv_file(id: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Download the original PDF of a CV document
+    
+    The file is streamed from the blob store in chunks (never fully loaded into memory).
+    Supports a single HTTP Range (e.g. "bytes=0-1023") for partial downloads and previews.
+    """
+    doc = await storage_backend.get_document_by_id(id, include_text=False)
+    if not doc:
+        raise DocumentNotFoundError(id)
+    file_metadata = doc.get("file_metadata") or {}
+    blob_id = file_metadata.get("blob_id")
+    if not blob_id:
+        raise FileNotStoredError(id)
+
+    store = get_blob_store(db_client, file_metadata.get("blob_store"))
+    size_bytes = await store.get_size(blob_id)
+    if size_bytes is None:
+        logger.error(f"[DOWNLOAD] Blob {blob_id} of document {id} is missing from the blob store")
+        raise FileNotStoredError(id)
+
+    byte_range = parse_range_header(range_header, size_bytes)
+    start, end = byte_range or (0, size_bytes - 1)
+    filename = file_metadata.get("filename") or f"{id}.pdf"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}",
+    }
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size_bytes}"
+
+    return StreamingResponse(
+        store.iter_range(blob_id, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=file_metadata.get("content_type") or "application/pdf",
+        headers=headers
+    )
 
 @app.delete("/cv/{id}")
 async def delete_cv_by_id(id: str):
     """
     Soft delete a document by setting is_deleted to True
     """
-    deleted = await delete_document_by_id(db_client, id)
+    deleted = await storage_backend.delete_document_by_id(id)
     if not deleted:
         raise DocumentNotFoundError(id)
     return {"status": "deleted"}
@@ -257,7 +640,7 @@ async def restore_cv_by_id(id: str):
     """
     Restore a deleted document by setting is_deleted to False
     """
-    restored = await restore_document_by_id(db_client, id)
+    restored = await storage_backend.restore_document_by_id(id)
     if not restored:
         raise DocumentNotFoundError(id)
     return {"status": "restored", "id": id}
@@ -267,45 +650,34 @@ async def update_cv(id: str, update_data: CVUpdateRequest):
     """
     Update a document - updates only fields provided in body (except phone_number which cannot be updated)
     Accepts JSON with fields to update
-    """
-    # Check document exists
-    doc = await get_document_by_id(db_client, id)
-    if not doc:
-        raise DocumentNotFoundError(id)
     
+    The fields and the status transition (Extracting -> Ready For Bot Interview,
+    In Classification -> Ready For Recruit) are written in one atomic update.
+    """
     # המר את ה-Pydantic model ל-dict - רק שדות שנשלחו (exclude_none=True)
     update_dict = update_data.model_dump(exclude_none=True)
     
     # הסר phone_number - לא ניתן לעדכן אותו
     update_dict.pop("phone_number", None)
     
-    # אם אין שדות לעדכון, החזר הודעה
-    if not update_dict:
-        logger.info(f"[UPDATE] Document {id} - no fields to update")
+    result = await storage_backend.update_document_fields_with_transition(id, update_dict, UPDATE_STATUS_TRANSITIONS)
+    if result is None:
+        # מסמך מחוק קיים, אבל לא מתעדכן
+        if not await storage_backend.get_document_by_id(id, include_text=False):
+            raise DocumentNotFoundError(id)
+        logger.info(f"[UPDATE] Document {id} is deleted - not updated")
         return {"status": "no_changes", "id": id, "message": "No fields to update"}
     
-    # עדכן את המסמך - רק את השדות שנשלחו
-    updated = await update_document_fields_only(db_client, id, update_dict)
-    
-    if updated:
-        # בדוק את הסטטוס הנוכחי ועדכן בהתאם
-        current_status = doc.get("current_status")
-        
-        # אם הסטטוס הנוכחי הוא EXTRACTING - עדכן ל-READY_FOR_BOT_INTERVIEW
-        if current_status == STATUS_EXTRACTING:
-            await update_document_status(db_client, id, STATUS_READY_FOR_BOT_INTERVIEW)
-            logger.info(f"[UPDATE] Document {id} updated successfully, status changed from '{STATUS_EXTRACTING}' to '{STATUS_READY_FOR_BOT_INTERVIEW}'")
-        # אם הסטטוס הנוכחי הוא IN_CLASSIFICATION - עדכן ל-READY_FOR_RECRUIT
-        elif current_status == STATUS_IN_CLASSIFICATION:
-            await update_document_status(db_client, id, STATUS_READY_FOR_RECRUIT)
-            logger.info(f"[UPDATE] Document {id} updated successfully, status changed from '{STATUS_IN_CLASSIFICATION}' to '{STATUS_READY_FOR_RECRUIT}'")
-        else:
-            logger.info(f"[UPDATE] Document {id} updated successfully (current status: {current_status}, no status change needed)")
-        
-        return {"status": "updated", "id": id}
-    else:
+    if not result["modified"]:
         logger.info(f"[UPDATE] Document {id} - no fields to update")
         return {"status": "no_changes", "id": id, "message": "No fields to update"}
+    
+    previous_status, current_status = result["previous_status"], result["current_status"]
+    if current_status != previous_status:
+        logger.info(f"[UPDATE] Document {id} updated successfully, status changed from '{previous_status}' to '{current_status}'")
+    else:
+        logger.info(f"[UPDATE] Document {id} updated successfully (current status: {current_status}, no status change needed)")
+    return {"status": "updated", "id": id}
 
 @app.patch("/cv/{id}/status")
 async def update_cv_status(id: str, status_data: StatusUpdateRequest):
@@ -325,7 +697,7 @@ async def update_cv_status(id: str, status_data: StatusUpdateRequest):
     - 7: Ready For Recruit
     """
     # Check document exists
-    doc = await get_document_by_id(db_client, id)
+    doc = await storage_backend.get_document_by_id(id, include_text=False)
     if not doc:
         raise DocumentNotFoundError(id)
     
@@ -335,7 +707,7 @@ async def update_cv_status(id: str, status_data: StatusUpdateRequest):
         raise InvalidStatusError(status_data.status_id, STATUS_ID_MAP)
     
     # עדכן את הסטטוס
-    updated = await update_document_status(db_client, id, status_value)
+    updated = await storage_backend.update_document_status(id, status_value)
     if updated:
         logger.info(f"[STATUS_UPDATE] Document {id} status updated to '{status_value}' (ID: {status_data.status_id})")
         return {
@@ -355,13 +727,13 @@ async def update_recruit_note(id: str, note_data: RecruitNoteRequest):
     שומר את ההערה תחת known_data.recruit_note
     """
     # בדוק שהמסמך קיים
-    doc = await get_document_by_id(db_client, id)
+    doc = await storage_backend.get_document_by_id(id, include_text=False)
     if not doc:
         raise DocumentNotFoundError(id)
     
     # עדכן את ההערה
     update_dict = {"recruit_note": note_data.recruit_note}
-    updated = await update_document_fields_only(db_client, id, update_dict)
+    updated = await storage_backend.update_document_fields_only(id, update_dict)
     
     if updated:
         logger.info(f"[RECRUIT_NOTE] Document {id} - recruit note updated successfully")
@@ -381,7 +753,7 @@ async def trigger_bot_processor():
     """
     logger.info("[MANUAL_TRIGGER] Manual trigger of bot processor requested (triggered by user via API endpoint)")
     try:
-        results = await process_waiting_for_bot_records(db_client, trigger_source="manual")
+        results = await process_waiting_for_bot_records(storage_backend, trigger_source="manual")
         logger.info(f"[MANUAL_TRIGGER] Manual trigger completed: {results}")
         return {
             "status": "completed",
@@ -403,7 +775,7 @@ async def trigger_single_bot_processor(id: str):
     """
     logger.info(f"[MANUAL_TRIGGER] Manual trigger of single bot processor for record {id}")
     try:
-        result = await process_single_bot_record(db_client, id)
+        result = await process_single_bot_record(storage_backend, id)
         logger.info(f"[MANUAL_TRIGGER] Single bot processor completed for record {id}: {result}")
         
         # אם הרשומה לא נמצאה או לא בסטטוס הנכון, החזר שגיאה מתאימה
@@ -438,7 +810,7 @@ async def trigger_classification_processor():
     """
     logger.info("[MANUAL_TRIGGER] Manual trigger of classification processor requested (triggered by user via API endpoint)")
     try:
-        results = await process_waiting_classification_records(db_client)
+        results = await process_waiting_classification_records(storage_backend)
         logger.info(f"[MANUAL_TRIGGER] Manual classification trigger completed: {results}")
         return {
             "status": "completed",
@@ -461,6 +833,8 @@ async def get_chat_history(id: str):
         Dictionary עם היסטוריית הצ'אט של המשתמש
     """
     logger.info(f"[CHAT_HISTORY] Requesting chat history for user ID: {id}")
+    if db_client is None:
+        raise DatabaseRequiredError("Chat history")
     try:
         chat_history = await get_chat_history_by_id(db_client, id)
         
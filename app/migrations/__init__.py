@@ -0,0 +1,5 @@
+"""
+One-off data migrations
+Each module is runnable as `python -m app.migrations.<name>` and is resumable -
+running it again continues from the documents that were not migrated yet.
+"""
@@ -0,0 +1,98 @@
+"""
+Migration: copy the status_history of existing CV documents to the history archive
+(STATUS_HISTORY_COLLECTION_NAME, app.services.status_history_store) and trim the
+embedded history to the last STATUS_HISTORY_MAX_EMBEDDED entries.
+Entries are upserted by (cv_id, code, time), so entries already archived on write
+are not duplicated and a re-run is safe. Legacy entries are archived in the
+compact encoding, with the same key compact_status_history gives them, and
+their webhook response bodies are saved on the record.
+
+Run it with STATUS_HISTORY_MAX_EMBEDDED=0 deployed (nothing is trimmed on write),
+then enable the limit and run it once more to trim the documents.
+
+Usage:
+    python -m app.migrations.archive_status_history [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from app.core.config import (
+    COLLECTION_NAME, STATUS_HISTORY_COLLECTION_NAME, STATUS_HISTORY_MAX_EMBEDDED, TEXT_SCAN_BATCH_SIZE
+)
+from app.services.status_history_store import build_history_push, build_history_record
+from app.utils.status_history import CODE_KEY, TIME_KEY, HISTORY_FIELD, compact_legacy_history
+
+logger = logging.getLogger(__name__)
+
+
+async def run(db, batch_size: int = TEXT_SCAN_BATCH_SIZE) -> Dict[str, int]:
+    """
+    מעתיק את status_history של כל המסמכים לארכיון ומקצר את ה-history במסמך
+
+    Args:
+        db: מסד הנתונים
+        batch_size: מספר מסמכים בכל batch
+
+    Returns:
+        dict עם מספר ה-entries שנוספו לארכיון, מספר המסמכים שקוצרו ומספר ה-batches
+    """
+    collection = db[COLLECTION_NAME]
+    archive = db[STATUS_HISTORY_COLLECTION_NAME]
+    stats = {"archived": 0, "trimmed": 0, "batches": 0}
+    last_id = None
+    while True:
+        # לפי סדר _id מהמסמך האחרון - כל מסמך נבדק פעם אחת בריצה
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await collection.find(query, {HISTORY_FIELD: 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        upserts = []
+        for doc in batch:
+            entries, webhook_bodies = compact_legacy_history(doc.get(HISTORY_FIELD) or [])
+            body_by_entry = {id(entry): body for entry, body in webhook_bodies}
+            for entry in entries:
+                # גוף התשובה של entry ישן נשמר ברשומה עצמה - רק כשהיא נוספת עכשיו לארכיון
+                record = build_history_record(doc["_id"], entry, body_by_entry.get(id(entry)))
+                key = {"cv_id": doc["_id"], CODE_KEY: record.pop(CODE_KEY, None), TIME_KEY: record.pop(TIME_KEY, None)}
+                record.pop("cv_id")
+                upserts.append(UpdateOne(key, {"$setOnInsert": record}, upsert=True))
+        if upserts:
+            result = await archive.bulk_write(upserts, ordered=False)
+            stats["archived"] += result.upserted_count
+
+        # הקיצור אחרי שה-entries בארכיון, ומותנה ב-history שנקרא - entry שנוסף בינתיים כבר נכתב לארכיון בעצמו
+        if STATUS_HISTORY_MAX_EMBEDDED > 0:
+            for doc in batch:
+                history = doc.get(HISTORY_FIELD) or []
+                if len(history) <= STATUS_HISTORY_MAX_EMBEDDED:
+                    continue
+                result = await collection.update_one(
+                    {"_id": doc["_id"], HISTORY_FIELD: history},
+                    {"$push": build_history_push([])}
+                )
+                stats["trimmed"] += result.modified_count
+
+        stats["batches"] += 1
+        logger.info(f"[MIGRATION] status_history: archived {stats['archived']} entries, trimmed {stats['trimmed']} documents")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy status_history to the history archive and trim the embedded history")
+    parser.add_argument("--batch-size", type=int, default=TEXT_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.database import get_database
+    stats = asyncio.run(run(get_database(), batch_size=args.batch_size))
+    print(f"Archived {stats['archived']} entries and trimmed {stats['trimmed']} documents in {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
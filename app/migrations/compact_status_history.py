@@ -0,0 +1,79 @@
+"""
+Migration: re-encode status_history entries written before the compact encoding
+({"status", "timestamp"} -> {"c", "t", "d"}, app.utils.status_history). Webhook
+response texts are moved to the entry's record in the history archive.
+Selects documents that still have a legacy entry, in _id order, so it is
+resumable: a re-run picks up whatever an interrupted run left.
+
+Usage:
+    python -m app.migrations.compact_status_history [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from app.core.config import COLLECTION_NAME, TEXT_SCAN_BATCH_SIZE
+from app.services.status_history_store import save_webhook_bodies
+from app.utils.status_history import HISTORY_FIELD, compact_legacy_history
+
+logger = logging.getLogger(__name__)
+
+# entry בפורמט הישן - יש לו status (ל-entry הקומפקטי יש c)
+LEGACY_QUERY = {f"{HISTORY_FIELD}.status": {"$exists": True}}
+
+
+async def run(db, batch_size: int = TEXT_SCAN_BATCH_SIZE) -> Dict[str, int]:
+    """
+    מקודד מחדש את status_history בכל המסמכים שיש להם entry בפורמט הישן
+
+    Args:
+        db: מסד הנתונים
+        batch_size: מספר מסמכים בכל batch
+
+    Returns:
+        dict עם מספר המסמכים שעודכנו, מספר המסמכים שדולגו (השתנו בזמן הריצה) ומספר ה-batches
+    """
+    collection = db[COLLECTION_NAME]
+    stats = {"updated": 0, "skipped": 0, "batches": 0}
+    last_id = None
+    while True:
+        # לפי סדר _id מהמסמך האחרון - כל מסמך נבדק פעם אחת בריצה
+        query = dict(LEGACY_QUERY) if last_id is None else {**LEGACY_QUERY, "_id": {"$gt": last_id}}
+        batch = await collection.find(query, {HISTORY_FIELD: 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        for doc in batch:
+            history, bodies = compact_legacy_history(doc[HISTORY_FIELD])
+            # גוף התשובה נשמר לפני ה-entry. העדכון מותנה ב-history שנקרא - entry שנוסף בינתיים
+            # משאיר את המסמך לריצה הבאה (ואז הגוף נשמר שוב, עם אותו מפתח)
+            await save_webhook_bodies(db, doc["_id"], bodies)
+            result = await collection.update_one(
+                {"_id": doc["_id"], HISTORY_FIELD: doc[HISTORY_FIELD]},
+                {"$set": {HISTORY_FIELD: history}}
+            )
+            if result.modified_count:
+                stats["updated"] += 1
+            else:
+                stats["skipped"] += 1
+
+        stats["batches"] += 1
+        logger.info(f"[MIGRATION] status_history: compacted {stats['updated']} documents")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-encode legacy status_history entries in the compact format")
+    parser.add_argument("--batch-size", type=int, default=TEXT_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.database import get_database
+    stats = asyncio.run(run(get_database(), batch_size=args.batch_size))
+    print(f"Compacted {stats['updated']} documents in {stats['batches']} batches ({stats['skipped']} changed during the run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Migration: move extracted_text from the CV documents to the side collection
+Documents are handled in batches; each batch is upserted into the side collection
+first and only then unset on the CV documents, so an interrupted run loses nothing
+and a re-run picks up the documents that still have the field.
+
+Usage:
+    python -m app.migrations.extracted_text_to_side_collection [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from app.core.config import COLLECTION_NAME, TEXT_SCAN_BATCH_SIZE
+from app.services.text_store import save_extracted_texts
+
+logger = logging.getLogger(__name__)
+
+
+async def run(db, batch_size: int = TEXT_SCAN_BATCH_SIZE) -> Dict[str, int]:
+    """
+    מעביר את extracted_text של כל המסמכים שעדיין מכילים אותו ל-side collection
+
+    Args:
+        db: מסד הנתונים
+        batch_size: מספר מסמכים בכל batch
+
+    Returns:
+        dict עם מספר המסמכים שהועברו ומספר ה-batches
+    """
+    collection = db[COLLECTION_NAME]
+    stats = {"migrated": 0, "batches": 0}
+    while True:
+        # תמיד מההתחלה - מסמכים שכבר הועברו כבר לא מכילים את השדה
+        batch = await collection.find(
+            {"extracted_text": {"$exists": True}},
+            {"extracted_text": 1}
+        ).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        await save_extracted_texts(db, {doc["_id"]: doc.get("extracted_text") or "" for doc in batch})
+        # ה-unset מותנה בערך שהועבר - אם הטקסט השתנה בינתיים המסמך יטופל שוב ב-batch הבא
+        await collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], "extracted_text": doc.get("extracted_text")},
+                {"$unset": {"extracted_text": ""}}
+            )
+            for doc in batch
+        ], ordered=False)
+
+        stats["migrated"] += len(batch)
+        stats["batches"] += 1
+        logger.info(f"[MIGRATION] extracted_text: migrated {stats['migrated']} documents")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move extracted_text to the compressed side collection")
+    parser.add_argument("--batch-size", type=int, default=TEXT_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.database import get_database
+    stats = asyncio.run(run(get_database(), batch_size=args.batch_size))
+    print(f"Migrated {stats['migrated']} documents in {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Migration: normalize known_data on CV documents written before it was normalized on write
+("unknown" -> None, job_type / match_score / class_explain present).
+Selects documents that match build_unnormalized_query, in _id order, so it is
+resumable: an interrupted run leaves only documents that still match, and a
+re-run picks them up.
+
+Usage:
+    python -m app.migrations.normalize_known_data [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from app.core.config import COLLECTION_NAME, TEXT_SCAN_BATCH_SIZE
+from app.utils.data_normalization import build_unnormalized_query, normalize_known_data
+
+logger = logging.getLogger(__name__)
+
+
+async def run(db, batch_size: int = TEXT_SCAN_BATCH_SIZE) -> Dict[str, int]:
+    """
+    מנרמל את known_data בכל המסמכים שלא נורמלו בכתיבה
+
+    Args:
+        db: מסד הנתונים
+        batch_size: מספר מסמכים בכל batch
+
+    Returns:
+        dict עם מספר המסמכים שעודכנו, מספר המסמכים שדולגו (השתנו בזמן הריצה) ומספר ה-batches
+    """
+    collection = db[COLLECTION_NAME]
+    unnormalized = build_unnormalized_query()
+    stats = {"updated": 0, "skipped": 0, "batches": 0}
+    last_id = None
+    while True:
+        # לפי סדר _id מהמסמך האחרון - כל מסמך נבדק פעם אחת בריצה
+        query = dict(unnormalized) if last_id is None else {"$and": [unnormalized, {"_id": {"$gt": last_id}}]}
+        batch = await collection.find(query, {"known_data": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        # העדכון מותנה ב-known_data שנקרא - מסמך שהשתנה בינתיים (ונורמל בכתיבה) לא נדרס
+        result = await collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], "known_data": doc.get("known_data")},
+                {"$set": {"known_data": normalize_known_data(doc.get("known_data"))}}
+            )
+            for doc in batch
+        ], ordered=False)
+
+        stats["updated"] += result.modified_count
+        stats["skipped"] += len(batch) - result.matched_count
+        stats["batches"] += 1
+        logger.info(f"[MIGRATION] known_data: normalized {stats['updated']} documents")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Normalize known_data on existing CV documents")
+    parser.add_argument("--batch-size", type=int, default=TEXT_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.database import get_database
+    stats = asyncio.run(run(get_database(), batch_size=args.batch_size))
+    print(f"Normalized {stats['updated']} documents in {stats['batches']} batches ({stats['skipped']} changed during the run)")
+
+
+if __name__ == "__main__":
+    main()
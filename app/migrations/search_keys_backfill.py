@@ -0,0 +1,74 @@
+"""
+Migration: (re)build search_keys on existing CV documents
+Selects documents whose search_keys.v is not the current SEARCH_KEYS_VERSION
+(including documents that have no search_keys at all), so it is resumable and
+is also the upgrade path whenever build_search_keys changes.
+Required after deploying search_keys (or bumping SEARCH_KEYS_VERSION): the
+match_score range and the job_type / campaign / country filters read only
+search_keys, so documents that were not backfilled don't match them.
+
+Usage:
+    python -m app.migrations.search_keys_backfill [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from app.core.config import COLLECTION_NAME, TEXT_SCAN_BATCH_SIZE
+from app.utils.search_keys import SEARCH_KEYS_FIELD, SEARCH_KEYS_VERSION, build_search_keys
+
+logger = logging.getLogger(__name__)
+
+
+async def run(db, batch_size: int = TEXT_SCAN_BATCH_SIZE) -> Dict[str, int]:
+    """
+    כותב search_keys לכל המסמכים שאין להם search_keys בגרסה הנוכחית
+
+    Args:
+        db: מסד הנתונים
+        batch_size: מספר מסמכים בכל batch
+
+    Returns:
+        dict עם מספר המסמכים שעודכנו בפועל ומספר ה-batches
+    """
+    collection = db[COLLECTION_NAME]
+    stale = {f"{SEARCH_KEYS_FIELD}.v": {"$ne": SEARCH_KEYS_VERSION}}
+    stats = {"updated": 0, "batches": 0}
+    while True:
+        # תמיד מההתחלה - מסמך שעודכן כבר לא עונה על stale
+        batch = await collection.find(stale, {"known_data": 1}).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        # כתיבה מקבילה (update_document_*) כותבת search_keys בגרסה הנוכחית, לכן העדכון מותנה ב-stale
+        result = await collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], **stale},
+                {"$set": {SEARCH_KEYS_FIELD: build_search_keys(doc.get("known_data"))}}
+            )
+            for doc in batch
+        ], ordered=False)
+
+        # מסמך שנכתב בינתיים לא עונה על התנאי ולא נספר
+        stats["updated"] += result.modified_count
+        stats["batches"] += 1
+        logger.info(f"[MIGRATION] search_keys: updated {stats['updated']} documents")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill search_keys (typed shadow fields) on CV documents")
+    parser.add_argument("--batch-size", type=int, default=TEXT_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.database import get_database
+    stats = asyncio.run(run(get_database(), batch_size=args.batch_size))
+    print(f"Updated {stats['updated']} documents in {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
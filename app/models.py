@@ -7,6 +7,9 @@ class FileMetadataModel(BaseModel):
     size_bytes: int
     content_type: str
     uploaded_at: str
+    sha256: Optional[str] = None
+    blob_id: Optional[str] = None  # הפניה לקובץ המקורי ב-blob store
+    blob_store: Optional[str] = None
 
 class KnownDataModel(BaseModel):
     name: Optional[str]
@@ -30,10 +33,38 @@ class CVDocumentInDB(BaseModel):
     current_status: str
     status_history: List[StatusHistoryItem]
 
+class CVSummary(BaseModel):
+    """שורה מקוצרת לרשימות (view=summary ב-GET /cv וב-GET /cv/search)"""
+    id: str
+    name: Optional[str] = None
+    latin_name: Optional[str] = None
+    hebrew_name: Optional[str] = None
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+    campaign: Optional[str] = None
+    job_type: Optional[str] = None
+    match_score: Optional[str] = None
+    current_status: Optional[str] = None
+    filename: Optional[str] = None
+    uploaded_at: Optional[str] = None
+
 class CVUploadResponse(BaseModel):
     id: str
     status: str
 
+class CVBatchItemResult(BaseModel):
+    """תוצאה של קובץ בודד בהעלאת batch"""
+    filename: Optional[str] = None
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class CVBatchUploadResponse(BaseModel):
+    total: int
+    stored: int
+    rejected: int
+    items: List[CVBatchItemResult]
+
 class StatusUpdateRequest(BaseModel):
     """Model לעדכון סטטוס מסמך לפי ID"""
     status_id: int = Field(
@@ -1,2 +1,49 @@
-"""Repository layer for database access"""
+"""
+Repository layer for database access
+StorageBackend is the single interface for CV document storage; the backend is
+chosen by STORAGE_BACKEND ("mongo" / "memory").
+"""
+from typing import Dict, Optional
 
+from app.core.config import STORAGE_BACKEND
+from app.repositories.base import StorageBackend, STORAGE_BACKEND_MONGO, STORAGE_BACKEND_MEMORY
+from app.repositories.mongo import MongoStorageBackend
+from app.repositories.memory import InMemoryStorageBackend
+
+_backends: Dict[str, StorageBackend] = {}
+
+
+def get_storage_backend(db=None, backend: Optional[str] = None) -> StorageBackend:
+    """
+    מחזיר את ה-storage backend (instance אחד לכל backend)
+
+    Args:
+        db: מסד הנתונים (רק ל-mongo)
+        backend: "mongo" / "memory" - ברירת מחדל STORAGE_BACKEND
+
+    Raises:
+        ValueError: אם ה-backend לא מוכר, או mongo בלי db
+    """
+    backend = backend or STORAGE_BACKEND
+    storage = _backends.get(backend)
+    if storage is None:
+        if backend == STORAGE_BACKEND_MONGO:
+            if db is None:
+                raise ValueError("The mongo storage backend requires a database")
+            storage = MongoStorageBackend(db)
+        elif backend == STORAGE_BACKEND_MEMORY:
+            storage = InMemoryStorageBackend()
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        _backends[backend] = storage
+    return storage
+
+
+__all__ = [
+    "StorageBackend",
+    "MongoStorageBackend",
+    "InMemoryStorageBackend",
+    "STORAGE_BACKEND_MONGO",
+    "STORAGE_BACKEND_MEMORY",
+    "get_storage_backend",
+]
@@ -0,0 +1,204 @@
+"""
+Storage backend interface
+Every read and write of CV documents made by the API, the jobs and the
+benchmarks goes through a StorageBackend. The operations and their results are
+those of app.services.storage (ids are strings, documents come back in the API
+shape); each backend implements them over its own store.
+"""
+import datetime
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.utils.projection import VIEW_FULL
+
+STORAGE_BACKEND_MONGO = "mongo"
+STORAGE_BACKEND_MEMORY = "memory"
+
+
+class StorageBackend(ABC):
+    """
+    Base class for storage backends
+
+    Subclasses implement the document operations; listing helpers built on
+    iter_documents are shared.
+    """
+
+    name: str = ""
+
+    # --- insert ---
+
+    @abstractmethod
+    async def insert_cv_document(self, doc: dict, initial_statuses: Optional[List[str]] = None) -> str:
+        """
+        Insert a new document with current_status=Submitted
+
+        Args:
+            initial_statuses: statuses added to the history after Submitted (e.g. processing)
+
+        Returns:
+            The new document id
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_cv_documents(self, docs: List[dict], initial_statuses: Optional[List[str]] = None) -> List[str]:
+        """Insert several documents at once (batch upload), ids in the same order as docs"""
+        raise NotImplementedError
+
+    # --- read ---
+
+    @abstractmethod
+    async def get_document_by_id(self, id: str, include_text: bool = True) -> Optional[dict]:
+        """The document (deleted ones too), with extracted_text if include_text, or None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_document_version(self, id: str) -> Optional[int]:
+        """The document version (ETag of GET /cv/{id}), or None if it doesn't exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_collection_version(self) -> str:
+        """Opaque token that changes on every successful write (ETag of GET /cv and /cv/search)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_document_history(
+        self,
+        id: str,
+        limit: int,
+        after: Optional[ObjectId] = None
+    ) -> Optional[Tuple[List[dict], Optional[ObjectId]]]:
+        """One page of the full status history, or None if the document doesn't exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_documents(
+        self,
+        deleted: Optional[bool] = None,
+        after: Optional[ObjectId] = None,
+        limit: int = 0,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[dict]:
+        """Documents in _id order, one at a time (see storage.iter_documents)"""
+        raise NotImplementedError
+
+    async def get_all_documents(
+        self,
+        deleted: Optional[bool] = None,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        return [doc async for doc in self.iter_documents(deleted, view=view, fields=fields)]
+
+    async def get_documents_page(
+        self,
+        deleted: Optional[bool],
+        limit: int,
+        after: Optional[ObjectId] = None,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[dict], Optional[ObjectId]]:
+        """
+        Returns:
+            (docs, next_after) - next_after is None on the last page
+        """
+        # מסמך אחד נוסף כדי לדעת אם יש עמוד הבא בלי count
+        docs = [doc async for doc in self.iter_documents(deleted, after, limit + 1, view, fields)]
+        if len(docs) <= limit:
+            return docs, None
+        docs = docs[:limit]
+        return docs, ObjectId(docs[-1]["id"])
+
+    @abstractmethod
+    async def get_documents_by_status(self, status: str) -> List[dict]:
+        """Documents that are not deleted and have this current_status"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_documents_advanced(
+        self,
+        free_text: Optional[str] = None,
+        current_status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        match_score: Optional[str] = None,
+        campaign: Optional[str] = None,
+        country: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        match_mode: Optional[str] = None,
+        entered_status: Optional[str] = None,
+        entered_from: Optional[datetime.datetime] = None,
+        entered_to: Optional[datetime.datetime] = None,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Search with the /cv/search filters (see storage.build_search_query)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_document_stats(self, **filters: Any) -> Dict[str, Any]:
+        """GET /cv/stats counts over the documents matching the search filters"""
+        raise NotImplementedError
+
+    # --- write ---
+
+    @abstractmethod
+    async def delete_document_by_id(self, id: str) -> bool:
+        """Soft delete (is_deleted=True). False if missing or already deleted"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def restore_document_by_id(self, id: str) -> bool:
+        """Undo a soft delete. False if missing or not deleted"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document_status(self, id: str, status: str) -> bool:
+        """Set current_status and add it to the history"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_status_to_history(self, id: str, status: str) -> bool:
+        """Add a status to the history without changing current_status"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def record_webhook_result(self, id: str, webhook_status: str, new_status: Optional[str] = None) -> bool:
+        """Record a webhook result and the optional move to new_status in one write"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_extraction_result(self, id: str, extracted_text: str, processing_status: str) -> bool:
+        """Store a deferred extraction result. False if the document doesn't exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document_full(self, id: str, update_data: dict) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document_fields_only(self, id: str, update_data: dict) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document_partial(self, id: str, update_data: dict) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document_fields_with_transition(
+        self,
+        id: str,
+        update_data: dict,
+        transitions: Optional[Dict[str, str]] = None
+    ) -> Optional[dict]:
+        """
+        Update known_data fields and apply a conditional status transition atomically
+
+        Returns:
+            None if the document is missing or deleted, else modified / previous_status / current_status
+        """
+        raise NotImplementedError
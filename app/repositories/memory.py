@@ -0,0 +1,408 @@
+"""
+In-memory storage backend
+Keeps CV documents, extracted texts, the status history archive and webhook
+response bodies in the process - no database. For local development and for
+benchmarking against the Mongo backend (benchmarks/storage_bench.py).
+
+Documents are stored exactly as the Mongo backend stores them (compact
+status_history, search_keys, version) and selected with the same query dicts
+(app.services.storage builders, evaluated by app.utils.query_matcher), so both
+backends return the same results for the same operations. Documents come back
+in _id order.
+
+No operation awaits between reading and writing its state, so each one is
+atomic on the event loop - the same guarantee the Mongo backend gets from
+single-document updates. Data is lost when the process exits.
+"""
+import bisect
+import datetime
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import STATUS_HISTORY_MAX_EMBEDDED
+from app.repositories.base import StorageBackend, STORAGE_BACKEND_MEMORY
+from app.services import cv_stats
+from app.services.status_history_store import build_history_record
+from app.services.storage import (
+    VERSION_FIELD,
+    LIST_PROJECTION,
+    initialize_document,
+    is_unchanged,
+    build_fields_update,
+    build_partial_update,
+    collect_known_data_updates,
+    build_list_query,
+    build_status_query,
+    build_search_query,
+)
+from app.utils.projection import VIEW_FULL, build_projection, shape_document
+from app.utils.query_matcher import copy_value, match_query, apply_projection, set_path, unset_path
+from app.utils.search_keys import SEARCH_KEYS_FIELD, MATCH_MODE_PREFIX, build_search_key_updates
+from app.utils.status_history import (
+    CODE_KEY, TIME_KEY, DETAIL_KEY, HISTORY_FIELD, build_entry, encode_entry, decode_entry,
+    history_now, expand_history, build_entered_query
+)
+
+
+class InMemoryStorageBackend(StorageBackend):
+    """CV documents in process memory"""
+
+    name = STORAGE_BACKEND_MEMORY
+
+    def __init__(self):
+        self._documents: Dict[ObjectId, dict] = {}
+        # ה-_id בסדר עולה - רשימות ו-keyset pagination בלי מיון בכל קריאה
+        self._ids: List[ObjectId] = []
+        # extracted_text - רק טקסט לא ריק, כמו ה-side collection
+        self._texts: Dict[ObjectId, str] = {}
+        # ארכיון ה-history: cv_id -> רשומות לפי סדר _id
+        self._history: Dict[ObjectId, List[dict]] = {}
+        # גוף התשובה של webhooks: cv_id -> (code, time) -> body
+        self._webhook_bodies: Dict[ObjectId, Dict[Tuple[int, datetime.datetime], str]] = {}
+        # מונה כתיבות - ה-ETag של הרשימות (ב-Mongo הגרסה נגזרת מהמסמכים; כאן המונה לא עולה כתיבה)
+        self._collection_version = 0
+
+    # --- פנימי ---
+
+    def _bump(self) -> None:
+        """אחרי כל כתיבה שהצליחה - גרסת הרשימות וה-cache של הסטטיסטיקות"""
+        self._collection_version += 1
+        cv_stats.invalidate_stats_cache()
+
+    def _archive(self, cv_id: ObjectId, entries: List[dict]) -> None:
+        records = self._history.setdefault(cv_id, [])
+        records.extend(build_history_record(cv_id, entry) for entry in entries)
+        # ה-_id נושא את זמן ה-entry - כמעט תמיד כבר בסדר, ו-sort על רשימה ממוינת הוא מעבר אחד
+        records.sort(key=lambda record: record["_id"])
+
+    def _active(self, id: str) -> Optional[dict]:
+        doc = self._documents.get(ObjectId(id))
+        if doc is None or doc.get("is_deleted") is True:
+            return None
+        return doc
+
+    @staticmethod
+    def _set_known_data(doc: dict, known_data_updates: dict) -> None:
+        """כמו ה-dotted $set של storage._set_known_data: השדות שנשלחו וה-search_keys שנגזרים מהם"""
+        for field, value in known_data_updates.items():
+            set_path(doc, f"known_data.{field}", copy_value(value))
+        search_keys_set, search_keys_unset = build_search_key_updates(known_data_updates)
+        for path, value in search_keys_set.items():
+            set_path(doc, path, value)
+        for path in search_keys_unset:
+            unset_path(doc, path)
+
+    def _push_history(self, doc: dict, entries: List[dict]) -> None:
+        """כמו push_status_entries: לארכיון, ולמסמך רק STATUS_HISTORY_MAX_EMBEDDED האחרונים"""
+        self._archive(doc["_id"], entries)
+        history = doc.setdefault(HISTORY_FIELD, [])
+        history.extend(entries)
+        if STATUS_HISTORY_MAX_EMBEDDED > 0 and len(history) > STATUS_HISTORY_MAX_EMBEDDED:
+            del history[:-STATUS_HISTORY_MAX_EMBEDDED]
+        doc[VERSION_FIELD] = doc.get(VERSION_FIELD, 0) + 1
+
+    def _select(self, query: dict, after: Optional[ObjectId] = None, limit: int = 0) -> List[dict]:
+        """המסמכים שמתאימים ל-query לפי סדר _id (limit - עוצר אחרי limit מסמכים)"""
+        start = bisect.bisect_right(self._ids, after) if after is not None else 0
+        docs = []
+        for object_id in self._ids[start:]:
+            doc = self._documents[object_id]
+            if match_query(doc, query):
+                docs.append(doc)
+                if len(docs) == limit:
+                    break
+        return docs
+
+    def _shape(self, doc: dict, projection: dict, view: str = VIEW_FULL, fields: Optional[List[str]] = None) -> dict:
+        """shape_document על עותק מוקרן, עם גוף התשובה של ה-webhooks"""
+        return shape_document(apply_projection(doc, projection), view, fields, self._webhook_bodies.get(doc["_id"]))
+
+    def _insert(self, doc: dict, initial_statuses: Optional[List[str]], timestamp: datetime.datetime) -> ObjectId:
+        initialize_document(doc, initial_statuses, timestamp)
+        extracted_text = doc.pop("extracted_text", None)
+        object_id = doc.setdefault("_id", ObjectId())
+        if object_id in self._documents:
+            raise DuplicateKeyError(f"duplicate key: _id {object_id}")
+        if extracted_text:
+            self._texts[object_id] = extracted_text
+        self._archive(object_id, doc[HISTORY_FIELD])
+        self._documents[object_id] = copy_value(doc)
+        bisect.insort(self._ids, object_id)
+        return object_id
+
+    # ה-IDs של _text_matches / _entered_matches הם set - match_query בודק $in מול set ב-hash
+
+    def _text_matches(self, free_text: str) -> Set[ObjectId]:
+        """כמו find_ids_matching_text - regex לא תלוי רישיות על הטקסט שחולץ"""
+        regex = re.compile(re.escape(free_text), re.IGNORECASE)
+        return {object_id for object_id, text in self._texts.items() if regex.search(text)}
+
+    def _entered_matches(
+        self,
+        status: str,
+        entered_from: Optional[datetime.datetime],
+        entered_to: Optional[datetime.datetime]
+    ) -> Set[ObjectId]:
+        """כמו find_entered_ids - על הארכיון"""
+        query = build_entered_query(status, entered_from, entered_to)
+        return {
+            cv_id for cv_id, records in self._history.items()
+            if any(match_query(record, query) for record in records)
+        }
+
+    def _search_query(
+        self,
+        free_text: Optional[str] = None,
+        entered_status: Optional[str] = None,
+        entered_from: Optional[datetime.datetime] = None,
+        entered_to: Optional[datetime.datetime] = None,
+        **filters: Any
+    ) -> dict:
+        """כמו resolve_search_query, בלי search index - הטקסט נסרק ישירות"""
+        filters = {name: value for name, value in filters.items() if value is not None}
+        return build_search_query(
+            free_text=free_text,
+            text_matches=self._text_matches(free_text) if free_text else None,
+            entered_matches=self._entered_matches(entered_status, entered_from, entered_to) if entered_status else None,
+            **filters
+        )
+
+    # --- insert ---
+
+    async def insert_cv_document(self, doc: dict, initial_statuses: Optional[List[str]] = None) -> str:
+        object_id = self._insert(doc, initial_statuses, history_now())
+        self._bump()
+        return str(object_id)
+
+    async def insert_cv_documents(self, docs: List[dict], initial_statuses: Optional[List[str]] = None) -> List[str]:
+        if not docs:
+            return []
+        timestamp = history_now()
+        for doc in docs:
+            object_id = doc.setdefault("_id", ObjectId())
+            if object_id in self._documents:
+                raise DuplicateKeyError(f"duplicate key: _id {object_id}")
+        ids = [
+            self._insert(doc, [initial_statuses[index]] if initial_statuses else None, timestamp)
+            for index, doc in enumerate(docs)
+        ]
+        self._bump()
+        return [str(object_id) for object_id in ids]
+
+    # --- read ---
+
+    async def get_document_by_id(self, id: str, include_text: bool = True) -> Optional[dict]:
+        object_id = ObjectId(id)
+        stored = self._documents.get(object_id)
+        if stored is None:
+            return None
+        doc = apply_projection(stored, {SEARCH_KEYS_FIELD: 0})
+        if include_text:
+            doc["extracted_text"] = self._texts.get(object_id, "")
+        doc["id"] = str(doc.pop("_id"))
+        return expand_history(doc, self._webhook_bodies.get(object_id) if include_text else None)
+
+    async def get_document_version(self, id: str) -> Optional[int]:
+        doc = self._documents.get(ObjectId(id))
+        return doc.get(VERSION_FIELD, 0) if doc else None
+
+    async def get_collection_version(self) -> str:
+        return str(self._collection_version)
+
+    async def get_document_history(
+        self,
+        id: str,
+        limit: int,
+        after: Optional[ObjectId] = None
+    ) -> Optional[Tuple[List[dict], Optional[ObjectId]]]:
+        object_id = ObjectId(id)
+        if object_id not in self._documents:
+            return None
+        records = self._history.get(object_id, [])
+        start = bisect.bisect_right([record["_id"] for record in records], after) if after is not None else 0
+        page = records[start:start + limit + 1]
+        next_after = page[limit - 1]["_id"] if len(page) > limit else None
+        webhook_bodies = self._webhook_bodies.get(object_id, {})
+        entries = []
+        for record in page[:limit]:
+            entry = {key: record[key] for key in (CODE_KEY, TIME_KEY, DETAIL_KEY) if key in record}
+            entries.append(decode_entry(entry, webhook_bodies.get((entry.get(CODE_KEY), entry.get(TIME_KEY)))))
+        return entries, next_after
+
+    async def iter_documents(
+        self,
+        deleted: Optional[bool] = None,
+        after: Optional[ObjectId] = None,
+        limit: int = 0,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[dict]:
+        # query בלי _id - ה-after מטופל דרך _ids הממוין
+        query = build_list_query(deleted)
+        projection = build_projection(view, fields)
+        for doc in self._select(query, after, limit):
+            yield self._shape(doc, projection, view, fields)
+
+    async def get_documents_by_status(self, status: str) -> List[dict]:
+        return [self._shape(doc, LIST_PROJECTION) for doc in self._select(build_status_query(status))]
+
+    async def search_documents_advanced(
+        self,
+        free_text: Optional[str] = None,
+        current_status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        match_score: Optional[str] = None,
+        campaign: Optional[str] = None,
+        country: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        match_mode: Optional[str] = MATCH_MODE_PREFIX,
+        entered_status: Optional[str] = None,
+        entered_from: Optional[datetime.datetime] = None,
+        entered_to: Optional[datetime.datetime] = None,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        query = self._search_query(
+            free_text=free_text,
+            current_status=current_status,
+            job_type=job_type,
+            match_score=match_score,
+            campaign=campaign,
+            country=country,
+            min_score=min_score,
+            max_score=max_score,
+            match_mode=match_mode,
+            entered_status=entered_status,
+            entered_from=entered_from,
+            entered_to=entered_to
+        )
+        projection = build_projection(view, fields)
+        return [self._shape(doc, projection, view, fields) for doc in self._select(query)]
+
+    async def get_document_stats(self, **filters: Any) -> Dict[str, Any]:
+        # בלי cache - החישוב כבר בזיכרון
+        docs = self._select(self._search_query(**filters))
+        stats = cv_stats.shape_stats(cv_stats.facet_documents(docs))
+        stats["generated_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+        return stats
+
+    # --- write ---
+
+    async def delete_document_by_id(self, id: str) -> bool:
+        doc = self._active(id)
+        if doc is None:
+            return False
+        doc["is_deleted"] = True
+        doc[VERSION_FIELD] = doc.get(VERSION_FIELD, 0) + 1
+        self._bump()
+        return True
+
+    async def restore_document_by_id(self, id: str) -> bool:
+        doc = self._documents.get(ObjectId(id))
+        # כמו התנאי {"is_deleted": {"$ne": False}}
+        if doc is None or doc.get("is_deleted") is False:
+            return False
+        doc["is_deleted"] = False
+        doc[VERSION_FIELD] = doc.get(VERSION_FIELD, 0) + 1
+        self._bump()
+        return True
+
+    async def update_document_status(self, id: str, status: str) -> bool:
+        doc = self._documents.get(ObjectId(id))
+        if doc is None:
+            return False
+        doc["current_status"] = status
+        self._push_history(doc, [build_entry(status)])
+        self._bump()
+        return True
+
+    async def add_status_to_history(self, id: str, status: str) -> bool:
+        doc = self._documents.get(ObjectId(id))
+        if doc is None:
+            return False
+        self._push_history(doc, [build_entry(status)])
+        self._bump()
+        return True
+
+    async def record_webhook_result(self, id: str, webhook_status: str, new_status: Optional[str] = None) -> bool:
+        doc = self._documents.get(ObjectId(id))
+        if doc is None:
+            return False
+        timestamp = history_now()
+        webhook_entry, webhook_body = encode_entry(webhook_status, timestamp)
+        entries = [webhook_entry]
+        if new_status:
+            entries.append(build_entry(new_status, timestamp))
+            doc["current_status"] = new_status
+        if webhook_body:
+            bodies = self._webhook_bodies.setdefault(doc["_id"], {})
+            bodies[(webhook_entry[CODE_KEY], webhook_entry[TIME_KEY])] = webhook_body
+        self._push_history(doc, entries)
+        self._bump()
+        return True
+
+    async def set_extraction_result(self, id: str, extracted_text: str, processing_status: str) -> bool:
+        doc = self._documents.get(ObjectId(id))
+        if doc is None:
+            return False
+        if extracted_text:
+            self._texts[doc["_id"]] = extracted_text
+        else:
+            self._texts.pop(doc["_id"], None)
+        self._push_history(doc, [build_entry(processing_status)])
+        self._bump()
+        return True
+
+    def _apply_update(self, id: str, update_data: dict, build_update) -> bool:
+        """update_document_full / fields_only / partial - אותו planner כמו ב-Mongo, על עותק של המסמך"""
+        doc = self._active(id)
+        if doc is None:
+            return False
+        known_data_updates = build_update(apply_projection(doc, {SEARCH_KEYS_FIELD: 0}), update_data)
+        if isinstance(known_data_updates, bool):
+            return known_data_updates
+        # כמו _set_known_data - רק השדות שנשלחו וה-search_keys שנגזרים מהם
+        self._set_known_data(doc, known_data_updates)
+        doc[VERSION_FIELD] = doc.get(VERSION_FIELD, 0) + 1
+        self._bump()
+        return True
+
+    async def update_document_full(self, id: str, update_data: dict) -> bool:
+        return self._apply_update(id, update_data, build_fields_update)
+
+    async def update_document_fields_only(self, id: str, update_data: dict) -> bool:
+        return self._apply_update(id, update_data, build_fields_update)
+
+    async def update_document_partial(self, id: str, update_data: dict) -> bool:
+        return self._apply_update(id, update_data, build_partial_update)
+
+    async def update_document_fields_with_transition(
+        self,
+        id: str,
+        update_data: dict,
+        transitions: Optional[Dict[str, str]] = None
+    ) -> Optional[dict]:
+        doc = self._active(id)
+        if doc is None:
+            return None
+        transitions = transitions or {}
+        known_data_updates = collect_known_data_updates(update_data)
+        previous_status = doc.get("current_status")
+        known_data = doc.get("known_data") or {}
+        if not known_data_updates or is_unchanged(known_data, known_data_updates):
+            return {"modified": False, "previous_status": previous_status, "current_status": previous_status}
+
+        self._set_known_data(doc, known_data_updates)
+        current_status = previous_status
+        if previous_status in transitions:
+            current_status = transitions[previous_status]
+            doc["current_status"] = current_status
+            self._push_history(doc, [build_entry(current_status)])
+        else:
+            doc[VERSION_FIELD] = doc.get(VERSION_FIELD, 0) + 1
+        self._bump()
+        return {"modified": True, "previous_status": previous_status, "current_status": current_status}
@@ -0,0 +1,99 @@
+"""
+MongoDB storage backend (Motor)
+The queries, indexes and caches live in app.services.storage; this backend
+binds its functions to one database.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.repositories.base import StorageBackend, STORAGE_BACKEND_MONGO
+from app.services import storage
+from app.utils.projection import VIEW_FULL
+
+
+class MongoStorageBackend(StorageBackend):
+    """CV documents in MongoDB - the production backend"""
+
+    name = STORAGE_BACKEND_MONGO
+
+    def __init__(self, db):
+        self.db = db
+
+    async def insert_cv_document(self, doc: dict, initial_statuses: Optional[List[str]] = None) -> str:
+        return await storage.insert_cv_document(self.db, doc, initial_statuses)
+
+    async def insert_cv_documents(self, docs: List[dict], initial_statuses: Optional[List[str]] = None) -> List[str]:
+        return await storage.insert_cv_documents(self.db, docs, initial_statuses)
+
+    async def get_document_by_id(self, id: str, include_text: bool = True) -> Optional[dict]:
+        return await storage.get_document_by_id(self.db, id, include_text)
+
+    async def get_document_version(self, id: str) -> Optional[int]:
+        return await storage.get_document_version(self.db, id)
+
+    async def get_collection_version(self) -> str:
+        return await storage.get_collection_version(self.db)
+
+    async def get_document_history(
+        self,
+        id: str,
+        limit: int,
+        after: Optional[ObjectId] = None
+    ) -> Optional[Tuple[List[dict], Optional[ObjectId]]]:
+        return await storage.get_document_history(self.db, id, limit, after)
+
+    def iter_documents(
+        self,
+        deleted: Optional[bool] = None,
+        after: Optional[ObjectId] = None,
+        limit: int = 0,
+        view: str = VIEW_FULL,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[dict]:
+        return storage.iter_documents(self.db, deleted, after, limit, view, fields)
+
+    async def get_documents_by_status(self, status: str) -> List[dict]:
+        return await storage.get_documents_by_status(self.db, status)
+
+    async def search_documents_advanced(self, **filters: Any) -> List[dict]:
+        filters = {name: value for name, value in filters.items() if value is not None}
+        return await storage.search_documents_advanced(self.db, **filters)
+
+    async def get_document_stats(self, **filters: Any) -> Dict[str, Any]:
+        return await storage.get_document_stats(self.db, **filters)
+
+    async def delete_document_by_id(self, id: str) -> bool:
+        return await storage.delete_document_by_id(self.db, id)
+
+    async def restore_document_by_id(self, id: str) -> bool:
+        return await storage.restore_document_by_id(self.db, id)
+
+    async def update_document_status(self, id: str, status: str) -> bool:
+        return await storage.update_document_status(self.db, id, status)
+
+    async def add_status_to_history(self, id: str, status: str) -> bool:
+        return await storage.add_status_to_history(self.db, id, status)
+
+    async def record_webhook_result(self, id: str, webhook_status: str, new_status: Optional[str] = None) -> bool:
+        return await storage.record_webhook_result(self.db, id, webhook_status, new_status)
+
+    async def set_extraction_result(self, id: str, extracted_text: str, processing_status: str) -> bool:
+        return await storage.set_extraction_result(self.db, id, extracted_text, processing_status)
+
+    async def update_document_full(self, id: str, update_data: dict) -> bool:
+        return await storage.update_document_full(self.db, id, update_data)
+
+    async def update_document_fields_only(self, id: str, update_data: dict) -> bool:
+        return await storage.update_document_fields_only(self.db, id, update_data)
+
+    async def update_document_partial(self, id: str, update_data: dict) -> bool:
+        return await storage.update_document_partial(self.db, id, update_data)
+
+    async def update_document_fields_with_transition(
+        self,
+        id: str,
+        update_data: dict,
+        transitions: Optional[Dict[str, str]] = None
+    ) -> Optional[dict]:
+        return await storage.update_document_fields_with_transition(self.db, id, update_data, transitions)
@@ -0,0 +1,104 @@
+"""
+Batch upload of many CVs in one request
+Files are extracted in parallel through the extraction pool and written with a
+single insert_many
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.blob_store import save_original_file
+from app.services.cv_documents import build_file_metadata, build_cv_document, get_processing_status
+from app.services.extraction_cache import extract_text_cached
+
+logger = logging.getLogger(__name__)
+
+# שדות metadata שמותר לשלוח לכל קובץ
+BATCH_METADATA_FIELDS = ["name", "phone", "email", "campaign", "notes"]
+
+
+def get_item_metadata(metadata: Dict[str, Dict[str, Any]], filename: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    מחזיר את ה-metadata של קובץ - לפי שם מלא, או לפי שם הקובץ בלי התיקייה (עבור zip)
+
+    Args:
+        metadata: מיפוי filename -> שדות
+        filename: שם הקובץ
+        defaults: ערכים משותפים לכל הקבצים (למשל campaign)
+
+    Returns:
+        dict עם השדות של BATCH_METADATA_FIELDS
+    """
+    item_metadata = metadata.get(filename) or metadata.get(os.path.basename(filename or "")) or {}
+    return {
+        field: item_metadata.get(field, defaults.get(field))
+        for field in BATCH_METADATA_FIELDS
+    }
+
+
+async def process_batch_upload(
+    db,
+    storage,
+    items: List[Tuple[str, Optional[str], Any, Optional[str]]],
+    metadata: Dict[str, Dict[str, Any]],
+    defaults: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    מחלץ את כל הקבצים במקביל ושומר אותם ב-insert_many אחד
+
+    Args:
+        db: מסד הנתונים (ל-cache של החילוץ וה-blob store)
+        storage: ה-storage backend (app.repositories)
+        items: רשימת (filename, content_type, upload, error) - upload הוא SpooledUpload
+               או None אם הקובץ נדחה כבר בקריאה (ואז error מוגדר)
+        metadata: מיפוי filename -> שדות
+        defaults: ערכים משותפים לכל הקבצים
+
+    Returns:
+        (results, inserted_ids) - תוצאה לכל פריט באותו סדר כמו items, ורשימת ה-IDs שנוצרו
+    """
+    results = [{"filename": filename, "id": None, "status": "rejected", "error": error}
+               for filename, _, _, error in items]
+    accepted = [index for index, item in enumerate(items) if item[2] is not None]
+
+    try:
+        file_metadatas = {}
+        for index in accepted:
+            filename, content_type, upload, _ = items[index]
+            file_metadatas[index] = build_file_metadata(filename, content_type, upload)
+
+        async def extract(index):
+            upload = items[index][2]
+            if not upload.size_bytes:
+                return "", "empty upload"
+            # הקובץ המקורי נשמר ב-blob store במקביל לחילוץ
+            extraction, _ = await asyncio.gather(
+                extract_text_cached(db, upload),
+                save_original_file(db, upload, file_metadatas[index])
+            )
+            return extraction
+
+        # ה-pool מגביל את המקביליות בפועל למספר ה-workers
+        extractions = await asyncio.gather(*[extract(index) for index in accepted])
+
+        documents = []
+        processing_statuses = []
+        for index, (extracted_text, error_message) in zip(accepted, extractions):
+            fields = get_item_metadata(metadata, items[index][0], defaults)
+            documents.append(build_cv_document(file_metadatas[index], extracted_text, **fields))
+            processing_statuses.append(get_processing_status(extracted_text, error_message))
+            results[index]["error"] = error_message
+
+        inserted_ids = await storage.insert_cv_documents(documents, processing_statuses)
+    finally:
+        for _, _, upload, _ in items:
+            if upload is not None:
+                upload.close()
+
+    for index, inserted_id in zip(accepted, inserted_ids):
+        results[index]["id"] = inserted_id
+        results[index]["status"] = "stored"
+
+    logger.info(f"[BATCH_UPLOAD] Stored {len(inserted_ids)} of {len(items)} files")
+    return results, inserted_ids
@@ -0,0 +1,203 @@
+"""
+Blob store for the original uploaded PDFs
+Files are content-addressed by their SHA-256, so the same PDF uploaded twice is
+stored once. The CV document references the blob from file_metadata.blob_id.
+"""
+import asyncio
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import BLOB_STORE_BACKEND, BLOB_STORE_BUCKET_NAME, BLOB_STORE_LOCAL_DIR, BLOB_CHUNK_SIZE
+from app.utils.upload_stream import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_GRIDFS = "gridfs"
+BLOB_STORE_LOCAL = "local"
+
+
+class BlobStore(ABC):
+    """
+    Base class for blob store backends
+
+    Subclasses implement saving an upload and streaming a byte range back.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    async def save(self, upload: SpooledUpload, filename: Optional[str], content_type: Optional[str]) -> str:
+        """
+        Store the upload (no-op if a blob with the same SHA-256 already exists)
+
+        Returns:
+            blob_id to store in file_metadata
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_size(self, blob_id: str) -> Optional[int]:
+        """
+        Get the size of a stored blob
+
+        Returns:
+            Size in bytes, or None if the blob doesn't exist
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Stream bytes start..end (inclusive) of a blob in chunks of BLOB_CHUNK_SIZE
+        """
+        raise NotImplementedError
+
+
+class GridFSBlobStore(BlobStore):
+    """Blobs in a GridFS bucket of the main database (_id = SHA-256)"""
+
+    name = BLOB_STORE_GRIDFS
+
+    def __init__(self, db, bucket_name: str = BLOB_STORE_BUCKET_NAME):
+        self.db = db
+        self.bucket_name = bucket_name
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name, chunk_size_bytes=BLOB_CHUNK_SIZE)
+
+    async def save(self, upload: SpooledUpload, filename: Optional[str], content_type: Optional[str]) -> str:
+        blob_id = upload.sha256
+        if await self.get_size(blob_id) is not None:
+            return blob_id
+
+        grid_in = self.bucket.open_upload_stream_with_id(
+            blob_id,
+            filename or blob_id,
+            metadata={"content_type": content_type}
+        )
+        try:
+            with upload.open() as source:
+                while True:
+                    chunk = await asyncio.to_thread(source.read, BLOB_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await grid_in.write(chunk)
+            await grid_in.close()
+        except DuplicateKeyError:
+            # העלאה מקבילה של אותו קובץ (אותו _id) כבר כותבת אותו - אין לקרוא ל-abort,
+            # שמוחק את ה-chunks לפי _id ויפגע בקובץ של ההעלאה השנייה
+            pass
+        except BaseException:
+            await grid_in.abort()
+            raise
+        return blob_id
+
+    async def get_size(self, blob_id: str) -> Optional[int]:
+        file_doc = await self.db[f"{self.bucket_name}.files"].find_one({"_id": blob_id}, {"length": 1})
+        return file_doc["length"] if file_doc else None
+
+    async def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream(blob_id)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(BLOB_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class LocalDiskBlobStore(BlobStore):
+    """Blobs as files under a local directory (<root>/<sha[:2]>/<sha>.pdf)"""
+
+    name = BLOB_STORE_LOCAL
+
+    def __init__(self, root_dir: str = BLOB_STORE_LOCAL_DIR):
+        self.root_dir = root_dir
+
+    def _path(self, blob_id: str) -> str:
+        # blob_id מגיע מה-DB - מוודאים שהוא hash ולא נתיב
+        if not blob_id.isalnum():
+            raise ValueError(f"Invalid blob id: {blob_id}")
+        return os.path.join(self.root_dir, blob_id[:2], f"{blob_id}.pdf")
+
+    def _write(self, upload: SpooledUpload, path: str) -> None:
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f"{path}.{os.getpid()}.partial"
+        with upload.open() as source, open(staging_path, "wb") as target:
+            shutil.copyfileobj(source, target, BLOB_CHUNK_SIZE)
+        os.replace(staging_path, path)
+
+    async def save(self, upload: SpooledUpload, filename: Optional[str], content_type: Optional[str]) -> str:
+        blob_id = upload.sha256
+        await asyncio.to_thread(self._write, upload, self._path(blob_id))
+        return blob_id
+
+    async def get_size(self, blob_id: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(blob_id))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        with open(self._path(blob_id), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+_stores: Dict[str, BlobStore] = {}
+
+
+def get_blob_store(db, backend: Optional[str] = None) -> BlobStore:
+    """
+    מחזיר את ה-blob store (instance אחד לכל backend)
+
+    Args:
+        db: מסד הנתונים (עבור GridFS)
+        backend: "gridfs" / "local" - ברירת מחדל BLOB_STORE_BACKEND.
+                 בקריאה מועבר ה-backend שנשמר במסמך, כך שקבצים ישנים נשארים זמינים אחרי החלפת backend
+
+    Raises:
+        ValueError: אם ה-backend לא מוכר, או GridFS בלי מסד נתונים (STORAGE_BACKEND=memory)
+    """
+    backend = backend or BLOB_STORE_BACKEND
+    store = _stores.get(backend)
+    if store is None:
+        if backend == BLOB_STORE_GRIDFS:
+            if db is None:
+                raise ValueError("GridFS blob store requires MongoDB - set BLOB_STORE_BACKEND=local")
+            store = GridFSBlobStore(db)
+        elif backend == BLOB_STORE_LOCAL:
+            store = LocalDiskBlobStore()
+        else:
+            raise ValueError(f"Unknown blob store backend: {backend}")
+        _stores[backend] = store
+    return store
+
+
+async def save_original_file(db, upload: SpooledUpload, file_metadata: Dict) -> None:
+    """
+    שומר את הקובץ המקורי ב-blob store ומוסיף את ההפניה ל-file_metadata
+    (blob_id ו-blob_store). כישלון נרשם בלוג וההעלאה ממשיכה בלי הקובץ.
+    """
+    if not upload.size_bytes:
+        return
+    try:
+        store = get_blob_store(db)
+        file_metadata["blob_id"] = await store.save(upload, file_metadata.get("filename"), file_metadata.get("content_type"))
+        file_metadata["blob_store"] = store.name
+    except Exception as e:
+        logger.error(f"[BLOB_STORE] Failed to store original file {file_metadata.get('filename')}: {str(e)}", exc_info=True)
@@ -4,7 +4,6 @@ Uses webhook client utility for making HTTP requests
 """
 import logging
 from typing import Dict
-from app.services.storage import get_documents_by_status, add_status_to_history, update_document_status, get_document_by_id
 from app.services.config_loader import get_webhook_url
 from app.core.constants import (
     STATUS_READY_FOR_BOT_INTERVIEW,
@@ -20,12 +19,12 @@ def get_bot_webhook_url() -> str:
     """מחזיר את ה-URL של bot webhook מהקונפיגורציה"""
     return get_webhook_url("bot_processor")
 
-async def process_waiting_for_bot_records(db, trigger_source: str = "unknown") -> Dict[str, any]:
+async def process_waiting_for_bot_records(storage, trigger_source: str = "unknown") -> Dict[str, any]:
     """
     מחפש רשומות עם סטטוס waiting_bot_interview ומבצע קריאה ל-webhook עבור כל רשומה
     
     Args:
-        db: מסד הנתונים
+        storage: ה-storage backend (app.repositories)
         trigger_source: מקור ההפעלה - "scheduled" (מוזמן) או "manual" (ידני)
     
     Returns:
@@ -35,7 +34,7 @@ async def process_waiting_for_bot_records(db, trigger_source: str = "unknown") -
     logger.info(f"[BOT_PROCESSOR] Starting to process {STATUS_READY_FOR_BOT_INTERVIEW} records - Trigger: {source_label}")
     
     # קבל את כל הרשומות עם סטטוס waiting_bot_interview
-    records = await get_documents_by_status(db, STATUS_READY_FOR_BOT_INTERVIEW)
+    records = await storage.get_documents_by_status(STATUS_READY_FOR_BOT_INTERVIEW)
     logger.info(f"[BOT_PROCESSOR] Found {len(records)} records with status '{STATUS_READY_FOR_BOT_INTERVIEW}'")
     
     if not records:
@@ -78,7 +77,7 @@ async def process_waiting_for_bot_records(db, trigger_source: str = "unknown") -
         
         # בצע קריאה ל-webhook
         try:
-            success = await call_bot_webhook(db, record_id, phone_number, latin_name)
+            success = await call_bot_webhook(storage, record_id, phone_number, latin_name)
             if success:
                 results["success"] += 1
                 results["details"].append({
@@ -107,25 +106,15 @@ async def process_waiting_for_bot_records(db, trigger_source: str = "unknown") -
         f"Failed: {results['failed']}, Skipped: {results['skipped']}"
     )
     
-    # עדכן סטטוס עבור כל רשומה שהצליחה
-    for detail in results["details"]:
-        if detail.get("status") == "success":
-            record_id = detail.get("id")
-            try:
-                await update_document_status(db, record_id, STATUS_BOT_INTERVIEW)
-                logger.info(f"[BOT_PROCESSOR] Updated record {record_id} status to '{STATUS_BOT_INTERVIEW}'")
-            except Exception as e:
-                logger.error(f"[BOT_PROCESSOR] Failed to update status for record {record_id}: {str(e)}", exc_info=True)
-    
     return results
 
-async def call_bot_webhook(db, record_id: str, phone_number: str, latin_name: str) -> bool:
+async def call_bot_webhook(storage, record_id: str, phone_number: str, latin_name: str) -> bool:
     """
-    קורא ל-webhook עם הנתונים של הרשומה
+    קורא ל-webhook עם הנתונים של הרשומה, ואם הצליח - מעדכן את הסטטוס ל-Bot Interview
     משתמש ב-webhook_client utility לטיפול בקריאות HTTP
     
     Args:
-        db: מסד הנתונים
+        storage: ה-storage backend (app.repositories)
         record_id: מזהה הרשומה
         phone_number: מספר טלפון
         latin_name: שם לטיני
@@ -153,16 +142,19 @@ async def call_bot_webhook(db, record_id: str, phone_number: str, latin_name: st
     else:
         webhook_status = get_webhook_error_status(response_text or "Unknown error")
     
-    await add_status_to_history(db, record_id, webhook_status)
+    # סטטוס ה-webhook והמעבר ל-Bot Interview (אם הצליח) נרשמים בעדכון אחד
+    await storage.record_webhook_result(record_id, webhook_status, STATUS_BOT_INTERVIEW if success else None)
+    if success:
+        logger.info(f"[BOT_PROCESSOR] Updated record {record_id} status to '{STATUS_BOT_INTERVIEW}'")
     
     return success
 
-async def process_single_bot_record(db, record_id: str) -> Dict[str, any]:
+async def process_single_bot_record(storage, record_id: str) -> Dict[str, any]:
     """
     מטפל ברשומה ספציפית לפי ID - בודק שהרשומה בסטטוס Ready For Bot Interview ומפעיל את הקריאה ל-webhook
     
     Args:
-        db: מסד הנתונים
+        storage: ה-storage backend (app.repositories)
         record_id: מזהה הרשומה
     
     Returns:
@@ -171,7 +163,7 @@ async def process_single_bot_record(db, record_id: str) -> Dict[str, any]:
     logger.info(f"[BOT_PROCESSOR] Processing single record {record_id}")
     
     # בדוק שהרשומה קיימת
-    record = await get_document_by_id(db, record_id)
+    record = await storage.get_document_by_id(record_id, include_text=False)
     if not record:
         logger.warning(f"[BOT_PROCESSOR] Record {record_id} not found")
         return {
@@ -201,10 +193,9 @@ async def process_single_bot_record(db, record_id: str) -> Dict[str, any]:
     
     # בצע קריאה ל-webhook
     try:
-        success = await call_bot_webhook(db, record_id, phone_number, latin_name)
+        success = await call_bot_webhook(storage, record_id, phone_number, latin_name)
         if success:
-            # עדכן את הסטטוס ל-Bot Interview
-            await update_document_status(db, record_id, STATUS_BOT_INTERVIEW)
+            # הסטטוס כבר עודכן ל-Bot Interview יחד עם תוצאת ה-webhook
             logger.info(f"[BOT_PROCESSOR] Successfully processed record {record_id} and updated status to '{STATUS_BOT_INTERVIEW}'")
             return {
                 "success": True,
@@ -3,6 +3,10 @@ Chat service for retrieving chat history
 """
 from typing import Optional, Dict, Any
 from bson import ObjectId
+from app.core.config import CHAT_COLLECTION_NAME
+
+# השדות שלפיהם מחפשים רשומת צ'אט, לפי הסדר (phone_number, _id, ...)
+CHAT_LOOKUP_FIELDS = ("phone_number", "_id", "user_id", "id", "candidate_id")
 
 
 async def get_chat_history_by_id(db, user_id: str) -> Optional[Dict[str, Any]]:
@@ -17,29 +21,20 @@ async def get_chat_history_by_id(db, user_id: str) -> Optional[Dict[str, Any]]:
         Dictionary עם היסטוריית הצ'אט או None אם לא נמצא
     """
     # חיפוש באוסף WhatsAPP_DB בלבד
-    chat_collection = db["WhatsAPP_DB"]
-    
-    # נסה למצוא לפי phone_number
-    chat_doc = await chat_collection.find_one({"phone_number": user_id})
-    
-    # אם לא נמצא, נסה למצוא לפי _id (ObjectId)
-    if not chat_doc:
-        try:
-            chat_doc = await chat_collection.find_one({"_id": ObjectId(user_id)})
-        except Exception:
-            pass
-    
-    # אם עדיין לא נמצא, נסה למצוא לפי user_id
-    if not chat_doc:
-        chat_doc = await chat_collection.find_one({"user_id": user_id})
-    
-    # אם עדיין לא נמצא, נסה למצוא לפי id (string)
-    if not chat_doc:
-        chat_doc = await chat_collection.find_one({"id": user_id})
-    
-    # אם עדיין לא נמצא, נסה למצוא לפי candidate_id
-    if not chat_doc:
-        chat_doc = await chat_collection.find_one({"candidate_id": user_id})
+    chat_collection = db[CHAT_COLLECTION_NAME]
+    
+    # נסה למצוא לפי כל אחד מהשדות, לפי הסדר ב-CHAT_LOOKUP_FIELDS
+    chat_doc = None
+    for field in CHAT_LOOKUP_FIELDS:
+        value = user_id
+        if field == "_id":
+            try:
+                value = ObjectId(user_id)
+            except Exception:
+                continue
+        chat_doc = await chat_collection.find_one({field: value})
+        if chat_doc:
+            break
     
     # אם נמצא, החזר רק את השדה chat_history
     if chat_doc:
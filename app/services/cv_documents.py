@@ -0,0 +1,79 @@
+"""
+Building new CV documents from uploads
+Shared by the single and batch upload endpoints
+"""
+import datetime
+from typing import Any, Dict, Optional
+
+from app.core.constants import (
+    STATUS_PROCESSING_SUCCESS,
+    STATUS_PROCESSING_FAILED,
+    get_processing_error_status
+)
+from app.utils.upload_stream import SpooledUpload
+
+
+def build_file_metadata(filename: Optional[str], content_type: Optional[str], upload: SpooledUpload) -> Dict[str, Any]:
+    """
+    בונה את file_metadata עבור קובץ שהועלה
+
+    Args:
+        filename: שם הקובץ
+        content_type: סוג התוכן
+        upload: הקובץ (גודל ו-hash כבר מחושבים)
+
+    Returns:
+        dict של file_metadata
+    """
+    return {
+        "filename": filename,
+        "size_bytes": upload.size_bytes,
+        "content_type": content_type,
+        "uploaded_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "sha256": upload.sha256
+    }
+
+
+def build_cv_document(
+    file_metadata: Optional[Dict[str, Any]],
+    extracted_text: str,
+    name: Optional[str] = None,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    campaign: Optional[str] = None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    בונה מסמך CV חדש לשמירה (לפני insert_cv_document)
+
+    Returns:
+        dict של המסמך
+    """
+    return {
+        "file_metadata": file_metadata,
+        "extracted_text": extracted_text,
+        "known_data": {
+            "name": name,
+            "phone_number": phone,  # שמירה כ-phone_number במקום phone
+            "email": email,
+            "campaign": campaign,
+            "notes": notes,
+            "job_type": None,
+            "match_score": None,
+            "class_explain": None
+        }
+    }
+
+
+def get_processing_status(extracted_text: str, error_message: Optional[str]) -> str:
+    """
+    מחזיר את סטטוס ה-processing שנרשם ב-history לפי תוצאת החילוץ
+
+    Returns:
+        processing_error: ... / processing_success / processing_failed
+    """
+    if error_message:
+        return get_processing_error_status(error_message)
+    if extracted_text:
+        return STATUS_PROCESSING_SUCCESS
+    return STATUS_PROCESSING_FAILED
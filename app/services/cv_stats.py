@@ -0,0 +1,173 @@
+"""
+Faceted statistics for the dashboard (GET /cv/stats)
+One $facet aggregation returns the counts per status, campaign, job_type,
+nationality and match_score bucket. Results are cached in-process per filter set
+for CV_STATS_CACHE_TTL_SECONDS; every write through the storage layer calls
+invalidate_stats_cache(), so a cached result is never older than the last write
+made by this process.
+"""
+import operator
+from typing import Any, Dict, Hashable, List, Optional
+
+from app.core.config import CV_STATS_CACHE_TTL_SECONDS, CV_STATS_CACHE_MAX_ENTRIES
+from app.core.constants import MATCH_SCORE_RANGES
+from app.utils.lru_cache import LRUCache
+from app.utils.search_keys import SEARCH_KEYS_FIELD
+
+# facet -> השדה המנורמל (לספירה) והשדה המקורי (לתצוגה)
+GROUP_FACETS = {
+    "campaign": (f"{SEARCH_KEYS_FIELD}.campaign", "known_data.campaign"),
+    "job_type": (f"{SEARCH_KEYS_FIELD}.job_type", "known_data.job_type"),
+    "nationality": (f"{SEARCH_KEYS_FIELD}.nationality", "known_data.nationality"),
+}
+# bucket למסמך בלי ציון מספרי
+NO_SCORE_BUCKET = "no score"
+_COMPARATORS = {"$lt": operator.lt, "$lte": operator.le, "$gt": operator.gt, "$gte": operator.ge}
+
+_cache = LRUCache(CV_STATS_CACHE_MAX_ENTRIES, ttl_seconds=CV_STATS_CACHE_TTL_SECONDS)
+# עולה בכל כתיבה - תוצאה שחושבה לפני הכתיבה לא תוחזר, גם אם נשמרה אחריה
+_generation = 0
+
+
+def invalidate_stats_cache() -> None:
+    """נקרא מכל פונקציית כתיבה ב-storage"""
+    global _generation
+    _generation += 1
+    _cache.clear()
+
+
+def get_stats_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
+
+
+def get_cached_stats(key: Hashable) -> Optional[Dict[str, Any]]:
+    """
+    Returns:
+        התוצאה השמורה, או None אם אין / פג תוקף
+    """
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    generation, stats = entry
+    if generation != _generation:
+        _cache.pop(key)
+        return None
+    return stats
+
+
+def current_generation() -> int:
+    """ה-generation לפני הרצת ה-aggregation - מועבר ל-store_stats"""
+    return _generation
+
+
+def store_stats(key: Hashable, generation: int, stats: Dict[str, Any]) -> None:
+    """שומר תוצאה - אלא אם הייתה כתיבה מאז שה-aggregation התחיל"""
+    if generation != _generation:
+        return
+    _cache.set(key, (generation, stats))
+
+
+def _score_bucket_expression() -> Dict[str, Any]:
+    """$switch שממפה את search_keys.match_score ל-bucket לפי MATCH_SCORE_RANGES"""
+    score = f"${SEARCH_KEYS_FIELD}.match_score"
+    branches = []
+    for name, bounds in MATCH_SCORE_RANGES.items():
+        checks = [{operator: [score, bound]} for operator, bound in bounds.items()]
+        # null < כל מספר ב-Mongo - בלי isNumber מסמך בלי ציון ייפול ל-"below 70"
+        branches.append({"case": {"$and": [{"$isNumber": score}] + checks}, "then": name})
+    return {"$switch": {"branches": branches, "default": NO_SCORE_BUCKET}}
+
+
+def build_stats_pipeline(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    ה-pipeline של GET /cv/stats: $match על הפילטרים ואז $facet אחד
+    ה-$match משתמש באותם אינדקסים כמו /cv/search
+    """
+    facets: Dict[str, List[Dict[str, Any]]] = {
+        "total": [{"$count": "count"}],
+        "current_status": [
+            {"$group": {"_id": "$current_status", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+        "match_score": [
+            {"$group": {"_id": _score_bucket_expression(), "count": {"$sum": 1}}},
+        ],
+    }
+    for facet, (key_path, label_path) in GROUP_FACETS.items():
+        facets[facet] = [
+            {"$group": {"_id": f"${key_path}", "count": {"$sum": 1}, "label": {"$first": f"${label_path}"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+    return [{"$match": query}, {"$facet": facets}]
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _score_bucket(score: Any) -> str:
+    """אותו מיפוי כמו _score_bucket_expression, ב-Python"""
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        return NO_SCORE_BUCKET
+    for name, bounds in MATCH_SCORE_RANGES.items():
+        if all(_COMPARATORS[op](score, bound) for op, bound in bounds.items()):
+            return name
+    return NO_SCORE_BUCKET
+
+
+def _group_rows(values: List[Any], labels: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """$group + $sort {count: -1, _id: 1} (null ראשון, כמו ב-Mongo)"""
+    rows: Dict[Any, Dict[str, Any]] = {}
+    for index, value in enumerate(values):
+        row = rows.get(value)
+        if row is None:
+            row = rows[value] = {"_id": value, "count": 0}
+            if labels is not None:
+                row["label"] = labels[index]
+        row["count"] += 1
+    return sorted(rows.values(), key=lambda row: (-row["count"], row["_id"] is not None, str(row["_id"])))
+
+
+def facet_documents(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    הפלט של ה-$facet של build_stats_pipeline, מחושב על מסמכים בזיכרון
+    (ה-storage backend בזיכרון) - עובר את אותו shape_stats
+    """
+    result: Dict[str, Any] = {
+        "total": [{"count": len(docs)}] if docs else [],
+        "current_status": _group_rows([doc.get("current_status") for doc in docs]),
+        "match_score": _group_rows([_score_bucket(_get_path(doc, f"{SEARCH_KEYS_FIELD}.match_score")) for doc in docs]),
+    }
+    for facet, (key_path, label_path) in GROUP_FACETS.items():
+        result[facet] = _group_rows(
+            [_get_path(doc, key_path) for doc in docs],
+            [_get_path(doc, label_path) for doc in docs]
+        )
+    return result
+
+
+def shape_stats(result: Dict[str, Any]) -> Dict[str, Any]:
+    """ממיר את הפלט של $facet למבנה התגובה"""
+    total = result.get("total") or []
+    stats: Dict[str, Any] = {
+        "total": total[0]["count"] if total else 0,
+        "current_status": [{"value": row["_id"], "count": row["count"]} for row in result.get("current_status", [])],
+    }
+    for facet in GROUP_FACETS:
+        # key - הערך המנורמל (לשליחה כפילטר עם match_mode=exact), value - כפי שנשמר באחד המסמכים
+        stats[facet] = [
+            {"value": row.get("label") if row["_id"] is not None else None, "key": row["_id"], "count": row["count"]}
+            for row in result.get(facet, [])
+        ]
+    buckets = {row["_id"]: row["count"] for row in result.get("match_score", [])}
+    # סדר קבוע, כולל buckets ריקים
+    stats["match_score"] = [
+        {"value": name, "count": buckets.get(name, 0)}
+        for name in list(MATCH_SCORE_RANGES) + [NO_SCORE_BUCKET]
+    ]
+    return stats
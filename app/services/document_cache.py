@@ -0,0 +1,61 @@
+"""
+Read-through cache of CV documents by ID
+Holds the stored document (without search_keys) as read by the storage layer.
+Only the body is cached: storage reads the version from Mongo on every hit and
+reloads a document whose version changed, and the write paths never read from here.
+Every mutating function in app/services/storage.py calls invalidate_document()
+(the in-memory storage backend does not use this cache). Callers always get a copy, so mutating a returned
+document never changes the cached one.
+"""
+import copy
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+
+from app.core.config import DOCUMENT_CACHE_MAX_ENTRIES, DOCUMENT_CACHE_TTL_SECONDS
+from app.utils.lru_cache import LRUCache
+
+_cache = LRUCache(DOCUMENT_CACHE_MAX_ENTRIES, ttl_seconds=DOCUMENT_CACHE_TTL_SECONDS)
+# עולה בכל ביטול - קריאה שהתחילה לפני כתיבה לא נשמרת אחריה
+_generation = 0
+
+
+def get_document(object_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """
+    Returns:
+        עותק של המסמך השמור, או None אם אין / פג תוקף
+    """
+    doc = _cache.get(object_id)
+    return copy.deepcopy(doc) if doc is not None else None
+
+
+def current_generation() -> int:
+    """ה-generation לפני הקריאה מ-Mongo - מועבר ל-store_document"""
+    return _generation
+
+
+def store_document(object_id: ObjectId, generation: int, doc: Dict[str, Any]) -> None:
+    """שומר מסמך שנקרא מ-Mongo - אלא אם היה ביטול מאז שהקריאה התחילה"""
+    if generation != _generation:
+        return
+    _cache.set(object_id, copy.deepcopy(doc))
+
+
+def invalidate_document(object_id: ObjectId) -> None:
+    """
+    נקרא אחרי כל כתיבה למסמך. קריאה שהסתיימה לפני הכתיבה נמחקת כאן,
+    וקריאה שעוד רצה לא תישמר (ה-generation השתנה)
+    """
+    global _generation
+    _generation += 1
+    _cache.pop(object_id)
+
+
+def clear_document_cache() -> None:
+    global _generation
+    _generation += 1
+    _cache.clear()
+
+
+def get_document_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
@@ -0,0 +1,184 @@
+"""
+Content-addressed cache for PDF text extraction
+Results are keyed by the SHA-256 of the PDF bytes, so a CV that is resubmitted
+is never parsed twice. Two tiers: in-process LRU, then a Mongo collection whose
+records hold the text compressed like the text store and expire after
+EXTRACTION_CACHE_TTL_DAYS (TTL index in app.services.indexes).
+"""
+import datetime
+import logging
+from typing import Dict, Optional, Tuple, Union
+
+import asyncio
+
+from app.core.config import EXTRACTION_CACHE_COLLECTION_NAME, EXTRACTION_CACHE_MAX_ENTRIES, PDF_MAX_PAGES
+from app.core.constants import (
+    EXTRACTION_ERROR_TIMEOUT, EXTRACTION_ERROR_OUT_OF_MEMORY, EXTRACTION_ERROR_TOO_MANY_PAGES
+)
+from app.services.extraction_pool import extract_text_async, EXTRACTION_WORKER_ERROR
+from app.services.text_store import compress_text, decompress_text
+from app.utils.lru_cache import LRUCache
+from app.utils.upload_stream import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+_memory_cache = LRUCache(EXTRACTION_CACHE_MAX_ENTRIES)
+_db_hits = 0
+_db_misses = 0
+# הרצות pdfminer בפועל (גם בלי tier של Mongo)
+_extractions_run = 0
+
+
+# שגיאות שתלויות בעומס על המכונה ולא רק בקובץ - לא נשמרות
+_NON_CACHEABLE_ERRORS = (EXTRACTION_WORKER_ERROR, EXTRACTION_ERROR_TIMEOUT, EXTRACTION_ERROR_OUT_OF_MEMORY)
+
+
+def _is_cacheable(error_message: Optional[str]) -> bool:
+    """רק תוצאות של ה-PDF עצמו נשמרות - לא כשלים של ה-worker, timeout או זיכרון"""
+    return not (error_message and error_message.startswith(_NON_CACHEABLE_ERRORS))
+
+
+def _is_current(entry: dict) -> bool:
+    """
+    too_many_pages תלוי ב-PDF_MAX_PAGES ולא רק בקובץ - נשמר עם התקרה שהייתה בזמן החילוץ,
+    ואחרי שינוי התקרה נחשב miss (הקובץ מחולץ מחדש)
+    """
+    error_message = entry.get("error_message")
+    if error_message and error_message.startswith(EXTRACTION_ERROR_TOO_MANY_PAGES):
+        return entry.get("max_pages") == PDF_MAX_PAGES
+    return True
+
+
+def _read_text(entry: dict) -> str:
+    """הטקסט מרשומה של ה-cache - דחוס (text), או רשומה ישנה עם extracted_text גלוי"""
+    if "text" in entry:
+        return decompress_text(entry["text"])
+    return entry.get("extracted_text", "")
+
+
+async def get_cached_extraction(db, digest: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    מחפש תוצאת חילוץ ב-cache - קודם בזיכרון ואז ב-Mongo
+
+    Args:
+        db: מסד הנתונים (None עם STORAGE_BACKEND=memory - רק tier הזיכרון)
+        digest: SHA-256 של הקובץ
+
+    Returns:
+        (extracted_text, error_message) או None אם לא נמצא
+    """
+    global _db_hits, _db_misses
+
+    cached = _memory_cache.get(digest)
+    if cached is not None:
+        return cached
+    if db is None:
+        return None
+
+    entry = await db[EXTRACTION_CACHE_COLLECTION_NAME].find_one({"_id": digest})
+    if not entry or not _is_current(entry):
+        _db_misses += 1
+        return None
+
+    _db_hits += 1
+    result = (_read_text(entry), entry.get("error_message"))
+    # קידום ל-tier הזיכרון
+    _memory_cache.set(digest, result)
+    return result
+
+
+async def store_extraction(db, digest: str, extracted_text: str, error_message: Optional[str], size_bytes: int) -> None:
+    """
+    שומר תוצאת חילוץ בשני ה-tiers (טקסט והודעת שגיאה יחד) - ב-Mongo הטקסט דחוס
+
+    Args:
+        db: מסד הנתונים
+        digest: SHA-256 של הקובץ
+        extracted_text: הטקסט שחולץ
+        error_message: הודעת השגיאה (או None)
+        size_bytes: גודל הקובץ
+    """
+    if not _is_cacheable(error_message):
+        return
+
+    _memory_cache.set(digest, (extracted_text, error_message))
+    if db is None:
+        return
+    # הדחיסה היא CPU - רצה ב-thread
+    text = await asyncio.to_thread(compress_text, extracted_text)
+    # $set ולא $setOnInsert - רשומה של תקרת עמודים אחרת (או שפג תוקפה) מוחלפת
+    await db[EXTRACTION_CACHE_COLLECTION_NAME].update_one(
+        {"_id": digest},
+        {"$set": {
+            "text": text,
+            "error_message": error_message,
+            "max_pages": PDF_MAX_PAGES,
+            "size_bytes": size_bytes,
+            "created_at": datetime.datetime.utcnow()
+        }, "$unset": {"extracted_text": ""}},
+        upsert=True
+    )
+
+
+async def extract_source_cached(db, digest: str, source: Union[bytes, str], size_bytes: int) -> Tuple[str, Optional[str]]:
+    """
+    מחלץ טקסט דרך ה-cache - pdfminer רץ רק על קבצים שלא נראו קודם
+
+    Args:
+        db: מסד הנתונים
+        digest: SHA-256 של הקובץ
+        source: תוכן הקובץ (bytes) או נתיב לקובץ על הדיסק
+        size_bytes: גודל הקובץ
+
+    Returns:
+        (extracted_text, error_message)
+    """
+    global _extractions_run
+
+    cached = await get_cached_extraction(db, digest)
+    if cached is not None:
+        logger.info(f"[EXTRACTION_CACHE] Cache hit for {digest[:12]}")
+        return cached
+
+    _extractions_run += 1
+    extracted_text, error_message = await extract_text_async(source)
+    try:
+        await store_extraction(db, digest, extracted_text, error_message, size_bytes)
+    except Exception as e:
+        # כשל בשמירה ל-cache לא מכשיל את ההעלאה
+        logger.error(f"[EXTRACTION_CACHE] Failed to store extraction for {digest[:12]}: {str(e)}")
+    return extracted_text, error_message
+
+
+async def extract_text_cached(db, upload: SpooledUpload) -> Tuple[str, Optional[str]]:
+    """
+    מחלץ טקסט מקובץ שהועלה דרך ה-cache
+
+    Args:
+        db: מסד הנתונים
+        upload: הקובץ שהועלה (ה-hash כבר חושב בזמן הקריאה)
+
+    Returns:
+        (extracted_text, error_message)
+    """
+    return await extract_source_cached(db, upload.sha256, upload.extraction_source(), upload.size_bytes)
+
+
+def get_cache_stats() -> Dict[str, object]:
+    """
+    מחזיר מוני hit/miss של שני ה-tiers
+
+    Returns:
+        dict עם סטטיסטיקות memory, mongo ו-extractions_saved
+    """
+    memory = _memory_cache.stats()
+    return {
+        "memory": memory,
+        "mongo": {
+            "hits": _db_hits,
+            "misses": _db_misses
+        },
+        # כל hit (בזיכרון או ב-Mongo) הוא הרצת pdfminer שנחסכה
+        "extractions_saved": memory["hits"] + _db_hits,
+        "extractions_run": _extractions_run
+    }
@@ -0,0 +1,231 @@
+"""
+Process pool for PDF text extraction
+pdfminer is pure-Python and CPU-bound, so extraction runs in worker processes
+instead of blocking the event loop
+"""
+import asyncio
+import logging
+import multiprocessing
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Set, Tuple, Union
+
+from app.core.config import (
+    PDF_EXTRACTION_WORKERS,
+    PDF_MAX_PAGES,
+    PDF_EXTRACTION_TIMEOUT_SECONDS,
+    PDF_EXTRACTION_MEMORY_LIMIT_MB
+)
+from app.core.constants import EXTRACTION_ERROR_TIMEOUT
+from app.services.pdf_parser import extract_text_from_source
+
+logger = logging.getLogger(__name__)
+
+# קידומת להודעות שגיאה של תשתית ה-pool (ולא של ה-PDF עצמו) - תוצאות כאלה לא נשמרות ב-cache
+EXTRACTION_WORKER_ERROR = "extraction worker failed"
+
+# ה-timeout הרך רץ בתוך ה-worker (SIGALRM). אם ה-worker לא חוזר גם אחרי זמן החסד הזה,
+# רק התהליך שמריץ את המשימה נהרג וה-pool מוחלף
+HARD_TIMEOUT_GRACE_SECONDS = 5.0
+
+# משימה שנכשלה כי ה-pool נשבר בגלל worker אחר (נהרג או קרס) נשלחת שוב ל-pool החדש
+BROKEN_POOL_RETRIES = 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+# מספר המשימות שנשלחות ל-pool במקביל = מספר ה-workers, כך שמשימה שנשלחה מתחילה לרוץ מיד
+# וה-timeout הקשה נמדד מתחילת החילוץ ולא כולל זמן המתנה בתור
+_slots: Optional[asyncio.Semaphore] = None
+
+# כל משימה מדווחת (job_id, pid) בתחילת הריצה, כדי שב-timeout נהרוג רק את ה-worker שלה
+_pid_queue = None
+_job_pids: Dict[int, int] = {}
+_active_jobs: Set[int] = set()
+_job_ids = itertools.count(1)
+
+# בתוך תהליך ה-worker
+_worker_pid_queue = None
+
+
+def _init_worker(memory_limit_mb: int = 0, pid_queue=None):
+    """
+    רץ פעם אחת בכל תהליך worker - טוען את pdfminer מראש
+    כדי שהחילוץ הראשון לא ישלם על ה-import, ומגביל את ה-address space של התהליך
+    (חריגה מגיעה כ-MemoryError ונרשמת כ-out_of_memory)
+    """
+    global _worker_pid_queue
+    _worker_pid_queue = pid_queue
+    import pdfminer.high_level  # noqa: F401
+
+    if memory_limit_mb > 0:
+        import resource
+        limit_bytes = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+
+
+def _warmup() -> int:
+    """משימה ריקה שמכריחה את ה-pool להרים את כל התהליכים"""
+    return os.getpid()
+
+
+def _run_job(job_id: int, source: Union[bytes, str], max_pages: int, timeout_seconds: Optional[float]):
+    """רץ ב-worker: מדווח איזה תהליך מריץ את המשימה ואז מחלץ"""
+    if _worker_pid_queue is not None:
+        _worker_pid_queue.put((job_id, os.getpid()))
+    return extract_text_from_source(source, max_pages, timeout_seconds)
+
+
+def _create_executor(workers: int) -> ProcessPoolExecutor:
+    """pool חדש עם תור דיווח PID משלו"""
+    global _executor, _pid_queue
+    # spawn ולא fork - התהליך הראשי מריץ event loop ו-threads של motor
+    context = multiprocessing.get_context("spawn")
+    _pid_queue = context.SimpleQueue()
+    _job_pids.clear()
+    _executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(PDF_EXTRACTION_MEMORY_LIMIT_MB, _pid_queue)
+    )
+    return _executor
+
+
+async def start_extraction_pool(max_workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    מפעיל את ה-process pool ומחמם אותו (כל worker כבר טען את pdfminer)
+
+    Args:
+        max_workers: מספר תהליכים (ברירת מחדל: PDF_EXTRACTION_WORKERS)
+
+    Returns:
+        ה-executor, או None אם ה-pool מבוטל (workers=0)
+    """
+    global _executor, _slots
+    if _executor is not None:
+        return _executor
+
+    workers = PDF_EXTRACTION_WORKERS if max_workers is None else max_workers
+    if workers <= 0:
+        logger.info("[EXTRACTION_POOL] Process pool disabled, extraction will run in a thread")
+        return None
+
+    _create_executor(workers)
+    _slots = asyncio.Semaphore(workers)
+
+    # שליחת משימה לכל worker גורמת ל-pool להרים את כל התהליכים כבר עכשיו
+    loop = asyncio.get_running_loop()
+    pids = await asyncio.gather(*[
+        loop.run_in_executor(_executor, _warmup) for _ in range(workers)
+    ])
+    logger.info(f"[EXTRACTION_POOL] Started {workers} extraction workers (pids: {sorted(set(pids))})")
+    return _executor
+
+
+def shutdown_extraction_pool():
+    """עוצר את ה-process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        logger.info("[EXTRACTION_POOL] Extraction workers stopped")
+
+
+def _job_pid(job_id: int) -> Optional[int]:
+    """ה-PID של ה-worker שמריץ את המשימה (קורא את הדיווחים שהצטברו בתור)"""
+    queue = _pid_queue
+    while queue is not None and not queue.empty():
+        reported_job, pid = queue.get()
+        if reported_job in _active_jobs:
+            _job_pids[reported_job] = pid
+    return _job_pids.get(job_id)
+
+
+def _kill_job_worker(executor: ProcessPoolExecutor, job_id: int) -> Optional[int]:
+    """
+    הורג רק את תהליך ה-worker שמריץ את המשימה (worker שנתקע ולא הגיב ל-timeout הרך)
+
+    Returns:
+        ה-PID שנהרג, או None אם ה-worker לא נמצא (כבר סיים או קרס)
+    """
+    pid = _job_pid(job_id)
+    process = (executor._processes or {}).get(pid) if pid is not None else None
+    if process is None:
+        return None
+    process.kill()
+    return pid
+
+
+def _restart_pool(broken: ProcessPoolExecutor):
+    """
+    מחליף pool שבור ב-pool חדש (רק אם עוד לא הוחלף על ידי בקשה מקבילה)
+    ה-pool החדש נוצר מיד, כך שמשימות שנכשלו בגלל השבירה נשלחות אליו ולא ל-thread
+    """
+    if broken is None or _executor is not broken:
+        return
+    _create_executor(broken._max_workers)
+    broken.shutdown(wait=False, cancel_futures=True)
+    logger.info("[EXTRACTION_POOL] Extraction pool restarted")
+
+
+async def extract_text_async(source: Union[bytes, str]) -> Tuple[str, Optional[str]]:
+    """
+    מחלץ טקסט מ-PDF מחוץ ל-event loop, בתוך תקציב הזמן, העמודים והזיכרון
+
+    Args:
+        source: תוכן הקובץ (bytes) או נתיב לקובץ על הדיסק - קובץ גדול נשלח ל-worker
+                כנתיב ונקרא שם ישירות מהדיסק, בלי להעתיק את התוכן בין התהליכים
+
+    Returns:
+        (extracted_text, error_message) - כמו extract_text_from_pdf
+        חריגה מתקציב מוחזרת כ-"timeout: ...", "too_many_pages: ..." או "out_of_memory: ..."
+    """
+    loop = asyncio.get_running_loop()
+    executor = _executor
+    timeout_seconds = PDF_EXTRACTION_TIMEOUT_SECONDS or None
+
+    if executor is None:
+        # ללא pool - חילוץ ב-thread pool הדיפולטיבי (ה-timeout הרך לא פעיל מחוץ ל-main thread)
+        try:
+            return await loop.run_in_executor(None, extract_text_from_source, source, PDF_MAX_PAGES, timeout_seconds)
+        except Exception as e:
+            logger.error(f"[EXTRACTION_POOL] Extraction failed in thread: {str(e)}", exc_info=True)
+            return "", f"{EXTRACTION_WORKER_ERROR}: {str(e)}"
+
+    async with _slots:
+        job_id = next(_job_ids)
+        _active_jobs.add(job_id)
+        try:
+            for attempt in range(BROKEN_POOL_RETRIES + 1):
+                executor = _executor
+                try:
+                    future = loop.run_in_executor(
+                        executor, _run_job, job_id, source, PDF_MAX_PAGES, timeout_seconds
+                    )
+                    if timeout_seconds is None:
+                        return await future
+                    return await asyncio.wait_for(future, timeout_seconds + HARD_TIMEOUT_GRACE_SECONDS)
+                except asyncio.TimeoutError:
+                    pid = _kill_job_worker(executor, job_id)
+                    logger.error(
+                        f"[EXTRACTION_POOL] Worker {pid} did not stop after {timeout_seconds:g}s, killed it"
+                    )
+                    # הריגת worker שוברת את ה-pool - המשימות האחרות שרצו בו יישלחו שוב ל-pool החדש
+                    _restart_pool(executor)
+                    return "", f"{EXTRACTION_ERROR_TIMEOUT}: extraction exceeded {timeout_seconds:g}s (worker killed)"
+                except BrokenProcessPool as e:
+                    # worker נהרג או קרס - ה-pool לא שמיש יותר, מרימים חדש ומנסים שוב
+                    # (אם המשימה הזו היא שהפילה את ה-worker, היא תיכשל שוב ותוחזר כשגיאה)
+                    _restart_pool(executor)
+                    if attempt < BROKEN_POOL_RETRIES:
+                        logger.warning(f"[EXTRACTION_POOL] Extraction pool broke during job {job_id}, retrying: {str(e)}")
+                        continue
+                    logger.error(f"[EXTRACTION_POOL] Worker crashed: {str(e)}")
+                    return "", f"{EXTRACTION_WORKER_ERROR}: worker crashed: {str(e)}"
+                except Exception as e:
+                    logger.error(f"[EXTRACTION_POOL] Extraction failed in worker: {str(e)}", exc_info=True)
+                    return "", f"{EXTRACTION_WORKER_ERROR}: {str(e)}"
+        finally:
+            _active_jobs.discard(job_id)
+            _job_pids.pop(job_id, None)
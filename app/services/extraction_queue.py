@@ -0,0 +1,252 @@
+"""
+Background queue for deferred PDF extraction
+In deferred mode the upload is persisted and acknowledged immediately; workers
+from this queue extract the text, record the processing status and only then
+fire the upload webhook.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import EXTRACTION_QUEUE_WORKERS, EXTRACTION_QUEUE_MAX_ATTEMPTS, PENDING_UPLOADS_DIR, UPLOAD_CHUNK_SIZE
+from app.services.cv_documents import get_processing_status
+from app.services.extraction_cache import extract_source_cached
+
+logger = logging.getLogger(__name__)
+
+# קבצים ממתינים נשמרים כ-<document_id>.pdf, וכשworker לוקח קובץ הוא משנה את שמו
+# ל-<document_id>.<pid>.processing - כך תהליך אחר לא ייקח את אותו קובץ
+PENDING_SUFFIX = ".pdf"
+PROCESSING_SUFFIX = ".processing"
+# הודעת השגיאה של מסמך שה-job שלו נכשל בכל הניסיונות
+EXTRACTION_QUEUE_ERROR = "extraction queue failed"
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_db = None
+_storage = None
+_on_extracted: Optional[Callable[[str], Awaitable[None]]] = None
+
+
+def get_pending_path(document_id: str) -> str:
+    """מחזיר את הנתיב שבו נשמר קובץ שממתין לחילוץ"""
+    return os.path.join(PENDING_UPLOADS_DIR, f"{document_id}{PENDING_SUFFIX}")
+
+
+def _hash_file(path: str) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size_bytes = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size_bytes += len(chunk)
+    return digest.hexdigest(), size_bytes
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _find_recoverable_files() -> List[Tuple[str, str]]:
+    """
+    מחזיר קבצים שנשארו בתיקייה - ממתינים, או בעיבוד אצל תהליך שכבר לא קיים
+
+    Returns:
+        רשימת (document_id, path)
+    """
+    recoverable = []
+    for filename in os.listdir(PENDING_UPLOADS_DIR):
+        path = os.path.join(PENDING_UPLOADS_DIR, filename)
+        if filename.endswith(PENDING_SUFFIX):
+            recoverable.append((filename[:-len(PENDING_SUFFIX)], path))
+        elif filename.endswith(PROCESSING_SUFFIX):
+            document_id, _, pid = filename[:-len(PROCESSING_SUFFIX)].partition(".")
+            # גם ה-pid של התהליך הנוכחי - ב-startup עוד אין לו עבודה בתהליך (ובקונטיינר pid חוזר על עצמו)
+            if pid.isdigit() and (int(pid) == os.getpid() or not _pid_alive(int(pid))):
+                recoverable.append((document_id, path))
+    return recoverable
+
+
+def _claim(document_id: str, path: str) -> Optional[str]:
+    """לוקח בעלות על קובץ ע"י שינוי שם אטומי; מחזיר None אם תהליך אחר כבר לקח אותו"""
+    claimed_path = os.path.join(PENDING_UPLOADS_DIR, f"{document_id}.{os.getpid()}{PROCESSING_SUFFIX}")
+    try:
+        os.replace(path, claimed_path)
+    except FileNotFoundError:
+        return None
+    return claimed_path
+
+
+def _release(document_id: str, claimed_path: str) -> Optional[str]:
+    """מחזיר קובץ שנלקח לשם הממתין (אחרי כישלון); None אם הקובץ כבר לא קיים"""
+    path = get_pending_path(document_id)
+    try:
+        os.replace(claimed_path, path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+class _JobFailed(Exception):
+    """job שנכשל לפני ששמר תוצאה - pending_path הוא הקובץ המשוחרר (None אם הוא כבר לא קיים)"""
+
+    def __init__(self, pending_path: Optional[str]):
+        super().__init__(pending_path)
+        self.pending_path = pending_path
+
+
+async def _process_job(document_id: str, path: str, sha256: Optional[str]):
+    """
+    Raises:
+        _JobFailed: אם החילוץ או שמירת התוצאה נכשלו - הקובץ כבר שוחרר לשם הממתין
+    """
+    claimed_path = _claim(document_id, path)
+    if claimed_path is None:
+        logger.info(f"[EXTRACTION_QUEUE] Document {document_id} already taken by another worker")
+        return
+
+    try:
+        found, processing_status = await _extract_and_store(document_id, claimed_path, sha256)
+    except Exception as e:
+        # בלי שחרור הקובץ היה נשאר .processing של תהליך חי, והמסמך ממתין עד restart
+        raise _JobFailed(_release(document_id, claimed_path)) from e
+
+    # הקובץ נמחק רק אחרי שהתוצאה נשמרה - אחרת הוא ישוחזר ב-startup הבא
+    os.unlink(claimed_path)
+    await _after_stored(document_id, found, processing_status)
+
+
+async def _extract_and_store(document_id: str, claimed_path: str, sha256: Optional[str]) -> Tuple[bool, str]:
+    if sha256 is None:
+        # קובץ ששוחזר אחרי restart - ה-hash מחושב מחדש
+        sha256, size_bytes = await asyncio.to_thread(_hash_file, claimed_path)
+    else:
+        size_bytes = os.path.getsize(claimed_path)
+
+    if size_bytes:
+        extracted_text, error_message = await extract_source_cached(_db, sha256, claimed_path, size_bytes)
+    else:
+        extracted_text, error_message = "", "empty upload"
+
+    processing_status = get_processing_status(extracted_text, error_message)
+    found = await _storage.set_extraction_result(document_id, extracted_text, processing_status)
+    return found, processing_status
+
+
+async def _after_stored(document_id: str, found: bool, processing_status: str):
+    if not found:
+        # הקובץ נשמר אבל ה-insert של המסמך נכשל
+        logger.warning(f"[EXTRACTION_QUEUE] Document {document_id} not found, dropping pending upload")
+        return
+    logger.info(f"[EXTRACTION_QUEUE] Document {document_id} extracted: {processing_status}")
+
+    if _on_extracted is not None:
+        await _on_extracted(document_id)
+
+
+async def _fail_job(document_id: str, pending_path: str, error: Exception):
+    """
+    אחרי EXTRACTION_QUEUE_MAX_ATTEMPTS: המסמך מסומן processing_error והקובץ נמחק.
+    אם גם זה נכשל הקובץ נשאר ממתין ומשוחזר ב-startup הבא
+    """
+    processing_status = get_processing_status("", f"{EXTRACTION_QUEUE_ERROR}: {str(error)}")
+    try:
+        found = await _storage.set_extraction_result(document_id, "", processing_status)
+    except Exception as e:
+        logger.error(f"[EXTRACTION_QUEUE] Could not mark document {document_id} as failed: {str(e)}", exc_info=True)
+        return
+    os.unlink(pending_path)
+    try:
+        await _after_stored(document_id, found, processing_status)
+    except Exception as e:
+        logger.error(f"[EXTRACTION_QUEUE] Failed after marking document {document_id}: {str(e)}", exc_info=True)
+
+
+async def _worker(worker_id: int):
+    while True:
+        document_id, path, sha256, attempt = await _queue.get()
+        try:
+            await _process_job(document_id, path, sha256)
+        except _JobFailed as e:
+            cause = e.__cause__
+            logger.error(
+                f"[EXTRACTION_QUEUE] Worker {worker_id} failed on document {document_id} "
+                f"(attempt {attempt}/{EXTRACTION_QUEUE_MAX_ATTEMPTS}): {str(cause)}",
+                exc_info=cause
+            )
+            if e.pending_path is not None and attempt < EXTRACTION_QUEUE_MAX_ATTEMPTS:
+                _queue.put_nowait((document_id, e.pending_path, sha256, attempt + 1))
+            elif e.pending_path is not None:
+                await _fail_job(document_id, e.pending_path, cause)
+        except Exception as e:
+            # אחרי שהתוצאה נשמרה (למשל ה-webhook) - אין מה לחלץ שוב
+            logger.error(f"[EXTRACTION_QUEUE] Worker {worker_id} failed on document {document_id}: {str(e)}", exc_info=True)
+        finally:
+            _queue.task_done()
+
+
+async def start_extraction_queue(db, storage, on_extracted: Optional[Callable[[str], Awaitable[None]]] = None):
+    """
+    מפעיל את ה-workers של התור ומשחזר קבצים שנשארו מהרצה קודמת
+
+    Args:
+        db: מסד הנתונים (ל-cache של החילוץ, None עם STORAGE_BACKEND=memory)
+        storage: ה-storage backend (app.repositories) - שמירת תוצאת החילוץ
+        on_extracted: נקרא אחרי שתוצאת החילוץ נשמרה (למשל call_webhook)
+    """
+    global _queue, _workers, _db, _storage, _on_extracted
+    _db = db
+    _storage = storage
+    _on_extracted = on_extracted
+    _queue = asyncio.Queue()
+    os.makedirs(PENDING_UPLOADS_DIR, exist_ok=True)
+
+    _workers = [asyncio.create_task(_worker(i)) for i in range(EXTRACTION_QUEUE_WORKERS)]
+
+    recoverable = _find_recoverable_files()
+    for document_id, path in recoverable:
+        _queue.put_nowait((document_id, path, None, 1))
+    logger.info(
+        f"[EXTRACTION_QUEUE] Started {EXTRACTION_QUEUE_WORKERS} workers, "
+        f"recovered {len(recoverable)} pending uploads"
+    )
+
+
+async def stop_extraction_queue():
+    """
+    עוצר את ה-workers - קבצים שלא עובדו נשארים בתיקייה ומשוחזרים ב-startup הבא
+    """
+    global _workers
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers = []
+    logger.info("[EXTRACTION_QUEUE] Workers stopped")
+
+
+def enqueue_extraction(document_id: str, path: str, sha256: Optional[str] = None):
+    """
+    מוסיף קובץ לתור החילוץ
+
+    Args:
+        document_id: מזהה המסמך
+        path: הנתיב מ-get_pending_path
+        sha256: ה-hash שחושב בזמן ההעלאה (None - יחושב מחדש)
+    """
+    _queue.put_nowait((document_id, path, sha256, 1))
+
+
+def get_queue_size() -> int:
+    """מחזיר את מספר הקבצים שממתינים בתור"""
+    return _queue.qsize() if _queue is not None else 0
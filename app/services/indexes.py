@@ -0,0 +1,203 @@
+"""
+Index bootstrap and index advisor
+INDEX_SPECS declares the indexes the queries in this repository rely on; they are
+created at startup. The advisor runs explain() on the queries the storage layer
+actually builds and reports the ones that still scan a collection.
+"""
+import datetime
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from app.core.config import (
+    COLLECTION_NAME, CHAT_COLLECTION_NAME, STATUS_HISTORY_COLLECTION_NAME,
+    EXTRACTION_CACHE_COLLECTION_NAME, EXTRACTION_CACHE_TTL_DAYS
+)
+from app.core.constants import STATUS_READY_FOR_BOT_INTERVIEW, STATUS_READY_FOR_CLASSIFICATION
+from app.services.chat_service import CHAT_LOOKUP_FIELDS
+from app.utils.search_keys import FILTER_FIELDS, MATCH_MODE_EXACT
+from app.services.status_history_store import build_history_page_query
+from app.services.storage import build_list_query, build_search_query, build_status_query
+from app.utils.status_history import build_entered_query
+
+logger = logging.getLogger(__name__)
+
+# (collection, keys, options) - כל אינדקס עם שם קבוע, כדי ששינוי הגדרה יזוהה כקונפליקט ולא ייווצר כפול
+INDEX_SPECS: List[Tuple[str, List[Tuple[str, int]], Dict[str, Any]]] = [
+    # get_documents_by_status (bot / classification jobs): current_status שוויון + is_deleted
+    (COLLECTION_NAME, [("current_status", ASCENDING), ("is_deleted", ASCENDING)], {"name": "cv_status_deleted"}),
+    # GET /cv?deleted=true ממוין לפי _id
+    (COLLECTION_NAME, [("is_deleted", ASCENDING), ("_id", ASCENDING)], {"name": "cv_deleted_id"}),
+    # /cv/search לפי טווח match_score (search_keys - app/utils/search_keys.py)
+    (COLLECTION_NAME, [("search_keys.match_score", ASCENDING), ("is_deleted", ASCENDING)], {"name": "cv_match_score"}),
+    # ה-ETag של GET /cv ו-/cv/search - ה-updated_at האחרון והגרסאות באותו זמן (get_collection_version)
+    (COLLECTION_NAME, [("updated_at", DESCENDING), ("version", ASCENDING)], {"name": "cv_updated_at"}),
+    # GET /cv/{id}/history - ארכיון ה-history של CV אחד לפי סדר _id (= סדר הזמן)
+    # וגוף התשובה של webhooks לפי cv_id (get_webhook_responses_for)
+    (STATUS_HISTORY_COLLECTION_NAME, [("cv_id", ASCENDING), ("_id", ASCENDING)], {"name": "status_history_cv"}),
+    # /cv/search לפי entered_status + טווח זמן - cv_id באינדקס, כך שה-$group הוא covered
+    (
+        STATUS_HISTORY_COLLECTION_NAME,
+        [("c", ASCENDING), ("t", ASCENDING), ("cv_id", ASCENDING)],
+        {"name": "status_history_entered"}
+    ),
+] + [
+    # /cv/search לפי job_type / campaign / country - ערכים מנורמלים, exact ו-prefix הם index seek
+    (COLLECTION_NAME, [(f"search_keys.{field}", ASCENDING), ("is_deleted", ASCENDING)], {"name": f"cv_{field}"})
+    for field in FILTER_FIELDS
+] + [
+    # חיפוש רשומת צ'אט - כל שדה קיים רק בחלק מהרשומות, לכן partial index
+    (
+        CHAT_COLLECTION_NAME,
+        [(field, ASCENDING)],
+        {"name": f"chat_{field}", "partialFilterExpression": {field: {"$exists": True}}}
+    )
+    for field in CHAT_LOOKUP_FIELDS if field != "_id"
+] + [
+    # תפוגה של רשומות ה-cache של חילוץ ה-PDF (app.services.extraction_cache)
+    (
+        EXTRACTION_CACHE_COLLECTION_NAME,
+        [("created_at", ASCENDING)],
+        {"name": "extraction_cache_ttl", "expireAfterSeconds": EXTRACTION_CACHE_TTL_DAYS * 24 * 3600}
+    )
+] * (EXTRACTION_CACHE_TTL_DAYS > 0)
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    יוצר את האינדקסים ב-INDEX_SPECS (אינדקס קיים עם אותה הגדרה - ללא שינוי)
+    כישלון של אינדקס אחד נרשם בלוג ולא עוצר את ה-startup
+
+    Returns:
+        {"ensured": [...], "failed": [...]} - שמות האינדקסים
+    """
+    result = {"ensured": [], "failed": []}
+    for collection, keys, options in INDEX_SPECS:
+        try:
+            await db[collection].create_index(keys, **options)
+            result["ensured"].append(options["name"])
+        except OperationFailure as e:
+            # למשל אינדקס קיים עם אותו שם והגדרה אחרת
+            logger.error(f"[INDEXES] Failed to create index {collection}.{options['name']}: {str(e)}")
+            result["failed"].append(options["name"])
+    logger.info(f"[INDEXES] Ensured {len(result['ensured'])} indexes, {len(result['failed'])} failed")
+    return result
+
+
+def get_advisor_queries() -> List[Dict[str, Any]]:
+    """
+    השאילתות שה-advisor בודק - נבנות מאותן פונקציות שה-storage משתמש בהן,
+    כך ששינוי ב-query משתקף כאן אוטומטית
+    """
+    queries = [
+        {"name": "list_active", "collection": COLLECTION_NAME, "filter": build_list_query(False), "sort": [("_id", ASCENDING)]},
+        {"name": "list_deleted", "collection": COLLECTION_NAME, "filter": build_list_query(True), "sort": [("_id", ASCENDING)]},
+        {"name": "list_page", "collection": COLLECTION_NAME, "filter": build_list_query(False, ObjectId()), "sort": [("_id", ASCENDING)]},
+        {"name": "by_status_bot", "collection": COLLECTION_NAME, "filter": build_status_query(STATUS_READY_FOR_BOT_INTERVIEW)},
+        {"name": "by_status_classification", "collection": COLLECTION_NAME, "filter": build_status_query(STATUS_READY_FOR_CLASSIFICATION)},
+        {"name": "search_status", "collection": COLLECTION_NAME, "filter": build_search_query(current_status=STATUS_READY_FOR_BOT_INTERVIEW)},
+        {"name": "search_campaign", "collection": COLLECTION_NAME, "filter": build_search_query(campaign="campaign")},
+        {"name": "search_campaign_exact", "collection": COLLECTION_NAME, "filter": build_search_query(campaign="campaign", match_mode=MATCH_MODE_EXACT)},
+        {"name": "search_job_type", "collection": COLLECTION_NAME, "filter": build_search_query(job_type="job")},
+        {"name": "search_country", "collection": COLLECTION_NAME, "filter": build_search_query(country="country")},
+        {"name": "search_match_score", "collection": COLLECTION_NAME, "filter": build_search_query(match_score="90-100")},
+        {"name": "search_score_range", "collection": COLLECTION_NAME, "filter": build_search_query(min_score=75, max_score=85)},
+        {
+            "name": "entered_status",
+            "collection": STATUS_HISTORY_COLLECTION_NAME,
+            "filter": build_entered_query(
+                STATUS_READY_FOR_BOT_INTERVIEW,
+                datetime.datetime(2025, 1, 1),
+                datetime.datetime(2025, 2, 1)
+            )
+        },
+        {"name": "search_entered_status", "collection": COLLECTION_NAME, "filter": build_search_query(entered_matches=[ObjectId()])},
+        {
+            "name": "history_page",
+            "collection": STATUS_HISTORY_COLLECTION_NAME,
+            "filter": build_history_page_query(ObjectId(), ObjectId()),
+            "sort": [("_id", ASCENDING)]
+        },
+        {"name": "search_free_text", "collection": COLLECTION_NAME, "filter": build_search_query(free_text="text", text_matches=[ObjectId()], use_search_index=True)},
+    ]
+    for field in CHAT_LOOKUP_FIELDS:
+        value = ObjectId() if field == "_id" else "0500000000"
+        queries.append({"name": f"chat_by_{field}", "collection": CHAT_COLLECTION_NAME, "filter": {field: value}})
+    return queries
+
+
+def _collect_plan(node: Any, stages: List[str], indexes: List[str]) -> None:
+    """אוסף את שמות ה-stages והאינדקסים מתוך winningPlan (כולל queryPlan של SBE)"""
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "indexName" in node:
+            indexes.append(node["indexName"])
+        for value in node.values():
+            _collect_plan(value, stages, indexes)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_plan(item, stages, indexes)
+
+
+async def explain_query(db, query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    מריץ explain (queryPlanner - בלי להריץ את השאילתה) על שאילתה אחת
+
+    Returns:
+        הסיכום של ה-plan: stages, indexes, collection_scan, blocking_sort
+    """
+    command = {"find": query["collection"], "filter": query["filter"]}
+    if query.get("sort"):
+        command["sort"] = dict(query["sort"])
+    explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+
+    stages: List[str] = []
+    indexes: List[str] = []
+    _collect_plan(explain.get("queryPlanner", {}).get("winningPlan", {}), stages, indexes)
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        # ObjectId / regex -> Extended JSON
+        "filter": json.loads(json_util.dumps(query["filter"])),
+        "sort": query.get("sort"),
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "blocking_sort": "SORT" in stages,
+    }
+
+
+async def run_index_advisor(db) -> Dict[str, Any]:
+    """
+    מריץ explain על כל השאילתות של get_advisor_queries ומסמן collection scans
+
+    Returns:
+        dict עם תוצאה לכל שאילתה, השאילתות שעושות COLLSCAN, ואינדקסים מוגדרים שחסרים
+    """
+    results = []
+    for query in get_advisor_queries():
+        try:
+            results.append(await explain_query(db, query))
+        except OperationFailure as e:
+            results.append({"name": query["name"], "collection": query["collection"], "error": str(e)})
+
+    missing = []
+    existing_by_collection: Dict[str, Dict[str, Any]] = {}
+    for collection, _, options in INDEX_SPECS:
+        if collection not in existing_by_collection:
+            existing_by_collection[collection] = await db[collection].index_information()
+        if options["name"] not in existing_by_collection[collection]:
+            missing.append(f"{collection}.{options['name']}")
+
+    return {
+        "checked_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "collection_scans": [r["name"] for r in results if r.get("collection_scan")],
+        "blocking_sorts": [r["name"] for r in results if r.get("blocking_sort")],
+        "missing_indexes": missing,
+        "queries": results,
+    }
@@ -1,21 +1,142 @@
 import io
+import os
+import signal
+import threading
+from contextlib import contextmanager
 from pdfminer.high_level import extract_text
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
 import logging
-from typing import Tuple
+from typing import BinaryIO, Optional, Tuple, Union
+from app.core.constants import (
+    EXTRACTION_ERROR_TIMEOUT,
+    EXTRACTION_ERROR_TOO_MANY_PAGES,
+    EXTRACTION_ERROR_OUT_OF_MEMORY
+)
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> Tuple[str, str]:
-    if not pdf_bytes or len(pdf_bytes) == 0:
-        logging.warning("PDF bytes are empty!")
-        return "", "file is empty"
+class ExtractionBudgetExceeded(BaseException):
+    """
+    חריגה מתקציב החילוץ (זמן או עמודים)
+    יורש מ-BaseException כדי ש-except Exception בתוך pdfminer לא יבלע אותו
+    """
+    def __init__(self, reason: str, details: str):
+        super().__init__(f"{reason}: {details}")
+        self.reason = reason
+
+@contextmanager
+def _time_limit(timeout_seconds: Optional[float]):
+    """
+    מגביל את זמן החילוץ עם SIGALRM - עובד רק ב-main thread של התהליך (כמו ב-worker של ה-pool)
+    pdfminer הוא Python טהור, כך שהסיגנל קוטע אותו בין bytecodes
+    """
+    if not timeout_seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise ExtractionBudgetExceeded(EXTRACTION_ERROR_TIMEOUT, f"extraction exceeded {timeout_seconds:g}s")
+
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+def count_pages(pdf_stream: BinaryIO, limit: int) -> int:
+    """
+    סופר עמודים בלי לפרסר את התוכן שלהם - לפי /Count בעץ העמודים,
+    ואם חסר - ספירה של עד limit + 1 עמודים
+    """
+    document = PDFDocument(PDFParser(pdf_stream))
+    try:
+        page_count = resolve1(resolve1(document.catalog["Pages"])["Count"])
+        if isinstance(page_count, int):
+            return page_count
+    except Exception:
+        pass
+    page_count = 0
+    for _ in PDFPage.create_pages(document):
+        page_count += 1
+        if page_count > limit:
+            break
+    return page_count
+
+def _extract_from_stream(
+    pdf_stream: BinaryIO,
+    max_pages: int = 0,
+    timeout_seconds: Optional[float] = None
+) -> Tuple[str, str]:
     try:
-        with io.BytesIO(pdf_bytes) as pdf_buffer:
-            text = extract_text(pdf_buffer)
+        with _time_limit(timeout_seconds):
+            if max_pages:
+                page_count = count_pages(pdf_stream, max_pages)
+                if page_count > max_pages:
+                    raise ExtractionBudgetExceeded(
+                        EXTRACTION_ERROR_TOO_MANY_PAGES,
+                        f"{page_count} pages (max {max_pages})"
+                    )
+                pdf_stream.seek(0)
+            # maxpages גם כאן - /Count בקובץ פגום יכול לשקר
+            text = extract_text(pdf_stream, maxpages=max_pages)
         if not text or text.strip() == "":
             msg = "pdfminer: extracted empty text from buffer"
             logging.warning(msg)
             return "", msg
         logging.info(f"pdfminer extract succeeded ({len(text)} chars)")
         return text.strip(), None
+    except ExtractionBudgetExceeded as e:
+        logging.warning(f"pdfminer extraction budget exceeded: {e}")
+        return "", str(e)
+    except MemoryError:
+        msg = f"{EXTRACTION_ERROR_OUT_OF_MEMORY}: extraction exceeded the worker memory limit"
+        logging.error(msg)
+        return "", msg
     except Exception as e:
         logging.error(f"pdfminer PDF extract error: {e}")
         return "", str(e)
+
+def extract_text_from_pdf(
+    pdf_bytes: bytes,
+    max_pages: int = 0,
+    timeout_seconds: Optional[float] = None
+) -> Tuple[str, str]:
+    if not pdf_bytes or len(pdf_bytes) == 0:
+        logging.warning("PDF bytes are empty!")
+        return "", "file is empty"
+    with io.BytesIO(pdf_bytes) as pdf_buffer:
+        return _extract_from_stream(pdf_buffer, max_pages, timeout_seconds)
+
+def extract_text_from_file(
+    path: str,
+    max_pages: int = 0,
+    timeout_seconds: Optional[float] = None
+) -> Tuple[str, str]:
+    """
+    חילוץ טקסט מקובץ PDF על הדיסק - pdfminer קורא מה-file handle, ללא העתקה של כל התוכן לזיכרון
+    """
+    with open(path, "rb") as pdf_file:
+        if os.fstat(pdf_file.fileno()).st_size == 0:
+            logging.warning("PDF file is empty!")
+            return "", "file is empty"
+        return _extract_from_stream(pdf_file, max_pages, timeout_seconds)
+
+def extract_text_from_source(
+    source: Union[bytes, str],
+    max_pages: int = 0,
+    timeout_seconds: Optional[float] = None
+) -> Tuple[str, str]:
+    """
+    חילוץ טקסט מ-bytes (קובץ קטן שנשאר בזיכרון) או מנתיב לקובץ על הדיסק
+
+    Args:
+        source: תוכן הקובץ או נתיב
+        max_pages: מספר עמודים מקסימלי - קובץ ארוך יותר נדחה (0 = ללא הגבלה)
+        timeout_seconds: זמן מקסימלי לחילוץ (None = ללא הגבלה)
+    """
+    if isinstance(source, str):
+        return extract_text_from_file(source, max_pages, timeout_seconds)
+    return extract_text_from_pdf(source, max_pages, timeout_seconds)
@@ -0,0 +1,486 @@
+"""
+In-process inverted index for free-text CV search
+Every indexed field (extracted_text, names, email, notes, ...) is tokenized with
+Hebrew/Latin normalization and kept in posting sets (term -> CV ids). A query is
+answered by intersecting the posting sets of its tokens, so search never scans
+the collection. The index is rebuilt from Mongo at startup and periodically, and
+the storage layer updates it on every write in between. Before each search the
+index loads the documents written since its last sync (sync_search_index), so
+writes made by other processes are searchable without waiting for the rebuild.
+"""
+import asyncio
+import bisect
+import datetime
+import logging
+import re
+import time
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from bson import ObjectId
+
+from app.core.config import (
+    COLLECTION_NAME,
+    EXTRACTED_TEXT_COLLECTION_NAME,
+    SEARCH_INDEX_ENABLED,
+    SEARCH_INDEX_PREFIX_MIN_LENGTH,
+    SEARCH_INDEX_SYNC_MARGIN_SECONDS,
+    TEXT_SCAN_BATCH_SIZE
+)
+from app.services.text_store import decompress_text
+
+logger = logging.getLogger(__name__)
+
+# השדות שנכנסים לאינדקס (בנוסף ל-extracted_text מה-side collection)
+INDEXED_FIELDS = (
+    "file_metadata.filename",
+    "known_data.name",
+    "known_data.phone_number",
+    "known_data.email",
+    "known_data.campaign",
+    "known_data.notes",
+    "known_data.job_type",
+    "known_data.match_score",
+    "known_data.class_explain",
+    "known_data.latin_name",
+    "known_data.hebrew_name",
+    "known_data.nationality",
+    "known_data.skills_summary",
+    "known_data.recruit_note",
+    "current_status",
+)
+TEXT_FIELD = "extracted_text"
+PHONE_FIELD = "known_data.phone_number"
+# זמן השרת של העדכון האחרון וגרסת המסמך (storage.UPDATED_AT_FIELD / VERSION_FIELD)
+UPDATED_AT_FIELD = "updated_at"
+VERSION_FIELD = "version"
+
+# סימנים משולבים: ניקוד וטעמים בעברית (בלי מקף U+05BE), ודיאקריטים לטיניים אחרי NFKD
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f\u0591-\u05bd\u05bf-\u05c7]")
+# גרש/גרשיים בתוך מילה עברית (צה"ל, ג'ון) - חלק מהמילה ולא מפריד
+_HEBREW_INNER_QUOTE = re.compile(r"(?<=[\u05d0-\u05ea])[\"'\u05f3\u05f4](?=[\u05d0-\u05ea])")
+# אותיות סופיות -> רגילות, כך ש"מנהלים" ו"מנהלימ" הם אותו token
+_FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+_TOKEN = re.compile(r"\w+")
+# מספר terms חדשים שממתינים לפני מיזוג למילון הממוין
+_NEW_TERMS_MERGE_THRESHOLD = 2000
+
+
+def normalize_text(text: str) -> str:
+    """מנרמל טקסט לחיפוש: הסרת ניקוד ודיאקריטים, casefold, אותיות סופיות"""
+    text = unicodedata.normalize("NFKD", text)
+    text = _COMBINING_MARKS.sub("", text)
+    text = _HEBREW_INNER_QUOTE.sub("", text)
+    return text.casefold().translate(_FINAL_LETTERS)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """מפרק טקסט ל-tokens מנורמלים (לפי הסדר, כולל כפולים)"""
+    if not text:
+        return []
+    return _TOKEN.findall(normalize_text(str(text)))
+
+
+def _get_path(doc: Dict, path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def extract_indexed_fields(doc: Dict) -> Dict[str, str]:
+    """
+    מחזיר את הערכים של השדות המאונדקסים שקיימים במסמך (גם מסמך חלקי, למשל $set של known_data)
+    שדה שה-root שלו לא במסמך לא מוחזר - כך עדכון חלקי לא מוחק שדות אחרים מהאינדקס
+    """
+    fields = {}
+    for path in INDEXED_FIELDS:
+        if path.split(".")[0] in doc:
+            value = _get_path(doc, path)
+            fields[path] = "" if value is None else str(value)
+    if fields.get(PHONE_FIELD):
+        # גם הספרות ברצף - "0501234567" מוצא את "050-123-4567"
+        fields[PHONE_FIELD] += " " + re.sub(r"\D", "", fields[PHONE_FIELD])
+    return fields
+
+
+class SearchIndex:
+    """
+    Inverted index: term -> set of CV ids
+
+    Terms are kept per document and per field, so updating one field (e.g. the
+    status) only touches the postings of the terms that actually changed.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[ObjectId]] = {}
+        self._doc_fields: Dict[ObjectId, Dict[str, FrozenSet[str]]] = {}
+        # מילון ממוין לחיפוש prefix ב-bisect. terms חדשים נכנסים ל-_new_terms וממוזגים
+        # כשהם מצטברים; terms שנמחקו נשארים ברשימה ומסוננים לפי _postings
+        self._sorted_terms: List[str] = []
+        self._new_terms: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._doc_fields)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    def _doc_terms(self, document_id: ObjectId) -> Set[str]:
+        terms: Set[str] = set()
+        for field_terms in self._doc_fields.get(document_id, {}).values():
+            terms |= field_terms
+        return terms
+
+    def _add_posting(self, term: str, document_id: ObjectId) -> None:
+        posting = self._postings.get(term)
+        if posting is None:
+            posting = self._postings[term] = set()
+            self._new_terms.add(term)
+        posting.add(document_id)
+
+    def _remove_posting(self, term: str, document_id: ObjectId) -> None:
+        posting = self._postings.get(term)
+        if posting is None:
+            return
+        posting.discard(document_id)
+        if not posting:
+            del self._postings[term]
+            self._new_terms.discard(term)
+
+    def update_fields(self, document_id: ObjectId, fields: Dict[str, str]) -> None:
+        """
+        מעדכן שדות של מסמך (שדות שלא נשלחו נשארים כמו שהם)
+
+        Args:
+            document_id: ה-_id של ה-CV
+            fields: נתיב שדה -> טקסט
+        """
+        before = self._doc_terms(document_id)
+        doc_fields = self._doc_fields.setdefault(document_id, {})
+        for field, value in fields.items():
+            terms = frozenset(tokenize(value))
+            if terms:
+                doc_fields[field] = terms
+            else:
+                doc_fields.pop(field, None)
+        after = self._doc_terms(document_id)
+        for term in before - after:
+            self._remove_posting(term, document_id)
+        for term in after - before:
+            self._add_posting(term, document_id)
+        if not doc_fields:
+            del self._doc_fields[document_id]
+
+    def remove_document(self, document_id: ObjectId) -> None:
+        for term in self._doc_terms(document_id):
+            self._remove_posting(term, document_id)
+        self._doc_fields.pop(document_id, None)
+
+    def __contains__(self, document_id: ObjectId) -> bool:
+        return document_id in self._doc_fields
+
+    def compact(self) -> None:
+        """ממזג את ה-terms החדשים למילון הממוין ומנקה terms שנמחקו"""
+        self._sorted_terms = sorted(self._postings)
+        self._new_terms = set()
+
+    @property
+    def needs_compaction(self) -> bool:
+        """הרבה terms ממתינים למיזוג, או שהמילון הממוין מלא ב-terms שנמחקו"""
+        return (
+            len(self._new_terms) > _NEW_TERMS_MERGE_THRESHOLD
+            or len(self._sorted_terms) > 2 * len(self._postings) + _NEW_TERMS_MERGE_THRESHOLD
+        )
+
+    async def compact_async(self) -> None:
+        """
+        compact בלי לעצור את ה-event loop: המיון רץ ב-thread על snapshot של ה-terms,
+        וההחלפה ב-loop. terms שנוספו בזמן המיון נשארים ב-_new_terms
+        """
+        snapshot = list(self._postings)
+        sorted_terms = await asyncio.to_thread(sorted, snapshot)
+        self._sorted_terms = sorted_terms
+        self._new_terms -= set(snapshot)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        terms = [term for term in self._new_terms if term.startswith(prefix)]
+        sorted_terms = self._sorted_terms
+        position = bisect.bisect_left(sorted_terms, prefix)
+        while position < len(sorted_terms) and sorted_terms[position].startswith(prefix):
+            terms.append(sorted_terms[position])
+            position += 1
+        return terms
+
+    def _prefix_matches(self, prefix: str) -> Set[ObjectId]:
+        postings = [self._postings[term] for term in set(self._prefix_terms(prefix)) if term in self._postings]
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def search(self, query: str) -> Set[ObjectId]:
+        """
+        מחזיר את ה-IDs של המסמכים שמכילים את כל ה-tokens של query
+        ה-token האחרון מתאים גם כ-prefix (חיפוש תוך כדי הקלדה)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return set()
+        postings = []
+        for index, token in enumerate(tokens):
+            is_last = index == len(tokens) - 1
+            if is_last and len(token) >= SEARCH_INDEX_PREFIX_MIN_LENGTH:
+                posting = self._prefix_matches(token)
+            else:
+                posting = self._postings.get(token, set())
+            if not posting:
+                return set()
+            postings.append(posting)
+        # חיתוך מהרשימה הקצרה ביותר
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+
+_index = SearchIndex()
+_ready = False
+# IDs שנכתבו בזמן בנייה - נטענים מחדש לאינדקס החדש לפני ההחלפה
+_touched_during_build: Optional[Set[ObjectId]] = None
+_build_lock = asyncio.Lock()
+_build_task: Optional[asyncio.Task] = None
+_compact_task: Optional[asyncio.Task] = None
+_last_build: Dict = {}
+# הסנכרון האחרון מ-Mongo: ה-updated_at המקסימלי שנטען, והזמן המקומי של הסנכרון (ל-_id של inserts)
+_synced_updated_at: Optional[datetime.datetime] = None
+_synced_at: Optional[datetime.datetime] = None
+# id -> version של המסמכים שנטענו עם _synced_updated_at בדיוק ($gte מחזיר אותם שוב)
+_synced_versions: Dict[ObjectId, int] = {}
+_sync_lock = asyncio.Lock()
+
+
+def is_ready() -> bool:
+    """True אם האינדקס נבנה ואפשר לחפש בו (אחרת החיפוש חוזר לשאילתת regex)"""
+    return SEARCH_INDEX_ENABLED and _ready
+
+
+def search_ids(query: str) -> List[ObjectId]:
+    """IDs של המסמכים שתואמים ל-query (ראו SearchIndex.search)"""
+    ids = list(_index.search(query))
+    if _index.needs_compaction:
+        _schedule_compaction()
+    return ids
+
+
+def _schedule_compaction() -> None:
+    """מיזוג המילון הממוין ברקע - לא בתוך הבקשה שגילתה שהוא נדרש"""
+    global _compact_task
+    if _compact_task is None or _compact_task.done():
+        _compact_task = asyncio.create_task(_index.compact_async())
+
+
+def _touch(document_id: ObjectId) -> None:
+    if _touched_during_build is not None:
+        _touched_during_build.add(document_id)
+
+
+def index_document(document_id: ObjectId, doc: Dict, extracted_text: Optional[str] = None) -> None:
+    """מוסיף/מחליף מסמך באינדקס (insert)"""
+    if not SEARCH_INDEX_ENABLED:
+        return
+    fields = extract_indexed_fields(doc)
+    fields[TEXT_FIELD] = extracted_text or ""
+    _index.update_fields(document_id, fields)
+    _touch(document_id)
+
+
+def update_document_fields(document_id: ObjectId, partial_doc: Dict) -> None:
+    """מעדכן באינדקס את השדות שב-partial_doc (למשל {"known_data": ...} או {"current_status": ...})"""
+    if not SEARCH_INDEX_ENABLED:
+        return
+    fields = extract_indexed_fields(partial_doc)
+    if fields:
+        _index.update_fields(document_id, fields)
+    _touch(document_id)
+
+
+def update_document_text(document_id: ObjectId, extracted_text: Optional[str]) -> None:
+    """מעדכן באינדקס את extracted_text של מסמך"""
+    if not SEARCH_INDEX_ENABLED:
+        return
+    _index.update_fields(document_id, {TEXT_FIELD: extracted_text or ""})
+    _touch(document_id)
+
+
+async def _load_documents(db, index: SearchIndex, ids: Optional[Iterable[ObjectId]] = None) -> None:
+    """טוען מסמכים (או רק ids) ואת הטקסט שלהם לאינדקס, ב-batches"""
+    projection = {path: 1 for path in INDEXED_FIELDS}
+    projection[TEXT_FIELD] = 1  # מסמכים שעוד לא עברו migration
+    query = {"_id": {"$in": list(ids)}} if ids is not None else {}
+
+    batch: List[Dict] = []
+
+    async def flush():
+        texts = {
+            record["_id"]: record
+            async for record in db[EXTRACTED_TEXT_COLLECTION_NAME].find({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        }
+
+        def apply():
+            for doc in batch:
+                record = texts.get(doc["_id"])
+                text = decompress_text(record) if record else doc.get(TEXT_FIELD)
+                fields = extract_indexed_fields({"file_metadata": {}, "known_data": {}, "current_status": None, **doc})
+                fields[TEXT_FIELD] = text or ""
+                index.update_fields(doc["_id"], fields)
+
+        # הפענוח וה-tokenization הם CPU - רצים ב-thread (האינדקס החדש עוד לא משותף)
+        await asyncio.to_thread(apply)
+
+    async for doc in db[COLLECTION_NAME].find(query, projection).batch_size(TEXT_SCAN_BATCH_SIZE):
+        batch.append(doc)
+        if len(batch) >= TEXT_SCAN_BATCH_SIZE:
+            await flush()
+            batch = []
+    if batch:
+        await flush()
+
+
+def _sync_query(updated_at: Optional[datetime.datetime], synced_at: datetime.datetime) -> Dict:
+    """
+    מסמכים שנכתבו מאז הסנכרון: updated_at מאז האחרון שנטען (עדכונים),
+    או _id מ-SEARCH_INDEX_SYNC_MARGIN_SECONDS לפני הסנכרון (inserts, שלא כותבים updated_at)
+    """
+    since_id = ObjectId.from_datetime(synced_at - datetime.timedelta(seconds=SEARCH_INDEX_SYNC_MARGIN_SECONDS))
+    if updated_at is None:
+        return {"_id": {"$gte": since_id}}
+    return {"$or": [{UPDATED_AT_FIELD: {"$gte": updated_at}}, {"_id": {"$gte": since_id}}]}
+
+
+async def _latest_updated_at(db) -> Optional[datetime.datetime]:
+    latest = await db[COLLECTION_NAME].find_one({}, {UPDATED_AT_FIELD: 1, "_id": 0}, sort=[(UPDATED_AT_FIELD, -1)])
+    return latest.get(UPDATED_AT_FIELD) if latest else None
+
+
+async def sync_search_index(db) -> int:
+    """
+    טוען לאינדקס את המסמכים שנכתבו מאז הסנכרון האחרון - גם כתיבות של process אחר,
+    שאחרת היו נראות בחיפוש רק אחרי הבנייה התקופתית. שאילתה אחת על cv_updated_at ועל _id;
+    insert שכבר באינדקס ולא עודכן מאז מדולג
+
+    Returns:
+        מספר המסמכים שנטענו
+    """
+    global _synced_updated_at, _synced_at, _synced_versions
+    if not is_ready() or _synced_at is None:
+        return 0
+    async with _sync_lock:
+        now = datetime.datetime.utcnow()
+        since = _synced_updated_at
+        ids, latest, versions = [], since, dict(_synced_versions)
+        projection = {UPDATED_AT_FIELD: 1, VERSION_FIELD: 1}
+        async for doc in db[COLLECTION_NAME].find(_sync_query(since, _synced_at), projection):
+            document_id, updated_at = doc["_id"], doc.get(UPDATED_AT_FIELD)
+            if updated_at is not None and (since is None or updated_at >= since):
+                if updated_at == since and versions.get(document_id) == doc.get(VERSION_FIELD):
+                    continue
+                if latest is None or updated_at > latest:
+                    latest, versions = updated_at, {}
+                if updated_at == latest:
+                    versions[document_id] = doc.get(VERSION_FIELD)
+                ids.append(document_id)
+            elif document_id not in _index:
+                ids.append(document_id)
+        if ids:
+            for document_id in ids:
+                _touch(document_id)
+            # update_fields מחליף את כל השדות של המסמך - אין צורך להסיר אותו קודם
+            await _load_documents(db, _index, ids)
+        _synced_updated_at, _synced_at, _synced_versions = latest, now, versions
+        return len(ids)
+
+
+async def rebuild_search_index(db) -> Dict:
+    """
+    בונה את האינדקס מחדש מ-Mongo ומחליף את הקיים
+    כתיבות שקרו בזמן הבנייה נטענות שוב לאינדקס החדש לפני ההחלפה
+
+    Returns:
+        סטטיסטיקות הבנייה
+    """
+    global _index, _ready, _touched_during_build, _last_build, _synced_updated_at, _synced_at, _synced_versions
+    if not SEARCH_INDEX_ENABLED:
+        return {}
+    async with _build_lock:
+        started = time.perf_counter()
+        _touched_during_build = set()
+        new_index = SearchIndex()
+        # נקודת הסנכרון נלקחת לפני הסריקה - מה שנכתב בזמנה ייטען שוב ב-sync הבא
+        synced_at, synced_updated_at = datetime.datetime.utcnow(), await _latest_updated_at(db)
+        try:
+            await _load_documents(db, new_index)
+            await asyncio.to_thread(new_index.compact)
+            # כתיבות שקרו בזמן הבנייה - טוענים שוב עד שאין חדשות
+            while _touched_during_build:
+                touched, _touched_during_build = _touched_during_build, set()
+                for document_id in touched:
+                    new_index.remove_document(document_id)
+                await _load_documents(db, new_index, touched)
+        finally:
+            _touched_during_build = None
+        _index = new_index
+        _ready = True
+        _synced_updated_at, _synced_at, _synced_versions = synced_updated_at, synced_at, {}
+        _last_build = {
+            "built_at": datetime.datetime.utcnow().isoformat() + "Z",
+            "build_seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(
+            f"[SEARCH_INDEX] Built index: {len(new_index)} documents, {new_index.term_count} terms "
+            f"in {_last_build['build_seconds']}s"
+        )
+        return get_search_index_stats()
+
+
+async def _rebuild_logged(db) -> None:
+    try:
+        await rebuild_search_index(db)
+    except Exception as e:
+        logger.error(f"[SEARCH_INDEX] Index build failed: {str(e)}", exc_info=True)
+
+
+def start_search_index(db) -> None:
+    """מתחיל את בניית האינדקס ברקע (החיפוש משתמש ב-regex עד שהבנייה מסתיימת)"""
+    global _build_task
+    if SEARCH_INDEX_ENABLED:
+        _build_task = asyncio.create_task(_rebuild_logged(db))
+
+
+async def stop_search_index() -> None:
+    """מבטל בנייה או מיזוג שעדיין רצים (ב-shutdown)"""
+    global _build_task, _compact_task
+    for task in (_build_task, _compact_task):
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _build_task = _compact_task = None
+
+
+def get_search_index_stats() -> Dict:
+    return {
+        "enabled": SEARCH_INDEX_ENABLED,
+        "ready": _ready,
+        "documents": len(_index),
+        "terms": _index.term_count,
+        "synced_at": _synced_at.isoformat() + "Z" if _synced_at else None,
+        **_last_build,
+    }
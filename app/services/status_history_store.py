@@ -0,0 +1,234 @@
+"""
+Full status history archive
+The document keeps only the last STATUS_HISTORY_MAX_EMBEDDED entries of
+status_history ($push with $slice); every entry is also written here, as
+{_id, cv_id, c, t, d}. New documents are archived before the insert; entries
+pushed later are archived in the background after the document update
+(archive_later), so a status change is one awaited write. A webhook_status
+entry's response text is stored on its record (body) - until that background
+write lands, reads return the entry without the body. A write that never lands
+(process killed, error) is recovered by the archive_status_history migration. GET /cv/{id}/history pages through this
+collection, /cv/search?entered_status= queries it, and the reads that return
+status_history join the bodies from it.
+The record _id carries the entry time, so _id order is history order - also for
+entries archived later by the migration.
+"""
+import asyncio
+import calendar
+import datetime
+import logging
+import struct
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.config import STATUS_HISTORY_COLLECTION_NAME, STATUS_HISTORY_MAX_EMBEDDED
+from app.utils.status_history import CODE_KEY, TIME_KEY, DETAIL_KEY, HISTORY_FIELD, build_entered_query
+
+_RECORD_FIELDS = (CODE_KEY, TIME_KEY, DETAIL_KEY)
+# גוף התשובה של entry מסוג webhook_status
+BODY_KEY = "body"
+
+# (code, time) של entry -> גוף התשובה
+WebhookBodies = Dict[Tuple[int, datetime.datetime], str]
+
+logger = logging.getLogger(__name__)
+
+# כתיבות ארכיון שעוד רצות ברקע (archive_later) - flush_archive מחכה להן
+_pending_writes: Set["asyncio.Task[None]"] = set()
+
+
+def build_history_push(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """ה-$push של entries ל-status_history - עם $slice כשההגבלה מופעלת"""
+    push: Dict[str, Any] = {"$each": entries}
+    if STATUS_HISTORY_MAX_EMBEDDED > 0:
+        push["$slice"] = -STATUS_HISTORY_MAX_EMBEDDED
+    return {HISTORY_FIELD: push}
+
+
+def slice_history_expression(history: Any) -> Any:
+    """אותה הגבלה בתוך pipeline update (update_document_fields_with_transition)"""
+    if STATUS_HISTORY_MAX_EMBEDDED > 0:
+        return {"$slice": [history, -STATUS_HISTORY_MAX_EMBEDDED]}
+    return history
+
+
+def history_record_id(timestamp: Optional[datetime.datetime]) -> ObjectId:
+    """
+    ObjectId חדש שה-timestamp שלו הוא זמן ה-entry (ולא זמן הכתיבה)
+    שאר ה-bytes מ-ObjectId רגיל - ייחודי, ועולה לפי סדר היצירה בתוך אותה שנייה
+    """
+    if timestamp is None:
+        return ObjectId()
+    seconds = max(calendar.timegm(timestamp.utctimetuple()), 0)
+    return ObjectId(struct.pack(">I", seconds) + ObjectId().binary[4:])
+
+
+def build_history_record(cv_id: ObjectId, entry: Dict[str, Any], body: Optional[str] = None) -> Dict[str, Any]:
+    """רשומת ארכיון של entry אחד (body - גוף התשובה של webhook)"""
+    record = {"_id": history_record_id(entry.get(TIME_KEY)), "cv_id": cv_id}
+    record.update({key: entry[key] for key in _RECORD_FIELDS if key in entry})
+    if body:
+        record[BODY_KEY] = body
+    return record
+
+
+async def archive_entries(
+    db,
+    cv_id: ObjectId,
+    entries: List[Dict[str, Any]],
+    bodies: Optional[List[Optional[str]]] = None
+) -> List[ObjectId]:
+    """
+    כותב entries לארכיון
+
+    Args:
+        bodies: גוף התשובה של כל entry, באותו סדר כמו entries (webhook_status בלבד)
+
+    Returns:
+        ה-_id של הרשומות
+    """
+    bodies = bodies or []
+    records = [
+        build_history_record(cv_id, entry, bodies[index] if index < len(bodies) else None)
+        for index, entry in enumerate(entries)
+    ]
+    if records:
+        await db[STATUS_HISTORY_COLLECTION_NAME].insert_many(records, ordered=False)
+    return [record["_id"] for record in records]
+
+
+async def _archive_logged(db, cv_id: ObjectId, entries: List[Dict[str, Any]], bodies: Optional[List[Optional[str]]]) -> None:
+    try:
+        await archive_entries(db, cv_id, entries, bodies)
+    except Exception as e:
+        logger.error(f"[HISTORY] Archive write failed for CV {cv_id}: {str(e)}", exc_info=True)
+
+
+def archive_later(
+    db,
+    cv_id: ObjectId,
+    entries: List[Dict[str, Any]],
+    bodies: Optional[List[Optional[str]]] = None
+) -> None:
+    """
+    כותב entries שכבר נדחפו למסמך לארכיון ברקע - עדכון הסטטוס לא מחכה לכתיבה השנייה.
+    כתיבה שנכשלה נרשמת ללוג; ה-entry נשאר במסמך, ו-archive_status_history משלים אותו
+    """
+    task = asyncio.create_task(_archive_logged(db, cv_id, entries, bodies))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+
+async def flush_archive() -> None:
+    """מחכה לכל כתיבות הארכיון שברקע (ב-shutdown, ובבדיקות לפני קריאה מהארכיון)"""
+    while _pending_writes:
+        await asyncio.gather(*list(_pending_writes))
+
+
+async def archive_documents(db, docs: List[Dict[str, Any]]) -> None:
+    """כותב לארכיון את ה-history ההתחלתי של מסמכים חדשים (לפני ה-insert)"""
+    records = [
+        build_history_record(doc["_id"], entry)
+        for doc in docs
+        for entry in doc.get(HISTORY_FIELD) or []
+    ]
+    if records:
+        await db[STATUS_HISTORY_COLLECTION_NAME].insert_many(records, ordered=False)
+
+
+async def save_webhook_bodies(db, cv_id: ObjectId, responses: List[Tuple[Dict[str, Any], str]]) -> None:
+    """
+    שומר גוף תשובה על רשומות הארכיון של entries קיימים (migrations) - upsert לפי (cv_id, c, t),
+    כך שריצה חוזרת לא יוצרת רשומה כפולה
+
+    Args:
+        responses: (entry, body) - ה-entry בקידוד הקומפקטי
+    """
+    operations = []
+    for entry, body in responses:
+        if not body:
+            continue
+        record = build_history_record(cv_id, entry)
+        key = {"cv_id": cv_id, CODE_KEY: record.pop(CODE_KEY, None), TIME_KEY: record.pop(TIME_KEY, None)}
+        record.pop("cv_id")
+        operations.append(UpdateOne(key, {"$set": {BODY_KEY: body}, "$setOnInsert": record}, upsert=True))
+    if operations:
+        await db[STATUS_HISTORY_COLLECTION_NAME].bulk_write(operations, ordered=False)
+
+
+async def get_webhook_responses(db, cv_id: ObjectId) -> WebhookBodies:
+    """
+    Returns:
+        (code, time) -> גוף התשובה, לכל ה-webhooks של המסמך (לשימוש ב-expand_history)
+    """
+    return (await get_webhook_responses_for(db, [cv_id])).get(cv_id, {})
+
+
+async def get_webhook_responses_for(db, cv_ids: List[ObjectId]) -> Dict[ObjectId, WebhookBodies]:
+    """
+    כמו get_webhook_responses, לכמה מסמכים בשאילתה אחת (רשימות וחיפוש) - באינדקס status_history_cv
+
+    Returns:
+        cv_id -> (code, time) -> גוף התשובה (מסמך בלי תשובות לא מופיע)
+    """
+    bodies: Dict[ObjectId, WebhookBodies] = {}
+    if not cv_ids:
+        return bodies
+    cursor = db[STATUS_HISTORY_COLLECTION_NAME].find(
+        {"cv_id": {"$in": cv_ids}, BODY_KEY: {"$exists": True}},
+        {"_id": 0, "cv_id": 1, CODE_KEY: 1, TIME_KEY: 1, BODY_KEY: 1}
+    )
+    async for record in cursor:
+        bodies.setdefault(record["cv_id"], {})[(record[CODE_KEY], record[TIME_KEY])] = record[BODY_KEY]
+    return bodies
+
+
+async def find_entered_ids(
+    db,
+    status: str,
+    entered_from: Optional[datetime.datetime] = None,
+    entered_to: Optional[datetime.datetime] = None
+) -> List[ObjectId]:
+    """
+    IDs של ה-CVs שנכנסו לסטטוס בטווח הזמן - covered על האינדקס status_history_entered
+    $group ולא distinct: התוצאה חוזרת ב-cursor ולא במסמך אחד (distinct מוגבל ל-16MB)
+    """
+    cursor = db[STATUS_HISTORY_COLLECTION_NAME].aggregate([
+        {"$match": build_entered_query(status, entered_from, entered_to)},
+        {"$group": {"_id": "$cv_id"}},
+    ])
+    return [row["_id"] async for row in cursor]
+
+
+def build_history_page_query(cv_id: ObjectId, after: Optional[ObjectId] = None) -> Dict[str, Any]:
+    """ה-query של עמוד history (משמש גם את ה-index advisor)"""
+    query: Dict[str, Any] = {"cv_id": cv_id}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+
+async def get_history_page(
+    db,
+    cv_id: ObjectId,
+    limit: int,
+    after: Optional[ObjectId] = None
+) -> Tuple[List[Dict[str, Any]], Optional[ObjectId]]:
+    """
+    עמוד אחד של ההיסטוריה המלאה (keyset pagination על _id, באינדקס status_history_cv)
+
+    Returns:
+        (entries, next_after) - ה-entries בקידוד הקומפקטי (עם body ל-webhook), next_after
+        הוא ה-_id של הרשומה האחרונה בעמוד, או None אם זה העמוד האחרון
+    """
+    cursor = db[STATUS_HISTORY_COLLECTION_NAME].find(
+        build_history_page_query(cv_id, after), {"cv_id": 0}
+    ).sort("_id", 1).limit(limit + 1)
+    records = await cursor.to_list(length=limit + 1)
+    next_after = records[limit - 1]["_id"] if len(records) > limit else None
+    return [
+        {key: record[key] for key in _RECORD_FIELDS + (BODY_KEY,) if key in record}
+        for record in records[:limit]
+    ], next_after
@@ -3,12 +3,69 @@ Storage service for CV documents
 This module provides database operations for CV documents
 Maintains backward compatibility while using new utilities
 """
-from typing import Any, List, Optional
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
 import datetime
 from app.core.constants import STATUS_SUBMITTED
-from app.core.config import COLLECTION_NAME
-from app.utils.data_normalization import normalize_document
+from app.core.config import COLLECTION_NAME, CV_CURSOR_BATCH_SIZE
+from app.utils.data_normalization import normalize_known_data, normalize_value
+from app.utils.projection import VIEW_FULL, FULL_PROJECTION, build_projection, shape_document
+from app.utils.search_keys import (
+    SEARCH_KEYS_FIELD, MATCH_MODE_PREFIX, build_search_keys, build_search_key_updates,
+    build_filter_condition, parse_match_score_range
+)
+from app.utils.status_history import (
+    build_entry, encode_entry, decode_entry, history_now, expand_history, has_webhook_entries
+)
+from app.core.constants import MATCH_SCORE_ALL
+from app.services import search_index, cv_stats, document_cache
+from app.services.status_history_store import (
+    BODY_KEY,
+    build_history_push,
+    slice_history_expression,
+    archive_later,
+    archive_documents,
+    find_entered_ids,
+    get_history_page,
+    get_webhook_responses,
+    get_webhook_responses_for
+)
+from app.services.text_store import (
+    save_extracted_text,
+    save_extracted_texts,
+    get_extracted_text,
+    delete_extracted_text,
+    find_ids_matching_text
+)
+
+# extracted_text נשמר ב-collection נפרד - שאילתות רשימה לא מעבירות אותו גם ממסמכים
+# שעוד לא עברו migration. search_keys הוא שדה פנימי לסינון ולא מוחזר
+LIST_PROJECTION = FULL_PROJECTION
+# match_score כמספר (known_data.match_score נשמר כמחרוזת)
+SCORE_FIELD = f"{SEARCH_KEYS_FIELD}.match_score"
+
+# מונה גרסה לכל מסמך - כל כתיבה ב-storage עושה עליו $inc (ה-ETag של GET /cv/{id})
+# כתיבה שלא הייתה משנה אף ערך לא נשלחת בכלל, כדי שהגרסה לא תעלה לחינם
+VERSION_FIELD = "version"
+# זמן השרת של העדכון האחרון ($currentDate / $$NOW) - לא נכתב ב-insert (ה-insert משנה את מספר המסמכים)
+# שדה פנימי: לא מוחזר, משמש רק את get_collection_version
+UPDATED_AT_FIELD = "updated_at"
+# השדות הפנימיים שלא מוחזרים בקריאת מסמך
+INTERNAL_PROJECTION = {SEARCH_KEYS_FIELD: 0, UPDATED_AT_FIELD: 0}
+# נוסף לכל update - ה-ETag של הרשימות נגזר ממנו (get_collection_version)
+TOUCH = {"$currentDate": {UPDATED_AT_FIELD: True}}
+
+# שדות known_data שניתן לעדכן דרך PATCH /cv/{id} (phone_number לא ניתן לעדכון)
+UPDATABLE_KNOWN_DATA_FIELDS = [
+    "latin_name", "hebrew_name", "email", "campaign",
+    "age", "nationality", "can_travel_europe",
+    "can_visit_israel", "lives_in_europe", "native_israeli",
+    "english_level", "remembers_job_application", "skills_summary",
+    "job_type", "match_score", "class_explain", "recruit_note"
+]
 
 # Backward compatibility: keep normalize_unknown_values for existing code
 def normalize_unknown_values(doc: dict) -> dict:
@@ -21,85 +78,353 @@ def normalize_unknown_values(doc: dict) -> dict:
     from app.utils.data_normalization import normalize_unknown_values as _normalize
     return _normalize(doc)
 
-async def insert_cv_document(db, doc: dict) -> str:
+def _status_entry(status: str, timestamp: Optional[datetime.datetime] = None) -> dict:
+    """בונה רשומת status_history - בקידוד הקומפקטי {c, t, d} (app/utils/status_history.py)"""
+    return build_entry(status, timestamp)
+
+async def get_collection_version(db) -> str:
+    """
+    גרסת ה-collection - ה-ETag של GET /cv ו-GET /cv/search, בלי לקרוא את המסמכים
+    ובלי מונה שנכתב בכל כתיבה. נגזרת מהמסמכים עצמם (באינדקס cv_updated_at):
+    - מספר המסמכים - משתנה בכל insert
+    - ה-updated_at האחרון - כל עדכון כותב את זמן השרת
+    - מספר המסמכים וסכום הגרסאות עם אותו updated_at בדיוק - עדכון נוסף באותה מילישנייה
+    """
+    collection = db[COLLECTION_NAME]
+    count, latest = await asyncio.gather(
+        collection.estimated_document_count(),
+        collection.find_one({}, {UPDATED_AT_FIELD: 1, "_id": 0}, sort=[(UPDATED_AT_FIELD, -1)])
+    )
+    updated_at = latest.get(UPDATED_AT_FIELD) if latest else None
+    if updated_at is None:
+        return str(count)
+    rows = await collection.aggregate([
+        {"$match": {UPDATED_AT_FIELD: updated_at}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "versions": {"$sum": f"${VERSION_FIELD}"}}}
+    ]).to_list(length=1)
+    tied = rows[0] if rows else {"count": 0, "versions": 0}
+    millis = int(updated_at.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+    return f"{count}.{millis}.{tied['count']}.{tied['versions']}"
+
+async def push_status_entries(
+    db,
+    object_id: ObjectId,
+    entries: List[dict],
+    update: dict,
+    bodies: Optional[List[Optional[str]]] = None
+):
+    """
+    מוסיף entries ל-status_history: נדחפים למסמך עם $slice - במסמך נשמרים רק
+    STATUS_HISTORY_MAX_EMBEDDED האחרונים - ואז נכתבים לארכיון ברקע (archive_later)
+    
+    Args:
+        update: שאר העדכון ($set / $inc) - באותו update_one
+        bodies: גוף התשובה של entries מסוג webhook_status - נשמר ברשומת הארכיון
+    
+    Returns:
+        ה-UpdateResult של עדכון המסמך
+    """
+    res = await db[COLLECTION_NAME].update_one(
+        {"_id": object_id},
+        {**update, **TOUCH, "$push": build_history_push(entries)}
+    )
+    if res.matched_count:
+        archive_later(db, object_id, entries, bodies)
+    return res
+
+def initialize_document(doc: dict, initial_statuses: Optional[List[str]], timestamp: datetime.datetime) -> None:
+    """השדות של מסמך חדש (סטטוס, history, search_keys, version) - משותף לכל ה-storage backends"""
     doc["is_deleted"] = False
+    # הנרמול נעשה פעם אחת בכתיבה - הקריאות מחזירות את המסמך כפי שנשמר
+    doc["known_data"] = normalize_known_data(doc.get("known_data"))
+    doc[SEARCH_KEYS_FIELD] = build_search_keys(doc.get("known_data"))
+    doc[VERSION_FIELD] = 1
     # צור current_status ו-status_history במקום status
-    timestamp = datetime.datetime.utcnow().isoformat() + "Z"
     doc["current_status"] = STATUS_SUBMITTED
-    doc["status_history"] = [
-        {
-            "status": STATUS_SUBMITTED,
-            "timestamp": timestamp
-        }
-    ]
+    doc["status_history"] = [_status_entry(STATUS_SUBMITTED, timestamp)]
+    # ה-history ההתחלתי (למשל סטטוס ה-processing) נכתב באותו insert - בלי round trip נוסף
+    for status in initial_statuses or []:
+        if status:
+            doc["status_history"].append(_status_entry(status, timestamp))
+
+async def insert_cv_document(db, doc: dict, initial_statuses: Optional[List[str]] = None) -> str:
+    """
+    מוסיף מסמך חדש עם current_status=Submitted
+    
+    Args:
+        db: מסד הנתונים
+        doc: המסמך
+        initial_statuses: סטטוסים נוספים ל-history אחרי Submitted (למשל processing)
+    
+    Returns:
+        ה-ID שנוצר
+    """
+    timestamp = history_now()
+    initialize_document(doc, initial_statuses, timestamp)
+    # הטקסט נכתב ל-side collection לפני המסמך - מסמך קיים תמיד מפנה לטקסט שכבר נשמר
+    extracted_text = doc.pop("extracted_text", None)
+    doc.setdefault("_id", ObjectId())
+    # שתי הכתיבות לפני ה-insert לא תלויות זו בזו - במקביל
+    await asyncio.gather(save_extracted_text(db, doc["_id"], extracted_text), archive_documents(db, [doc]))
     res = await db[COLLECTION_NAME].insert_one(doc)
+    search_index.index_document(res.inserted_id, doc, extracted_text)
+    cv_stats.invalidate_stats_cache()
     return str(res.inserted_id)
 
+async def insert_cv_documents(db, docs: List[dict], initial_statuses: Optional[List[str]] = None) -> List[str]:
+    """
+    מוסיף מספר מסמכים ב-insert_many אחד (העלאת batch)
+    
+    Args:
+        db: מסד הנתונים
+        docs: המסמכים להוספה
+        initial_statuses: סטטוס נוסף ל-history לכל מסמך (למשל processing), באותו סדר כמו docs
+    
+    Returns:
+        רשימת ה-IDs שנוצרו, באותו סדר כמו docs
+    """
+    if not docs:
+        return []
+    timestamp = history_now()
+    texts = {}
+    for index, doc in enumerate(docs):
+        initialize_document(doc, [initial_statuses[index]] if initial_statuses else None, timestamp)
+        doc.setdefault("_id", ObjectId())
+        texts[doc["_id"]] = doc.pop("extracted_text", None)
+    await asyncio.gather(save_extracted_texts(db, texts), archive_documents(db, docs))
+    res = await db[COLLECTION_NAME].insert_many(docs)
+    for doc in docs:
+        search_index.index_document(doc["_id"], doc, texts[doc["_id"]])
+    cv_stats.invalidate_stats_cache()
+    return [str(inserted_id) for inserted_id in res.inserted_ids]
+
 async def update_document_status(db, id: str, status: str) -> bool:
     """
     מעדכן את סטטוס המסמך
     מעדכן את current_status ומוסיף את הסטטוס החדש ל-status_history
     """
-    timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-    status_entry = {
-        "status": status,
-        "timestamp": timestamp
-    }
-    
-    res = await db[COLLECTION_NAME].update_one(
-        {"_id": ObjectId(id)},
-        {
-            "$set": {"current_status": status},
-            "$push": {"status_history": status_entry}
-        }
+    res = await push_status_entries(
+        db,
+        ObjectId(id),
+        [_status_entry(status)],
+        {"$set": {"current_status": status}, "$inc": {VERSION_FIELD: 1}}
     )
+    document_cache.invalidate_document(ObjectId(id))
+    if res.modified_count:
+        search_index.update_document_fields(ObjectId(id), {"current_status": status})
+        cv_stats.invalidate_stats_cache()
     return res.modified_count > 0
 
-async def get_all_documents(db, deleted: Optional[bool] = None) -> List[dict]:
+def _deleted_query(deleted: Optional[bool]) -> dict:
     """
-    מחזיר את כל המסמכים
+    query לפי הפרמטר deleted
     deleted: None/False - רק לא מחוקים (ברירת מחדל)
                    True - רק מחוקים
     """
-    # בנה את ה-query בהתאם לפרמטר
     if deleted is True:
         # רק מחוקים
-        query = {"is_deleted": True}
-    elif deleted is False or deleted is None:
-        # רק לא מחוקים (ברירת מחדל)
-        query = {"is_deleted": {"$ne": True}}
-    else:
-        # אם משהו לא צפוי, ברירת מחדל - רק לא מחוקים
-        query = {"is_deleted": {"$ne": True}}
+        return {"is_deleted": True}
+    # רק לא מחוקים (ברירת מחדל)
+    return {"is_deleted": {"$ne": True}}
+
+async def shape_documents(db, docs: List[dict], view: str = VIEW_FULL, fields: Optional[List[str]] = None) -> List[dict]:
+    """
+    shape_document לכמה מסמכים, עם גוף התשובה של ה-webhooks ב-status_history
+    (שאילתה אחת לכל המסמכים, ורק למסמכים שיש להם entries של webhook)
+    """
+    ids = [doc["_id"] for doc in docs if has_webhook_entries(doc)]
+    webhook_bodies = await get_webhook_responses_for(db, ids) if ids else {}
+    return [shape_document(doc, view, fields, webhook_bodies.get(doc["_id"])) for doc in docs]
+
+def build_list_query(deleted: Optional[bool] = None, after: Optional[ObjectId] = None) -> dict:
+    """ה-query של iter_documents (ממוין לפי _id)"""
+    query = _deleted_query(deleted)
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+async def iter_documents(
+    db,
+    deleted: Optional[bool] = None,
+    after: Optional[ObjectId] = None,
+    limit: int = 0,
+    view: str = VIEW_FULL,
+    fields: Optional[List[str]] = None
+) -> AsyncIterator[dict]:
+    """
+    מחזיר את המסמכים לפי סדר _id, batch אחרי batch כפי שה-cursor מביא אותם
+    (בלי לצבור את כל התוצאה בזיכרון) - גוף התשובה של ה-webhooks מצורף לכל batch
+
+    Args:
+        deleted: כמו ב-get_all_documents
+        after: keyset - רק מסמכים עם _id גדול ממנו
+        limit: מספר מסמכים מקסימלי (0 = ללא הגבלה)
+        view: "full" - המסמך המלא, "summary" - שורת CVSummary
+        fields: רק הנתיבים האלה (גובר על view)
+    """
+    query = build_list_query(deleted, after)
+    projection = build_projection(view, fields)
+    cursor = db[COLLECTION_NAME].find(query, projection).sort("_id", 1).batch_size(CV_CURSOR_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= CV_CURSOR_BATCH_SIZE:
+            for shaped in await shape_documents(db, batch, view, fields):
+                yield shaped
+            batch = []
+    for shaped in await shape_documents(db, batch, view, fields):
+        yield shaped
+
+async def get_all_documents(
+    db,
+    deleted: Optional[bool] = None,
+    view: str = VIEW_FULL,
+    fields: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    מחזיר את כל המסמכים
+    deleted: None/False - רק לא מחוקים (ברירת מחדל)
+                   True - רק מחוקים
+    view/fields: ה-projection (ראו iter_documents)
+    """
+    return [doc async for doc in iter_documents(db, deleted, view=view, fields=fields)]
+
+async def get_documents_page(
+    db,
+    deleted: Optional[bool],
+    limit: int,
+    after: Optional[ObjectId] = None,
+    view: str = VIEW_FULL,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[ObjectId]]:
+    """
+    מחזיר עמוד אחד של מסמכים (keyset pagination על _id)
+
+    Returns:
+        (docs, next_after) - next_after הוא ה-_id של המסמך האחרון בעמוד,
+        או None אם זה העמוד האחרון
+    """
+    # מסמך אחד נוסף כדי לדעת אם יש עמוד הבא בלי count
+    docs = [doc async for doc in iter_documents(db, deleted, after, limit + 1, view, fields)]
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, ObjectId(docs[-1]["id"])
+
+async def _find_document(db, object_id: ObjectId) -> Optional[dict]:
+    """
+    המסמך כפי שנשמר (בלי search_keys) לקריאה (get_document_by_id) - ה-body מה-document_cache,
+    אבל הגרסה נקראת תמיד מ-Mongo: מסמך ששונה בינתיים (גם ב-instance אחר) נקרא מחדש
+    """
+    doc = document_cache.get_document(object_id)
+    if doc is not None:
+        current = await db[COLLECTION_NAME].find_one({"_id": object_id}, {VERSION_FIELD: 1})
+        if current is not None and current.get(VERSION_FIELD, 0) == doc.get(VERSION_FIELD, 0):
+            return doc
+        document_cache.invalidate_document(object_id)
+        if current is None:
+            return None
+    generation = document_cache.current_generation()
+    doc = await db[COLLECTION_NAME].find_one({"_id": object_id}, INTERNAL_PROJECTION)
+    if doc:
+        document_cache.store_document(object_id, generation, doc)
+    return doc
+
+async def _find_active_document(db, object_id: ObjectId) -> Optional[dict]:
+    """
+    המסמך (שלא נמחק) שפונקציות ה-update קוראות לפני הכתיבה - תמיד מ-Mongo ולא מה-document_cache:
+    החלטה לפי עותק ישן הייתה דורסת כתיבה של instance אחר
+    """
+    return await db[COLLECTION_NAME].find_one({"_id": object_id, "is_deleted": {"$ne": True}}, INTERNAL_PROJECTION)
+
+async def get_document_version(db, id: str) -> Optional[int]:
+    """
+    הגרסה של מסמך (ה-ETag של GET /cv/{id}) - מ-Mongo (רק השדה version), לא מה-document_cache:
+    מסמך ששונה ב-instance אחר לא מקבל 304 על הגרסה הקודמת
     
-    docs = []
-    async for doc in db[COLLECTION_NAME].find(query):
-        doc["id"] = str(doc["_id"])
-        doc.pop("_id", None)
-        # Use normalize_document utility for consistent normalization
-        doc = normalize_document(doc)
-        docs.append(doc)
-    return docs
+    Returns:
+        הגרסה (0 למסמך שנוצר לפני שנוספה), או None אם המסמך לא קיים
+    """
+    doc = await db[COLLECTION_NAME].find_one({"_id": ObjectId(id)}, {VERSION_FIELD: 1})
+    return doc.get(VERSION_FIELD, 0) if doc else None
 
-async def get_document_by_id(db, id: str) -> Optional[dict]:
+async def get_document_by_id(db, id: str, include_text: bool = True) -> Optional[dict]:
     """
     מחזיר מסמך לפי מזהה - ללא בדיקת is_deleted (מחזיר גם מסמכים מחוקים)
+    
+    Args:
+        include_text: True - טוען גם את extracted_text וגוף התשובה של ה-webhooks (תצוגה מלאה),
+                      False - בלי הטקסט והתשובות (בדיקות קיום וסטטוס)
     """
-    doc = await db[COLLECTION_NAME].find_one({"_id": ObjectId(id)})
+    object_id = ObjectId(id)
+    webhook_bodies = None
+    if include_text:
+        doc, extracted_text, webhook_bodies = await asyncio.gather(
+            _find_document(db, object_id),
+            get_extracted_text(db, object_id),
+            get_webhook_responses(db, object_id)
+        )
+    else:
+        doc = await _find_document(db, object_id)
     if doc:
+        if include_text and extracted_text is not None:
+            doc["extracted_text"] = extracted_text
+        elif include_text:
+            # מסמך שעוד לא עבר migration שומר את הטקסט אצלו
+            doc.setdefault("extracted_text", "")
+        else:
+            doc.pop("extracted_text", None)
         doc["id"] = str(doc["_id"])
         doc.pop("_id", None)
-        # Use normalize_document utility for consistent normalization
-        doc = normalize_document(doc)
+        # התצוגה המלאה - עם גוף התשובה של ה-webhooks
+        expand_history(doc, webhook_bodies)
     return doc
 
+async def get_document_history(
+    db,
+    id: str,
+    limit: int,
+    after: Optional[ObjectId] = None
+) -> Optional[Tuple[List[dict], Optional[ObjectId]]]:
+    """
+    עמוד אחד מה-status_history המלא (הארכיון) - גם למסמכים מחוקים
+    
+    Returns:
+        None אם המסמך לא קיים, אחרת (entries, next_after) - ה-entries כמו ב-GET /cv/{id},
+        עם גוף התשובה של ה-webhooks
+    """
+    object_id = ObjectId(id)
+    doc, (entries, next_after) = await asyncio.gather(
+        db[COLLECTION_NAME].find_one({"_id": object_id}, {"_id": 1}),
+        get_history_page(db, object_id, limit, after)
+    )
+    if doc is None:
+        return None
+    # גוף התשובה נשמר ברשומת הארכיון עצמה
+    return [decode_entry(entry, entry.get(BODY_KEY)) for entry in entries], next_after
+
 async def delete_document_by_id(db, id: str) -> bool:
-    res = await db[COLLECTION_NAME].update_one({"_id": ObjectId(id)}, {"$set": {"is_deleted": True}})
+    # התנאי על is_deleted - מסמך שכבר מחוק לא מתעדכן (והגרסה שלו לא עולה)
+    res = await db[COLLECTION_NAME].update_one(
+        {"_id": ObjectId(id), "is_deleted": {"$ne": True}},
+        {"$set": {"is_deleted": True}, "$inc": {VERSION_FIELD: 1}, **TOUCH}
+    )
+    document_cache.invalidate_document(ObjectId(id))
+    if res.modified_count:
+        cv_stats.invalidate_stats_cache()
     return res.modified_count > 0
 
 async def restore_document_by_id(db, id: str) -> bool:
     """משחזר מסמך שנמחק על ידי עדכון is_deleted ל-False"""
-    res = await db[COLLECTION_NAME].update_one({"_id": ObjectId(id)}, {"$set": {"is_deleted": False}})
+    res = await db[COLLECTION_NAME].update_one(
+        {"_id": ObjectId(id), "is_deleted": {"$ne": False}},
+        {"$set": {"is_deleted": False}, "$inc": {VERSION_FIELD: 1}, **TOUCH}
+    )
+    document_cache.invalidate_document(ObjectId(id))
+    if res.modified_count:
+        cv_stats.invalidate_stats_cache()
     return res.modified_count > 0
 
 async def add_status_to_history(db, id: str, status: str) -> bool:
@@ -107,171 +432,259 @@ async def add_status_to_history(db, id: str, status: str) -> bool:
     מוסיף סטטוס ל-status_history (ללא עדכון current_status)
     משמש להוספת סטטוסים כמו webhook_status, processing וכו'
     """
-    timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-    status_entry = {
-        "status": status,
-        "timestamp": timestamp
-    }
-    
-    res = await db[COLLECTION_NAME].update_one(
-        {"_id": ObjectId(id)},
-        {"$push": {"status_history": status_entry}}
-    )
+    res = await push_status_entries(db, ObjectId(id), [_status_entry(status)], {"$inc": {VERSION_FIELD: 1}})
+    document_cache.invalidate_document(ObjectId(id))
     return res.modified_count > 0
 
-async def update_document_full(db, id: str, update_data: dict) -> bool:
-    """מעדכן מסמך - מעדכן את כל השדות תמיד (למעט phone_number)"""
-    # קבל את המסמך הנוכחי
-    doc = await db[COLLECTION_NAME].find_one({"_id": ObjectId(id), "is_deleted": {"$ne": True}})
-    if not doc:
-        return False
-    
-    # המר "unknown" ל-None בכל הערכים ב-update_data לפני העיבוד
-    update_data = update_data.copy()  # עותק כדי לא לשנות את המקורי
-    for key, value in update_data.items():
-        if isinstance(value, str) and value.lower() == "unknown":
-            update_data[key] = None
-    
-    # הסר שדות שצריכים להיות מעודכנים רק דרך update_document_status
-    # כדי למנוע עדכון ישיר של status, current_status או status_history
-    update_data.pop("status", None)
-    update_data.pop("current_status", None)
-    update_data.pop("status_history", None)
+async def record_webhook_result(db, id: str, webhook_status: str, new_status: Optional[str] = None) -> bool:
+    """
+    רושם את תוצאת ה-webhook ואת המעבר לסטטוס הבא בעדכון אטומי אחד
+    (במקום add_status_to_history ואחריו update_document_status)
     
-    # הסר את phone_number ו-phone - לא ניתן לעדכן אותם
-    update_data.pop("phone_number", None)
-    update_data.pop("phone", None)
+    Args:
+        db: מסד הנתונים
+        id: מזהה המסמך
+        webhook_status: סטטוס ה-webhook ל-history (webhook_status: ... / webhook_error: ...)
+        new_status: current_status החדש אם ה-webhook הצליח (None - רק רישום ל-history)
     
-    # בנה את ה-update
-    set_updates = {}
+    Returns:
+        True אם המסמך עודכן
+    """
+    timestamp = history_now()
+    # גוף התשובה לא נשמר ב-entry - הוא נכתב לרשומת הארכיון של ה-entry
+    webhook_entry, webhook_body = encode_entry(webhook_status, timestamp)
+    entries = [webhook_entry]
+    update = {"$inc": {VERSION_FIELD: 1}}
+    if new_status:
+        entries.append(_status_entry(new_status, timestamp))
+        update["$set"] = {"current_status": new_status}
+    
+    res = await push_status_entries(db, ObjectId(id), entries, update, [webhook_body])
+    document_cache.invalidate_document(ObjectId(id))
+    if res.modified_count and new_status:
+        search_index.update_document_fields(ObjectId(id), {"current_status": new_status})
+        cv_stats.invalidate_stats_cache()
+    return res.modified_count > 0
+
+async def set_extraction_result(db, id: str, extracted_text: str, processing_status: str) -> bool:
+    """
+    שומר תוצאת חילוץ שרצה אחרי יצירת המסמך (מצב deferred)
+    שומר את extracted_text ב-side collection ומוסיף את סטטוס ה-processing ל-history
+    """
+    object_id = ObjectId(id)
+    # הטקסט נשמר לפני הסטטוס - מי שרואה processing_success כבר מוצא את הטקסט
+    await save_extracted_text(db, object_id, extracted_text)
+    res = await push_status_entries(db, object_id, [_status_entry(processing_status)], {"$inc": {VERSION_FIELD: 1}})
+    document_cache.invalidate_document(object_id)
+    if res.matched_count == 0:
+        await delete_extracted_text(db, object_id)
+        return False
+    search_index.update_document_text(object_id, extracted_text)
+    return True
+
+def is_unchanged(known_data: dict, known_data_updates: dict) -> bool:
+    """True אם כל שדה ב-known_data_updates כבר קיים עם אותו ערך"""
+    return all(field in known_data and known_data[field] == value for field, value in known_data_updates.items())
+
+def _value_differs(path: str, value: Any) -> dict:
+    """תנאי query: הערך ב-path שונה מ-value (שדה חסר שונה גם מ-None - כמו is_unchanged)"""
+    if value is None:
+        # {$ne: null} לא תופס שדה חסר
+        return {"$or": [{path: {"$ne": None}}, {path: {"$exists": False}}]}
+    return {path: {"$ne": value}}
+
+async def _set_known_data(db, object_id: ObjectId, known_data_updates: dict) -> bool:
+    """
+    כותב את השדות של update_document_full / fields_only / partial - כל שדה כ-dotted path
+    (known_data.<field>, ורק ה-search_keys שנגזרים ממנו), כך שכתיבה מקבילה לשדות אחרים
+    (גם מ-instance אחר) לא נדרסת. ה-query מותנה בכך שלפחות ערך אחד שונה - ערכים זהים
+    לא נכתבים והגרסה לא עולה
     
-    # שדות ב-known_data
+    Returns:
+        True אם המסמך עודכן (False - לא קיים, נמחק או שהערכים זהים)
+    """
+    set_updates = {f"known_data.{field}": value for field, value in known_data_updates.items()}
+    search_keys_set, search_keys_unset = build_search_key_updates(known_data_updates)
+    set_updates.update(search_keys_set)
+    update = {"$set": set_updates, "$inc": {VERSION_FIELD: 1}, **TOUCH}
+    if search_keys_unset:
+        update["$unset"] = {path: "" for path in search_keys_unset}
+    query = {
+        "_id": object_id,
+        "is_deleted": {"$ne": True},
+        "$or": [_value_differs(f"known_data.{field}", value) for field, value in known_data_updates.items()]
+    }
+    # known_data אחרי העדכון - לאינדקס החיפוש (הוא מחליף את כל השדות של known_data)
+    after = await db[COLLECTION_NAME].find_one_and_update(
+        query, update, projection={"known_data": 1}, return_document=ReturnDocument.AFTER
+    )
+    document_cache.invalidate_document(object_id)
+    if after is None:
+        return False
+    search_index.update_document_fields(object_id, {"known_data": after.get("known_data") or {}})
+    cv_stats.invalidate_stats_cache()
+    return True
+
+def collect_known_data_updates(update_data: dict) -> dict:
+    """
+    השדות של PATCH /cv/{id}, update_document_full ו-update_document_fields_only:
+    רק UPDATABLE_KNOWN_DATA_FIELDS ("unknown" -> None) - phone_number, status, current_status
+    ו-status_history לא נכתבים כאן
+    """
     known_data_updates = {}
-    if "known_data" not in doc:
-        doc["known_data"] = {}
-    
-    # כל השדות הנוספים יישמרו תחת known_data
-    all_fields = [
-        "latin_name", "hebrew_name", "email", "campaign",
-        "age", "nationality", "can_travel_europe", 
-        "can_visit_israel", "lives_in_europe", "native_israeli",
-        "english_level", "remembers_job_application", "skills_summary",
-        "job_type", "match_score", "class_explain", "recruit_note"
-    ]
-    
-    # עדכן את כל השדות תמיד (למעט phone_number שכבר הוסר)
-    for field in all_fields:
+    for field in UPDATABLE_KNOWN_DATA_FIELDS:
         if field in update_data:
-            # המר "unknown" ל-None אם זה string
-            value = update_data[field]
-            if isinstance(value, str) and value.lower() == "unknown":
-                value = None
-            known_data_updates[field] = value
+            known_data_updates[field] = normalize_value(update_data[field])
+    return known_data_updates
+
+def build_fields_update(doc: dict, update_data: dict) -> Union[bool, dict]:
+    """
+    השדות של update_document_full / fields_only למסמך doc (משותף לכל ה-storage backends)
     
-    # אם אין מה לעדכן, החזר True
+    Returns:
+        dict - field -> ערך ב-known_data, או bool - התוצאה בלי כתיבה
+        (True - אין מה לעדכן, False - הערכים זהים)
+    """
+    known_data_updates = collect_known_data_updates(update_data)
     if not known_data_updates:
         return True
-    
-    # עדכן את המסמך
-    # אם יש known_data_updates, צריך לעשות merge עם known_data הקיים
-    existing_known_data = doc.get("known_data", {})
-    existing_known_data.update(known_data_updates)
-    set_updates["known_data"] = existing_known_data
-    
-    # ודא שלא מעדכנים status, current_status או status_history ישירות
-    set_updates.pop("status", None)
-    set_updates.pop("current_status", None)
-    set_updates.pop("status_history", None)
-    
-    res = await db[COLLECTION_NAME].update_one(
-        {"_id": ObjectId(id)},
-        {"$set": set_updates}
-    )
-    return res.modified_count > 0
+    if is_unchanged(doc.get("known_data") or {}, known_data_updates):
+        return False
+    return known_data_updates
+
+async def _update_known_data_fields(db, id: str, update_data: dict) -> bool:
+    """update_document_full / fields_only - בלי קריאה מוקדמת: ההשוואה לערכים הקיימים היא חלק מה-query"""
+    object_id = ObjectId(id)
+    known_data_updates = collect_known_data_updates(update_data)
+    if not known_data_updates:
+        # אין מה לעדכן - True אם המסמך קיים
+        return await _find_active_document(db, object_id) is not None
+    return await _set_known_data(db, object_id, known_data_updates)
+
+async def update_document_full(db, id: str, update_data: dict) -> bool:
+    """מעדכן מסמך - כל השדות שנשלחו (למעט phone_number)"""
+    return await _update_known_data_fields(db, id, update_data)
 
 async def update_document_fields_only(db, id: str, update_data: dict) -> bool:
     """מעדכן מסמך - מעדכן רק את השדות שמגיעים ב-update_data"""
-    # קבל את המסמך הנוכחי
-    doc = await db[COLLECTION_NAME].find_one({"_id": ObjectId(id), "is_deleted": {"$ne": True}})
-    if not doc:
-        return False
-    
-    # המר "unknown" ל-None בכל הערכים ב-update_data לפני העיבוד
-    update_data = update_data.copy()  # עותק כדי לא לשנות את המקורי
-    for key, value in update_data.items():
-        if isinstance(value, str) and value.lower() == "unknown":
-            update_data[key] = None
-    
-    # הסר שדות שצריכים להיות מעודכנים רק דרך update_document_status
-    # כדי למנוע עדכון ישיר של status, current_status או status_history
-    update_data.pop("status", None)
-    update_data.pop("current_status", None)
-    update_data.pop("status_history", None)
-    
-    # הסר את phone_number - לא ניתן לעדכן 
-    update_data.pop("phone_number", None)
-    
-    # אם אין שדות לעדכון, החזר True
-    if not update_data:
-        return True
-    
-    # בנה את ה-update
-    set_updates = {}
-    
-    # שדות ב-known_data
-    known_data_updates = {}
-    if "known_data" not in doc:
-        doc["known_data"] = {}
+    return await _update_known_data_fields(db, id, update_data)
+
+async def update_document_fields_with_transition(
+    db,
+    id: str,
+    update_data: dict,
+    transitions: Optional[Dict[str, str]] = None
+) -> Optional[dict]:
+    """
+    מעדכן את השדות שנשלחו ומבצע מעבר סטטוס מותנה - ב-find_one_and_update אחד
     
-    # כל השדות הנוספים יישמרו תחת known_data
-    all_fields = [
-        "latin_name", "hebrew_name", "email", "campaign",
-        "age", "nationality", "can_travel_europe", 
-        "can_visit_israel", "lives_in_europe", "native_israeli",
-        "english_level", "remembers_job_application", "skills_summary",
-        "job_type", "match_score", "class_explain", "recruit_note"
-    ]
+    כל שדה נכתב כ-dotted path (known_data.<field>), כך שעדכונים מקבילים לשדות שונים
+    לא דורסים זה את זה. המעבר (למשל Extracting -> Ready For Bot Interview) מחושב בתוך
+    ה-update (pipeline) לפי הסטטוס באותו רגע, ורק אם אחד הערכים באמת השתנה.
+    המעבר נכתב לארכיון אחרי העדכון (ברקע), לפי הסטטוס שה-update מחזיר (ReturnDocument.BEFORE).
     
-    # עדכן רק את השדות שמגיעים ב-update_data
-    for field in all_fields:
-        if field in update_data:
-            # המר "unknown" ל-None אם זה string
-            value = update_data[field]
-            if isinstance(value, str) and value.lower() == "unknown":
-                value = None
-            known_data_updates[field] = value
+    Args:
+        db: מסד הנתונים
+        id: מזהה המסמך
+        update_data: השדות לעדכון (שדות שלא ב-UPDATABLE_KNOWN_DATA_FIELDS מתעלמים מהם)
+        transitions: סטטוס נוכחי -> סטטוס חדש (UPDATE_STATUS_TRANSITIONS)
     
-    # אם אין מה לעדכן, החזר True
+    Returns:
+        None אם המסמך לא קיים או נמחק, אחרת dict עם modified, previous_status, current_status
+    """
+    object_id = ObjectId(id)
+    transitions = transitions or {}
+    known_data_updates = collect_known_data_updates(update_data)
     if not known_data_updates:
-        return True
-    
-    # עדכן את המסמך
-    # אם יש known_data_updates, צריך לעשות merge עם known_data הקיים
-    existing_known_data = doc.get("known_data", {})
-    existing_known_data.update(known_data_updates)
-    set_updates["known_data"] = existing_known_data
-    
-    # ודא שלא מעדכנים status, current_status או status_history ישירות
-    set_updates.pop("status", None)
-    set_updates.pop("current_status", None)
-    set_updates.pop("status_history", None)
-    
-    res = await db[COLLECTION_NAME].update_one(
-        {"_id": ObjectId(id)},
-        {"$set": set_updates}
+        doc = await _find_active_document(db, object_id)
+        if not doc:
+            return None
+        status = doc.get("current_status")
+        return {"modified": False, "previous_status": status, "current_status": status}
+    
+    timestamp = history_now()
+    # ה-entry של ה-history קבוע לכל מעבר - ענף לכל סטטוס מקור
+    transition_entries = {old: _status_entry(new, timestamp) for old, new in transitions.items()}
+    
+    # $literal - ערך שמתחיל ב-$ הוא טקסט ולא field path
+    values = {field: {"$literal": value} for field, value in known_data_updates.items()}
+    changed = {"$or": [{"$ne": [f"$known_data.{field}", value]} for field, value in values.items()]}
+    next_status = {
+        "$switch": {
+            "branches": [{"case": {"$eq": ["$current_status", old]}, "then": new} for old, new in transitions.items()],
+            "default": "$current_status"
+        }
+    } if transitions else "$current_status"
+    search_keys_set, search_keys_unset = build_search_key_updates(known_data_updates)
+    
+    set_stage = {f"known_data.{field}": value for field, value in values.items()}
+    set_stage.update({path: {"$literal": value} for path, value in search_keys_set.items()})
+    set_stage["current_status"] = {"$cond": ["$_transition", next_status, "$current_status"]}
+    set_stage[VERSION_FIELD] = {"$cond": ["$_changed", {"$add": [{"$ifNull": [f"${VERSION_FIELD}", 0]}, 1]}, f"${VERSION_FIELD}"]}
+    set_stage[UPDATED_AT_FIELD] = {"$cond": ["$_changed", "$$NOW", f"${UPDATED_AT_FIELD}"]}
+    set_stage["status_history"] = {
+        "$cond": [
+            "$_transition",
+            {
+                "$switch": {
+                    "branches": [
+                        {
+                            "case": {"$eq": ["$current_status", old]},
+                            "then": slice_history_expression(
+                                {"$concatArrays": [{"$ifNull": ["$status_history", []]}, [entry]]}
+                            )
+                        }
+                        for old, entry in transition_entries.items()
+                    ],
+                    "default": "$status_history"
+                }
+            },
+            "$status_history"
+        ]
+    } if transitions else "$status_history"
+    pipeline = [
+        # _changed / _transition מחושבים לפני שהשדות נכתבים - משווים לערכים הקודמים
+        {"$set": {
+            "_changed": changed,
+            "_transition": {"$and": [changed, {"$in": ["$current_status", list(transitions)]}]}
+        }},
+        {"$set": set_stage},
+        # $project עם 0 ולא שלב $unset (שהוא alias שלו) - נתמך גם ב-mongomock שהבדיקות רצות עליו
+        {"$project": {field: 0 for field in ["_changed", "_transition"] + search_keys_unset}},
+    ]
+    before = await db[COLLECTION_NAME].find_one_and_update(
+        {"_id": object_id, "is_deleted": {"$ne": True}},
+        pipeline,
+        projection={"known_data": 1, "current_status": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    return res.modified_count > 0
+    document_cache.invalidate_document(object_id)
+    if before is None:
+        return None
+    
+    # אותו חישוב כמו ב-pipeline, על המסמך שלפני העדכון
+    known_data = before.get("known_data") or {}
+    modified = not is_unchanged(known_data, known_data_updates)
+    previous_status = before.get("current_status")
+    if modified and previous_status in transition_entries:
+        # ה-entry שה-pipeline הוסיף למסמך - גם לארכיון (ברקע, כמו ב-push_status_entries)
+        archive_later(db, object_id, [transition_entries[previous_status]])
+    current_status = transitions.get(previous_status, previous_status) if modified else previous_status
+    if modified:
+        known_data.update(known_data_updates)
+        search_index.update_document_fields(object_id, {"known_data": known_data, "current_status": current_status})
+        cv_stats.invalidate_stats_cache()
+    return {"modified": modified, "previous_status": previous_status, "current_status": current_status}
 
-async def update_document_partial(db, id: str, update_data: dict) -> bool:
-    """מעדכן מסמך - רק שדות שלא קיימים או ריקים"""
-    # קבל את המסמך הנוכחי
-    doc = await db[COLLECTION_NAME].find_one({"_id": ObjectId(id), "is_deleted": {"$ne": True}})
-    if not doc:
-        return False
-    
-    # בנה את ה-update - רק שדות שלא קיימים או ריקים
-    set_updates = {}
+def build_partial_update(doc: dict, update_data: dict) -> Union[bool, dict]:
+    """
+    השדות של update_document_partial למסמך doc (משותף לכל ה-storage backends)
     
+    Returns:
+        dict - field -> ערך ב-known_data, או bool - התוצאה בלי כתיבה
+        (True - אין מה לעדכן, False - הערכים זהים)
+    """
+    # רק שדות שלא קיימים או ריקים
     # שדות ב-known_data
     known_data_updates = {}
     if "known_data" not in doc:
@@ -319,74 +732,82 @@ async def update_document_partial(db, id: str, update_data: dict) -> bool:
             known_data_updates[field] = update_data[field] if update_data[field] is not None else None
     
     # אם אין מה לעדכן, החזר True (כבר קיים)
-    if not set_updates and not known_data_updates:
+    if not known_data_updates:
         return True
     
-    # עדכן את המסמך
-    # אם יש known_data_updates, צריך לעשות merge עם known_data הקיים
-    if known_data_updates:
-        existing_known_data = doc.get("known_data", {})
-        existing_known_data.update(known_data_updates)
-        set_updates["known_data"] = existing_known_data
-    
-    # ודא שלא מעדכנים status, current_status או status_history ישירות
-    # אלה צריכים להיות מעודכנים רק דרך update_document_status או add_status_to_history
-    set_updates.pop("status", None)
-    set_updates.pop("current_status", None)
-    set_updates.pop("status_history", None)
+    # "unknown" נשמר כ-None (אחרי ההחלטה מה לעדכן - כמו שהיה מוחזר בקריאה)
+    known_data_updates = {field: normalize_value(value) for field, value in known_data_updates.items()}
     
-    res = await db[COLLECTION_NAME].update_one(
-        {"_id": ObjectId(id)},
-        {"$set": set_updates}
-    )
-    return res.modified_count > 0
+    # כל הערכים זהים - אין כתיבה (כמו modified_count == 0)
+    if is_unchanged(doc.get("known_data", {}), known_data_updates):
+        return False
+    return known_data_updates
 
-async def get_documents_by_status(db, status: str) -> List[dict]:
-    """מחזיר את כל המסמכים עם סטטוס מסוים"""
-    query = {
+async def update_document_partial(db, id: str, update_data: dict) -> bool:
+    """מעדכן מסמך - רק שדות שלא קיימים או ריקים (לפי המסמך כפי שהוא ב-Mongo)"""
+    doc = await _find_active_document(db, ObjectId(id))
+    if not doc:
+        return False
+    known_data_updates = build_partial_update(doc, update_data)
+    if isinstance(known_data_updates, bool):
+        return known_data_updates
+    return await _set_known_data(db, ObjectId(id), known_data_updates)
+
+def build_status_query(status: str) -> dict:
+    """ה-query של get_documents_by_status"""
+    return {
         "current_status": status,
         "is_deleted": {"$ne": True}
     }
-    docs = []
-    async for doc in db[COLLECTION_NAME].find(query):
-        doc["id"] = str(doc["_id"])
-        doc.pop("_id", None)
-        # Use normalize_document utility for consistent normalization
-        doc = normalize_document(doc)
-        docs.append(doc)
-    return docs
 
-async def search_documents_advanced(
-    db,
+async def get_documents_by_status(db, status: str) -> List[dict]:
+    """מחזיר את כל המסמכים עם סטטוס מסוים"""
+    query = build_status_query(status)
+    docs = await db[COLLECTION_NAME].find(query, LIST_PROJECTION).to_list(length=None)
+    return await shape_documents(db, docs)
+
+def build_search_query(
     free_text: Optional[str] = None,
+    text_matches: Optional[List[ObjectId]] = None,
+    use_search_index: bool = False,
     current_status: Optional[str] = None,
     job_type: Optional[str] = None,
     match_score: Optional[str] = None,
     campaign: Optional[str] = None,
-    country: Optional[str] = None
-) -> List[dict]:
+    country: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    match_mode: str = MATCH_MODE_PREFIX,
+    entered_matches: Optional[List[ObjectId]] = None
+) -> dict:
     """
-    חיפוש מתקדם במסמכים
+    בונה את ה-query של search_documents_advanced (משמש גם את ה-index advisor)
     
     Args:
-        free_text: חיפוש חופשי - יחפש את הערך בכל שדה במסמך
-        current_status: חיפוש לפי סטטוס נוכחי
-        job_type: חיפוש לפי סוג עבודה
-        match_score: חיפוש לפי טווח ציון התאמה (below 70, 70-79, 80-89, 90-100, all match_score)
-        campaign: חיפוש לפי קמפיין
-        country: חיפוש לפי ארץ (nationality)
-    
-    Returns:
-        רשימת מסמכים התואמים לקריטריוני החיפוש
+        text_matches: IDs של מסמכים שתואמים ל-free_text - מה-search index, או מה-side collection
+                      כשהאינדקס עוד לא מוכן
+        use_search_index: True - text_matches הם התוצאה המלאה של free_text (בלי regex)
+        match_mode: exact / prefix עבור job_type, campaign ו-country (לא תלוי רישיות)
+        entered_matches: IDs של מסמכים שנכנסו לסטטוס בטווח הזמן - מארכיון ה-history (find_entered_ids)
+
+    טווחי הציון ו-job_type / campaign / country רצים רק על search_keys - מסמכים מלפני
+    search_keys (או מגרסה קודמת) לא תואמים להם עד שרץ app.migrations.search_keys_backfill
     """
     # התחל עם query בסיסי - רק מסמכים לא מחוקים
     query_conditions = [{"is_deleted": {"$ne": True}}]
     
-    # חיפוש חופשי - יחפש בכל השדות
-    if free_text:
+    # חיפוש חופשי - האינדקס כבר מכסה את כל השדות
+    if free_text and use_search_index:
+        query_conditions.append({"_id": {"$in": text_matches or []}})
+    
+    # חיפוש חופשי - יחפש בכל השדות (כשהאינדקס עוד לא נבנה)
+    elif free_text:
+        # הקלט של המשתמש הוא טקסט ולא regex
+        free_text = re.escape(free_text)
         free_text_conditions = {
             "$or": [
-                {"extracted_text": {"$regex": free_text, "$options": "i"}},
+                {"_id": {"$in": text_matches or []}},
+                {"extracted_text": {"$regex": free_text, "$options": "i"}},  # מסמכים שעוד לא עברו migration
                 {"file_metadata.filename": {"$regex": free_text, "$options": "i"}},
                 {"known_data.name": {"$regex": free_text, "$options": "i"}},
                 {"known_data.phone_number": {"$regex": free_text, "$options": "i"}},
@@ -408,73 +829,142 @@ async def search_documents_advanced(
     if current_status:
         query_conditions.append({"current_status": current_status})
     
+    # job_type / campaign / country - על השדות המנורמלים ב-search_keys, כך שהאינדקס משרת אותם
     if job_type:
-        query_conditions.append({"known_data.job_type": {"$regex": job_type, "$options": "i"}})
+        query_conditions.append({f"{SEARCH_KEYS_FIELD}.job_type": build_filter_condition(job_type, match_mode)})
     
     if match_score:
-        # טיפול מיוחד ב-match_score - טווחים
-        match_score_conditions = []
-        
-        if match_score == "below 70":
-            # כל הערכים מתחת ל-70: 0-69
-            # נשתמש ב-regex patterns לכל המספרים מ-0 עד 69
-            match_score_conditions = [
-                {"known_data.match_score": {"$regex": r"^[0-6][0-9]$", "$options": "i"}},  # 00-69
-                {"known_data.match_score": {"$regex": r"^[0-9]$", "$options": "i"}},  # 0-9
-            ]
-        elif match_score == "70-79":
-            match_score_conditions = [
-                {"known_data.match_score": {"$regex": r"^7[0-9]$", "$options": "i"}},
-            ]
-        elif match_score == "80-89":
-            match_score_conditions = [
-                {"known_data.match_score": {"$regex": r"^8[0-9]$", "$options": "i"}},
-            ]
-        elif match_score == "90-100":
-            match_score_conditions = [
-                {"known_data.match_score": {"$regex": r"^(9[0-9]|100)$", "$options": "i"}},
-            ]
-        elif match_score == "all match_score":
+        if match_score == MATCH_SCORE_ALL:
             # כל המסמכים שיש להם match_score (לא None)
-            match_score_conditions = [
-                {"known_data.match_score": {"$exists": True, "$ne": None}},
-            ]
-        
-        if match_score_conditions:
-            query_conditions.append({"$or": match_score_conditions})
+            query_conditions.append({"known_data.match_score": {"$exists": True, "$ne": None}})
+        else:
+            # טווח מספרי על ה-shadow field - ערך לא מספרי לא נכלל באף טווח
+            query_conditions.append({SCORE_FIELD: parse_match_score_range(match_score)})
+    
+    if min_score is not None:
+        query_conditions.append({SCORE_FIELD: {"$gte": min_score}})
+    
+    if max_score is not None:
+        query_conditions.append({SCORE_FIELD: {"$lte": max_score}})
     
     if campaign:
-        query_conditions.append({"known_data.campaign": {"$regex": campaign, "$options": "i"}})
+        query_conditions.append({f"{SEARCH_KEYS_FIELD}.campaign": build_filter_condition(campaign, match_mode)})
     
     if country:
-        query_conditions.append({"known_data.nationality": {"$regex": country, "$options": "i"}})
+        query_conditions.append({f"{SEARCH_KEYS_FIELD}.nationality": build_filter_condition(country, match_mode)})
+    
+    # entered_status - רשומה בארכיון ה-history (במסמך נשמרים רק ה-entries האחרונים)
+    if entered_matches is not None:
+        query_conditions.append({"_id": {"$in": entered_matches}})
     
     # בנה את ה-query הסופי
     query = {"$and": query_conditions} if len(query_conditions) > 1 else query_conditions[0]
+    return query
+
+async def resolve_search_query(
+    db,
+    free_text: Optional[str] = None,
+    entered_status: Optional[str] = None,
+    entered_from: Optional[datetime.datetime] = None,
+    entered_to: Optional[datetime.datetime] = None,
+    **filters: Any
+) -> dict:
+    """
+    build_search_query עם free_text - מוצא קודם את ה-IDs שתואמים לטקסט
+    (search index, או ה-side collection כשהאינדקס עוד לא מוכן)
+    ועם entered_status - את ה-IDs שנכנסו לסטטוס בטווח הזמן (entered_from <= t < entered_to)
     
-    docs = []
-    cursor = db[COLLECTION_NAME].find(query)
-    async for doc in cursor:
-        # טיפול מיוחד ב-match_score עבור "below 70" - סינון נוסף למקרים שלא נתפסו ב-regex
-        if match_score == "below 70":
-            match_score_value = doc.get("known_data", {}).get("match_score")
-            if match_score_value is not None:
-                score_str = str(match_score_value).strip()
-                try:
-                    # נסה להמיר למספר לבדיקה מדויקת
-                    score_num = float(score_str)
-                    if score_num >= 70:
-                        continue  # דלג על מסמך זה
-                except (ValueError, TypeError):
-                    # אם לא ניתן להמיר, נבדוק אם זה מספר בעל 3 ספרות או יותר (100+)
-                    if len(score_str) >= 3:
-                        continue  # כנראה 100 או יותר
-                    # אחרת, נכלול אותו (יכול להיות משהו כמו "65.5" או ערך לא מספרי)
-        
-        doc["id"] = str(doc["_id"])
-        doc.pop("_id", None)
-        # Use normalize_document utility for consistent normalization
-        doc = normalize_document(doc)
-        docs.append(doc)
+    Args:
+        filters: שאר הפרמטרים של build_search_query
+    """
+    use_search_index = bool(free_text) and search_index.is_ready()
+    if use_search_index:
+        # כתיבות מ-process אחר מאז הסנכרון האחרון נטענות לפני החיפוש
+        await search_index.sync_search_index(db)
+        text_matches = search_index.search_ids(free_text)
+    elif free_text:
+        # הטקסט שחולץ דחוס ב-side collection - החיפוש בו מחזיר IDs
+        text_matches = await find_ids_matching_text(db, re.escape(free_text))
+    else:
+        text_matches = None
+    entered_matches = await find_entered_ids(db, entered_status, entered_from, entered_to) if entered_status else None
+    return build_search_query(
+        free_text=free_text,
+        text_matches=text_matches,
+        use_search_index=use_search_index,
+        entered_matches=entered_matches,
+        **filters
+    )
+
+async def search_documents_advanced(
+    db,
+    free_text: Optional[str] = None,
+    current_status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    match_score: Optional[str] = None,
+    campaign: Optional[str] = None,
+    country: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    match_mode: str = MATCH_MODE_PREFIX,
+    entered_status: Optional[str] = None,
+    entered_from: Optional[datetime.datetime] = None,
+    entered_to: Optional[datetime.datetime] = None,
+    view: str = VIEW_FULL,
+    fields: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    חיפוש מתקדם במסמכים
+    
+    Args:
+        free_text: חיפוש חופשי - יחפש את הערך בכל שדה במסמך
+        current_status: חיפוש לפי סטטוס נוכחי
+        job_type: חיפוש לפי סוג עבודה
+        match_score: חיפוש לפי טווח ציון התאמה (below 70, 70-79, 80-89, 90-100, all match_score, או "min-max")
+        campaign: חיפוש לפי קמפיין
+        country: חיפוש לפי ארץ (nationality)
+        min_score / max_score: טווח ציון התאמה (כולל את הגבולות)
+        match_mode: exact - ערך מלא, prefix - תחילת הערך (job_type, campaign, country)
+        entered_status / entered_from / entered_to: מסמכים שנכנסו לסטטוס בטווח הזמן
+        view/fields: ה-projection של התוצאות (ראו iter_documents)
     
-    return docs
\ No newline at end of file
+    Returns:
+        רשימת מסמכים התואמים לקריטריוני החיפוש
+    """
+    query = await resolve_search_query(
+        db,
+        free_text=free_text,
+        current_status=current_status,
+        job_type=job_type,
+        match_score=match_score,
+        campaign=campaign,
+        country=country,
+        min_score=min_score,
+        max_score=max_score,
+        match_mode=match_mode,
+        entered_status=entered_status,
+        entered_from=entered_from,
+        entered_to=entered_to
+    )
+    
+    docs = await db[COLLECTION_NAME].find(query, build_projection(view, fields)).to_list(length=None)
+    return await shape_documents(db, docs, view, fields)
+
+async def get_document_stats(db, **filters: Any) -> dict:
+    """
+    ספירות ל-dashboard (GET /cv/stats): לפי current_status, campaign, job_type, nationality
+    ו-bucket של match_score, על המסמכים שתואמים לפילטרים (אותם פרמטרים כמו search_documents_advanced)
+    התוצאה נשמרת ב-cache של cv_stats עד כתיבה הבאה או עד שפג ה-TTL
+    """
+    key = tuple(sorted((name, value) for name, value in filters.items() if value is not None))
+    cached = cv_stats.get_cached_stats(key)
+    if cached is not None:
+        return cached
+    
+    generation = cv_stats.current_generation()
+    query = await resolve_search_query(db, **filters)
+    results = await db[COLLECTION_NAME].aggregate(cv_stats.build_stats_pipeline(query)).to_list(length=1)
+    stats = cv_stats.shape_stats(results[0] if results else {})
+    stats["generated_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+    cv_stats.store_stats(key, generation, stats)
+    return stats
@@ -0,0 +1,141 @@
+"""
+Compressed storage for extracted CV text
+extracted_text is the largest field of a CV, so it lives in a side collection
+(_id = CV id) instead of the basicHR documents, and is loaded only for the
+full-detail view. List views and jobs never move it.
+"""
+import asyncio
+import re
+import zlib
+from typing import Dict, List, Optional
+
+from bson import Binary, ObjectId
+from pymongo import ReplaceOne
+
+from app.core.config import (
+    EXTRACTED_TEXT_COLLECTION_NAME,
+    EXTRACTED_TEXT_CODEC,
+    EXTRACTED_TEXT_COMPRESSION_LEVEL,
+    TEXT_SCAN_BATCH_SIZE
+)
+
+try:
+    import zstandard
+except ImportError:  # zstd אופציונלי - בלעדיו נשתמש ב-zlib
+    zstandard = None
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+
+
+def get_codec() -> str:
+    """ה-codec לכתיבה: EXTRACTED_TEXT_CODEC, או zlib אם zstandard לא מותקן"""
+    if EXTRACTED_TEXT_CODEC == CODEC_ZSTD and zstandard is not None:
+        return CODEC_ZSTD
+    return CODEC_ZLIB
+
+
+def compress_text(text: str) -> Dict:
+    """
+    דוחס טקסט לרשומה של ה-side collection
+
+    Returns:
+        {"codec", "data", "length"} - length הוא מספר התווים של הטקסט המקורי
+    """
+    raw = text.encode("utf-8")
+    codec = get_codec()
+    if codec == CODEC_ZSTD:
+        data = zstandard.ZstdCompressor(level=EXTRACTED_TEXT_COMPRESSION_LEVEL).compress(raw)
+    else:
+        data = zlib.compress(raw, min(EXTRACTED_TEXT_COMPRESSION_LEVEL, 9))
+    return {"codec": codec, "data": Binary(data), "length": len(text)}
+
+
+def decompress_text(record: Dict) -> str:
+    """
+    מחזיר את הטקסט מרשומה של ה-side collection (לפי ה-codec שנשמר ברשומה)
+
+    Raises:
+        RuntimeError: אם הרשומה דחוסה ב-zstd ו-zstandard לא מותקן
+    """
+    data = bytes(record["data"])
+    if record.get("codec") == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Extracted text is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+async def save_extracted_texts(db, texts: Dict[ObjectId, str]) -> None:
+    """
+    שומר (או מחליף) את הטקסט של מספר מסמכים בכתיבה אחת
+    טקסט ריק לא נשמר - מסמך בלי רשומה מוחזר כ-""
+
+    Args:
+        db: מסד הנתונים
+        texts: מיפוי ObjectId של ה-CV -> טקסט
+    """
+    items = [(document_id, text) for document_id, text in texts.items() if text]
+    if not items:
+        return
+    # הדחיסה היא CPU - רצה ב-thread
+    records = await asyncio.to_thread(lambda: [compress_text(text) for _, text in items])
+    await db[EXTRACTED_TEXT_COLLECTION_NAME].bulk_write([
+        ReplaceOne({"_id": document_id}, {"_id": document_id, **record}, upsert=True)
+        for (document_id, _), record in zip(items, records)
+    ], ordered=False)
+
+
+async def save_extracted_text(db, document_id: ObjectId, text: str) -> None:
+    """שומר את הטקסט של מסמך אחד (ראו save_extracted_texts)"""
+    await save_extracted_texts(db, {document_id: text})
+
+
+async def get_extracted_text(db, document_id: ObjectId) -> Optional[str]:
+    """
+    מחזיר את הטקסט של מסמך
+
+    Returns:
+        הטקסט, או None אם אין רשומה (טקסט ריק או מסמך שעוד לא עבר migration)
+    """
+    record = await db[EXTRACTED_TEXT_COLLECTION_NAME].find_one({"_id": document_id})
+    if not record:
+        return None
+    return decompress_text(record)
+
+
+async def delete_extracted_text(db, document_id: ObjectId) -> None:
+    """מוחק את הטקסט של מסמך (למשל כשהמסמך עצמו לא נשמר)"""
+    await db[EXTRACTED_TEXT_COLLECTION_NAME].delete_one({"_id": document_id})
+
+
+def compile_search_pattern(pattern: str) -> "re.Pattern":
+    """
+    regex לא תלוי רישיות כמו $regex עם "i" - ביטוי לא תקין מחופש כטקסט רגיל
+    """
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return re.compile(re.escape(pattern), re.IGNORECASE)
+
+
+def _match_batch(regex: "re.Pattern", records: List[Dict]) -> List[ObjectId]:
+    return [record["_id"] for record in records if regex.search(decompress_text(record))]
+
+
+async def find_ids_matching_text(db, pattern: str) -> List[ObjectId]:
+    """
+    מחזיר את ה-IDs של המסמכים שהטקסט שלהם מכיל את pattern
+    סורק ומפענח את ה-side collection ב-batches (הפענוח והחיפוש רצים ב-thread)
+    """
+    regex = compile_search_pattern(pattern)
+    matches: List[ObjectId] = []
+    batch: List[Dict] = []
+    async for record in db[EXTRACTED_TEXT_COLLECTION_NAME].find({}, {"codec": 1, "data": 1}):
+        batch.append(record)
+        if len(batch) >= TEXT_SCAN_BATCH_SIZE:
+            matches.extend(await asyncio.to_thread(_match_batch, regex, batch))
+            batch = []
+    if batch:
+        matches.extend(await asyncio.to_thread(_match_batch, regex, batch))
+    return matches
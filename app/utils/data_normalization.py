@@ -1,7 +1,55 @@
 """
 Data normalization utilities
+known_data is normalized once, when it is written (storage, for every storage backend);
+documents written before that are fixed by app.migrations.normalize_known_data.
+Reads return the stored document as-is.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+# שדות שתמיד קיימים ב-known_data (None אם אין ערך)
+REQUIRED_KNOWN_DATA_FIELDS = ["job_type", "match_score", "class_explain"]
+
+# כל השדות המוכרים של known_data - ה-backfill מחפש בהם ערכי "unknown"
+KNOWN_DATA_FIELDS = [
+    "name", "phone_number", "email", "campaign", "notes",
+    "latin_name", "hebrew_name", "age", "nationality", "can_travel_europe",
+    "can_visit_israel", "lives_in_europe", "native_israeli",
+    "english_level", "remembers_job_application", "skills_summary",
+    "job_type", "match_score", "class_explain", "recruit_note"
+]
+
+
+def normalize_value(value: Any) -> Any:
+    """"unknown" (any case) -> None, everything else unchanged"""
+    if isinstance(value, str) and value.lower() == "unknown":
+        return None
+    return value
+
+
+def normalize_known_data(known_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The known_data to store: "unknown" values -> None, REQUIRED_KNOWN_DATA_FIELDS present
+
+    Args:
+        known_data: known_data as received (may be None)
+
+    Returns:
+        A new dict - the argument is not modified
+    """
+    normalized = {key: normalize_value(value) for key, value in (known_data or {}).items()}
+    for field in REQUIRED_KNOWN_DATA_FIELDS:
+        normalized.setdefault(field, None)
+    return normalized
+
+
+def build_unnormalized_query() -> Dict[str, Any]:
+    """Mongo query for documents whose known_data was not normalized on write"""
+    conditions = [{f"known_data.{field}": {"$exists": False}} for field in REQUIRED_KNOWN_DATA_FIELDS]
+    conditions += [
+        {f"known_data.{field}": {"$regex": "^unknown$", "$options": "i"}}
+        for field in KNOWN_DATA_FIELDS
+    ]
+    return {"$or": conditions}
 
 
 def normalize_unknown_values(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -49,13 +97,13 @@ def normalize_document(doc: Dict[str, Any], required_fields: List[str] = None) -
     
     Args:
         doc: Document dictionary
-        required_fields: Optional list of required fields (default: job_type, match_score, class_explain)
+        required_fields: Optional list of required fields (default: REQUIRED_KNOWN_DATA_FIELDS)
         
     Returns:
         Normalized document
     """
     if required_fields is None:
-        required_fields = ["job_type", "match_score", "class_explain"]
+        required_fields = REQUIRED_KNOWN_DATA_FIELDS
     
     doc = normalize_unknown_values(doc)
     doc = ensure_required_fields(doc, required_fields)
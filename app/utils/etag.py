@@ -0,0 +1,55 @@
+"""
+ETag helpers for conditional GET (RFC 7232)
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+
+# התווים המותרים בתוך ETag (etagc) - בלי '"' ובלי רווחים
+_ETAG_CHARS = re.compile(r"^[\x21\x23-\x7e]*$")
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from the values the response depends on
+
+    Example: make_etag("cv", 7) -> '"cv-7"'. Long tags, and tags with characters
+    an ETag cannot carry, are hashed.
+    """
+    tag = "-".join(str(part) for part in parts)
+    if len(tag) > 64 or not _ETAG_CHARS.match(tag):
+        tag = hashlib.sha1(tag.encode("utf-8")).hexdigest()
+    return f'"{tag}"'
+
+
+def hash_params(params: Dict[str, Any]) -> str:
+    """
+    Short stable hash of the parameters a response depends on
+
+    None values are dropped and keys are sorted, so the same request spelled
+    differently (parameter order, an explicit default) gets the same hash.
+    """
+    normalized = {key: value for key, value in params.items() if value is not None}
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag
+
+    Weak comparison, as the RFC requires for If-None-Match: W/"x" matches "x".
+    "*" matches any existing representation.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
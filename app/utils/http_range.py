@@ -0,0 +1,51 @@
+"""
+HTTP Range header parsing (RFC 7233, single byte range)
+"""
+from typing import Optional, Tuple
+
+from app.core.exceptions import RangeNotSatisfiableError
+
+
+def parse_range_header(range_header: Optional[str], size_bytes: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte range
+
+    Only a single range is supported; multi-range or malformed headers are
+    ignored (the whole file is served, which the RFC allows).
+
+    Args:
+        range_header: Value of the Range header (e.g. "bytes=0-1023", "bytes=-500")
+        size_bytes: Size of the file
+
+    Returns:
+        (start, end), or None if the whole file should be served
+
+    Raises:
+        RangeNotSatisfiableError: If the range starts beyond the end of the file
+    """
+    if not range_header:
+        return None
+    unit, _, range_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in range_spec:
+        return None
+
+    start_text, sep, end_text = range_spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_text == "":
+            # suffix range - N הבתים האחרונים
+            suffix_length = int(end_text)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiableError(size_bytes)
+            return max(size_bytes - suffix_length, 0), size_bytes - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size_bytes - 1
+    except ValueError:
+        return None
+
+    if start >= size_bytes:
+        raise RangeNotSatisfiableError(size_bytes)
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size_bytes - 1)
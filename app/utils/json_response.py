@@ -0,0 +1,53 @@
+"""
+Fast JSON encoding for API responses (orjson)
+
+FastAPI sends returned dicts through jsonable_encoder, which walks and copies every
+value before stdlib json encodes it. For list responses that walk costs more than
+the Mongo read. FastJSONResponse encodes the storage-layer dicts directly:
+ObjectId -> str, datetime/date -> ISO 8601 (like jsonable_encoder).
+"""
+import datetime
+import json
+from typing import Any
+
+from bson import Decimal128, ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson אופציונלי - בלעדיו נשתמש ב-json של stdlib
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types the encoder doesn't know: BSON types, then whatever jsonable_encoder handles"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        # רק בנתיב של stdlib - orjson מקודד אותם בעצמו
+        return obj.isoformat()
+    return jsonable_encoder(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON (non-ASCII is not escaped)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with dumps_json
+
+    The app's default response class. Endpoints that return large lists return it
+    directly (FastJSONResponse(docs)) so FastAPI skips jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
@@ -0,0 +1,22 @@
+"""
+Newline-delimited JSON (application/x-ndjson) streaming
+"""
+from typing import Any, AsyncIterator
+
+from app.utils.json_response import dumps_json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: str) -> bool:
+    """True if the Accept header asks for NDJSON"""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept.lower()
+
+
+async def iter_ndjson(items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """
+    Encode items one JSON document per line, as they are produced
+    Uses the same encoding as the regular JSON responses (app.utils.json_response)
+    """
+    async for item in items:
+        yield dumps_json(item) + b"\n"
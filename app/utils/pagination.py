@@ -0,0 +1,31 @@
+"""
+Keyset pagination cursors
+The cursor is the _id of the last document of the previous page, encoded as an
+opaque URL-safe token so clients don't build queries on it.
+"""
+import base64
+import binascii
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.core.exceptions import InvalidCursorError
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    """Encode the _id of the last returned document as an `after` token"""
+    return base64.urlsafe_b64encode(last_id.binary).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> ObjectId:
+    """
+    Decode an `after` token back to an _id
+
+    Raises:
+        InvalidCursorError: If the token wasn't produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return ObjectId(raw)
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise InvalidCursorError(token)
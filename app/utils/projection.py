@@ -0,0 +1,127 @@
+"""
+Field projection for list and search endpoints
+view=summary returns the compact grid row (CVSummary), fields= returns only the
+requested paths. Both are turned into a Mongo projection so the database sends
+only what the response needs.
+"""
+import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.exceptions import ValidationError
+from app.utils.status_history import HISTORY_FIELD, expand_history
+
+VIEW_FULL = "full"
+VIEW_SUMMARY = "summary"
+VIEWS = (VIEW_FULL, VIEW_SUMMARY)
+
+# שדה ב-CVSummary -> הנתיב שלו במסמך
+SUMMARY_FIELDS = {
+    "name": "known_data.name",
+    "latin_name": "known_data.latin_name",
+    "hebrew_name": "known_data.hebrew_name",
+    "email": "known_data.email",
+    "phone_number": "known_data.phone_number",
+    "campaign": "known_data.campaign",
+    "job_type": "known_data.job_type",
+    "match_score": "known_data.match_score",
+    "current_status": "current_status",
+    "filename": "file_metadata.filename",
+    "uploaded_at": "file_metadata.uploaded_at",
+}
+
+# extracted_text לא נשמר במסמך (text_store) - זמין רק ב-GET /cv/{id}
+# search_keys הוא shadow field פנימי (app/utils/search_keys.py), updated_at משמש רק את ה-ETag של הרשימות
+_NOT_PROJECTABLE = {"extracted_text", "search_keys", "updated_at"}
+# התצוגה המלאה - בלי השדות הפנימיים
+FULL_PROJECTION = {"extracted_text": 0, "search_keys": 0, "updated_at": 0}
+_FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse the fields= query parameter ("known_data.name,current_status")
+
+    Returns:
+        List of dotted paths, or None if no fields were requested
+
+    Raises:
+        ValidationError: If a path is malformed or not available in list views
+    """
+    if not fields:
+        return None
+    paths = []
+    for path in (part.strip() for part in fields.split(",")):
+        if not path or path == "id":
+            continue
+        if not _FIELD_PATH.match(path):
+            raise ValidationError(f"שדה לא תקין ב-fields: '{path}'")
+        if path.split(".")[0] in _NOT_PROJECTABLE:
+            raise ValidationError(f"השדה '{path}' לא זמין ב-fields")
+        paths.append(path)
+    return paths
+
+
+def validate_view(view: str) -> str:
+    """
+    Raises:
+        ValidationError: If view is not one of VIEWS
+    """
+    if view not in VIEWS:
+        raise ValidationError(f"ערך לא תקף ל-view: '{view}'. הערכים התקפים: {', '.join(VIEWS)}")
+    return view
+
+
+def build_projection(view: str = VIEW_FULL, fields: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Build the Mongo projection for a list query
+
+    fields wins over view. A path whose parent is also requested is dropped,
+    since Mongo rejects overlapping paths in one projection.
+    """
+    if fields:
+        # entry ב-status_history נשמר מקודד - מפוענח רק כשלם
+        paths = sorted({HISTORY_FIELD if path.startswith(HISTORY_FIELD + ".") else path for path in fields})
+        kept = [
+            path for path in paths
+            if not any(path.startswith(parent + ".") for parent in paths)
+        ]
+        return {path: 1 for path in kept}
+    if view == VIEW_SUMMARY:
+        return {path: 1 for path in SUMMARY_FIELDS.values()}
+    return dict(FULL_PROJECTION)
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def shape_document(
+    doc: Dict[str, Any],
+    view: str = VIEW_FULL,
+    fields: Optional[List[str]] = None,
+    webhook_bodies: Optional[Dict[Tuple[int, datetime.datetime], str]] = None
+) -> Dict[str, Any]:
+    """
+    Turn a projected Mongo document into the API shape
+
+    - fields: the projected paths as-is, plus id
+    - summary: a flat CVSummary dict
+    - full: the document as stored, plus id, with status_history expanded
+      (webhook_bodies: the document's webhook response texts, see expand_history)
+
+    known_data is normalized when it is written (app.utils.data_normalization),
+    so nothing here walks its values.
+    """
+    doc["id"] = str(doc.pop("_id"))
+    if view == VIEW_SUMMARY and not fields:
+        summary = {"id": doc["id"]}
+        for name, path in SUMMARY_FIELDS.items():
+            summary[name] = _get_path(doc, path)
+        return summary
+    return expand_history(doc, webhook_bodies)
@@ -0,0 +1,198 @@
+"""
+Mongo query and projection evaluation in Python
+The in-memory storage backend (app.repositories.memory) runs the same query
+dicts the storage layer builds for Mongo (build_list_query, build_status_query,
+build_search_query, build_entered_query) through match_query, so both backends
+select documents the same way. Only the operators those builders emit are
+supported; anything else raises ValueError instead of silently not matching.
+"""
+import datetime
+import functools
+import re
+from typing import Any, Dict, List, Union
+
+from bson import ObjectId
+
+_REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+
+
+def copy_value(value: Any) -> Any:
+    """עותק של dicts ו-lists (שאר הערכים לא משתנים) - מהיר מ-deepcopy למסמכים של ה-storage"""
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    return value
+
+
+def _values(value: Any, parts: List[str]) -> List[Any]:
+    """הערכים בנתיב (dotted path) - שדה חסר מחזיר רשימה ריקה, מערך של sub-documents נפתח"""
+    if not parts:
+        return [value]
+    if isinstance(value, dict):
+        if parts[0] not in value:
+            return []
+        return _values(value[parts[0]], parts[1:])
+    if isinstance(value, list):
+        return [found for item in value if isinstance(item, dict) for found in _values(item, parts)]
+    return []
+
+
+def _candidates(values: List[Any]) -> List[Any]:
+    """כמו ב-Mongo: ערך שהוא מערך מתאים גם לפי כל אחד מהאיברים שלו"""
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _equals(values: List[Any], expected: Any) -> bool:
+    if not values:
+        # {field: None} מתאים גם לשדה חסר
+        return expected is None
+    return any(candidate == expected for candidate in _candidates(values))
+
+
+def _in_set(values: List[Any], operand: Union[set, frozenset]) -> bool:
+    """$in מול set (רשימות IDs גדולות מה-backend בזיכרון) - חיפוש ב-hash במקום מעבר על כל הרשימה"""
+    for candidate in _candidates(values):
+        try:
+            if candidate in operand:
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def _type_bracket(value: Any) -> Any:
+    if isinstance(value, bool):
+        return bool
+    if isinstance(value, (int, float)):
+        return float
+    if isinstance(value, (str, datetime.datetime, ObjectId)):
+        return type(value)
+    return None
+
+
+def _compare(values: List[Any], operator: str, bound: Any) -> bool:
+    """$gt/$gte/$lt/$lte - רק בין ערכים מאותו סוג (מספר לא משווה למחרוזת או ל-null)"""
+    bracket = _type_bracket(bound)
+    for candidate in _candidates(values):
+        if bracket is None or _type_bracket(candidate) is not bracket:
+            continue
+        if operator == "$gt" and candidate > bound:
+            return True
+        if operator == "$gte" and candidate >= bound:
+            return True
+        if operator == "$lt" and candidate < bound:
+            return True
+        if operator == "$lte" and candidate <= bound:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str, options: str) -> "re.Pattern":
+    flags = 0
+    for option in options:
+        flags |= _REGEX_FLAGS[option]
+    return re.compile(pattern, flags)
+
+
+def _regex(values: List[Any], pattern: str, options: str = "") -> bool:
+    regex = _compile(pattern, options)
+    return any(isinstance(candidate, str) and regex.search(candidate) for candidate in _candidates(values))
+
+
+def _match_condition(values: List[Any], condition: Any) -> bool:
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return _equals(values, condition)
+    for operator, operand in condition.items():
+        if operator == "$options":
+            continue
+        if operator == "$ne":
+            matched = not _equals(values, operand)
+        elif operator == "$exists":
+            matched = bool(values) == bool(operand)
+        elif operator == "$in" and isinstance(operand, (set, frozenset)):
+            matched = _in_set(values, operand)
+        elif operator == "$in":
+            matched = any(_equals(values, item) for item in operand)
+        elif operator == "$nin":
+            matched = not any(_equals(values, item) for item in operand)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            matched = _compare(values, operator, operand)
+        elif operator == "$regex":
+            matched = _regex(values, operand, condition.get("$options", ""))
+        else:
+            raise ValueError(f"Unsupported query operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def match_query(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """True אם המסמך מתאים ל-query (אותה סמנטיקה כמו find ב-Mongo, לאופרטורים הנתמכים)"""
+    for key, condition in query.items():
+        if key == "$and":
+            matched = all(match_query(doc, part) for part in condition)
+        elif key == "$or":
+            matched = any(match_query(doc, part) for part in condition)
+        elif key == "$nor":
+            matched = not any(match_query(doc, part) for part in condition)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported query operator: {key}")
+        else:
+            matched = _match_condition(_values(doc, key.split(".")), condition)
+        if not matched:
+            return False
+    return True
+
+
+def set_path(doc: Dict[str, Any], path: str, value: Any) -> None:
+    """$set על נתיב עם נקודות (יוצר sub-documents חסרים)"""
+    parts = path.split(".")
+    for key in parts[:-1]:
+        child = doc.get(key)
+        if not isinstance(child, dict):
+            child = doc[key] = {}
+        doc = child
+    doc[parts[-1]] = value
+
+
+def unset_path(doc: Dict[str, Any], path: str) -> None:
+    """$unset על נתיב עם נקודות"""
+    parts = path.split(".")
+    for key in parts[:-1]:
+        doc = doc.get(key)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def apply_projection(doc: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+    """
+    עותק של המסמך לפי projection של Mongo (inclusion או exclusion, נתיבים עם נקודות)
+    _id נכלל תמיד אלא אם {"_id": 0}
+    """
+    included = [path for path, flag in projection.items() if flag and path != "_id"]
+    if not included:
+        result = copy_value(doc)
+        for path, flag in projection.items():
+            if not flag:
+                unset_path(result, path)
+        return result
+    result: Dict[str, Any] = {}
+    if projection.get("_id", 1) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for path in included:
+        value: Any = doc
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            set_path(result, path, copy_value(value))
+    return result
@@ -0,0 +1,153 @@
+"""
+Typed shadow fields for indexed filters
+known_data keeps the values exactly as they were sent (match_score is a string).
+search_keys holds the same values in a form Mongo can index and range-query, and
+is rewritten from known_data on every write. search_keys.v records which version
+of build_search_keys produced it, so a backfill can find stale documents.
+
+Filter fields (campaign, nationality, job_type) are stored trimmed and casefolded,
+so exact and prefix filters are plain equality / anchored-regex index seeks.
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.constants import MATCH_SCORE_RANGES
+from app.core.exceptions import ValidationError
+
+SEARCH_KEYS_FIELD = "search_keys"
+# להעלות בכל שינוי ב-build_search_keys - ה-backfill מעדכן מסמכים עם גרסה אחרת
+SEARCH_KEYS_VERSION = 2
+
+# שדות known_data שנשמרים מנורמלים ב-search_keys (אותו שם)
+FILTER_FIELDS = ("campaign", "nationality", "job_type")
+
+MATCH_MODE_EXACT = "exact"
+MATCH_MODE_PREFIX = "prefix"
+MATCH_MODES = (MATCH_MODE_EXACT, MATCH_MODE_PREFIX)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def parse_match_score(value: Any) -> Optional[float]:
+    """
+    Convert a stored match_score ("85", "85.5", "85%", 85) to a number
+
+    Returns:
+        The score, or None if it is missing or not numeric
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        text = str(value).strip().rstrip("%").strip()
+        try:
+            score = float(text)
+        except ValueError:
+            return None
+    return score if math.isfinite(score) else None
+
+
+def build_search_keys(known_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the search_keys sub-document from the full known_data
+
+    A key without a usable value is left out (not stored as null), so range
+    queries and the index only see documents that have one.
+    """
+    known_data = known_data or {}
+    keys: Dict[str, Any] = {"v": SEARCH_KEYS_VERSION}
+    match_score = parse_match_score(known_data.get("match_score"))
+    if match_score is not None:
+        keys["match_score"] = match_score
+    for field in FILTER_FIELDS:
+        value = normalize_filter_value(known_data.get(field))
+        if value:
+            keys[field] = value
+    return keys
+
+
+def build_search_key_updates(known_data_updates: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    The search_keys change for a partial known_data update, as dotted paths
+
+    Every key is derived from its own known_data field only, so a dotted-path
+    update does not need the rest of the document. search_keys.v is left as
+    is: a document the backfill has not reached yet stays selectable by it.
+
+    Returns:
+        (paths to $set, paths to remove)
+    """
+    keys = build_search_keys(known_data_updates)
+    to_set: Dict[str, Any] = {}
+    to_unset: List[str] = []
+    for field in ("match_score",) + FILTER_FIELDS:
+        if field not in known_data_updates:
+            continue
+        path = f"{SEARCH_KEYS_FIELD}.{field}"
+        if field in keys:
+            to_set[path] = keys[field]
+        else:
+            to_unset.append(path)
+    return to_set, to_unset
+
+
+def normalize_filter_value(value: Any) -> Optional[str]:
+    """
+    Normalize a filter field for storage and for lookups: trimmed, inner
+    whitespace collapsed, casefolded ("  Summer  2025 " -> "summer 2025")
+
+    Returns:
+        The normalized string, or None for missing / "unknown" values
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    text = _WHITESPACE.sub(" ", str(value)).strip().casefold()
+    if not text or text == "unknown":
+        return None
+    return text
+
+
+def validate_match_mode(match_mode: str) -> str:
+    """
+    Raises:
+        ValidationError: If match_mode is not one of MATCH_MODES
+    """
+    if match_mode not in MATCH_MODES:
+        raise ValidationError(f"ערך לא תקף ל-match_mode: '{match_mode}'. הערכים התקפים: {', '.join(MATCH_MODES)}")
+    return match_mode
+
+
+def build_filter_condition(value: str, match_mode: str = MATCH_MODE_PREFIX) -> Any:
+    """
+    Condition on a search_keys filter field: equality for exact, an anchored
+    case-sensitive regex for prefix (the value is already casefolded, and Mongo
+    turns "^literal" into index bounds - a case-insensitive regex could not)
+    """
+    normalized = normalize_filter_value(value) or ""
+    if match_mode == MATCH_MODE_EXACT:
+        return normalized
+    return {"$regex": "^" + re.escape(normalized)}
+
+
+def parse_match_score_range(value: str) -> Dict[str, float]:
+    """
+    Turn a match_score filter into a range on search_keys.match_score
+
+    Accepts one of the named buckets in MATCH_SCORE_RANGES, or an arbitrary
+    inclusive "min-max" range ("75-85", "72.5-100").
+
+    Raises:
+        ValidationError: If the value is neither
+    """
+    if value in MATCH_SCORE_RANGES:
+        return dict(MATCH_SCORE_RANGES[value])
+    low, sep, high = value.partition("-")
+    low_score, high_score = parse_match_score(low), parse_match_score(high)
+    if not sep or low_score is None or high_score is None or low_score > high_score:
+        raise ValidationError(
+            f"ערך לא תקף ל-match_score: '{value}'. "
+            f"הערכים התקפים: {', '.join(repr(k) for k in MATCH_SCORE_RANGES)}, 'all match_score' או טווח 'min-max'"
+        )
+    return {"$gte": low_score, "$lte": high_score}
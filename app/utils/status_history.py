@@ -0,0 +1,229 @@
+"""
+Compact status_history encoding
+Each entry is stored as {"c": code, "t": datetime, "d": detail} instead of
+{"status": "...", "timestamp": "...Z"}: the code is an int (HISTORY_CODE_* and
+STATUS_ID_MAP), the time is a BSON datetime, so "entered status X between T1
+and T2" is an index range. Webhook response bodies are not kept in the entry -
+they are stored on the entry's record in the history archive (app.services.status_history_store).
+Reads expand entries back to {"status", "timestamp"}, with the bodies joined in.
+The document keeps only the last entries; the full history is in
+STATUS_HISTORY_COLLECTION_NAME (app.services.status_history_store).
+"""
+import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.constants import (
+    STATUS_TO_ID_MAP,
+    STATUS_PROCESSING_SUCCESS,
+    STATUS_PROCESSING_FAILED,
+    STATUS_PROCESSING_ERROR,
+    STATUS_WEBHOOK_PREFIX,
+    STATUS_WEBHOOK_ERROR,
+    HISTORY_CODE_OTHER,
+    HISTORY_CODE_PROCESSING_SUCCESS,
+    HISTORY_CODE_PROCESSING_FAILED,
+    HISTORY_CODE_PROCESSING_ERROR,
+    HISTORY_CODE_WEBHOOK_ERROR,
+    HISTORY_CODE_WEBHOOK_STATUS_BASE,
+)
+from app.core.exceptions import ValidationError
+
+HISTORY_FIELD = "status_history"
+CODE_KEY = "c"
+TIME_KEY = "t"
+DETAIL_KEY = "d"
+
+# סטטוסים בלי פירוט
+_CODES = {
+    **STATUS_TO_ID_MAP,
+    STATUS_PROCESSING_SUCCESS: HISTORY_CODE_PROCESSING_SUCCESS,
+    STATUS_PROCESSING_FAILED: HISTORY_CODE_PROCESSING_FAILED,
+}
+_NAMES = {code: name for name, code in _CODES.items()}
+# סטטוסים עם פירוט אחרי ": " (get_processing_error_status / get_webhook_error_status)
+_DETAIL_PREFIXES = {
+    STATUS_PROCESSING_ERROR: HISTORY_CODE_PROCESSING_ERROR,
+    STATUS_WEBHOOK_ERROR: HISTORY_CODE_WEBHOOK_ERROR,
+}
+_DETAIL_NAMES = {code: name for name, code in _DETAIL_PREFIXES.items()}
+# get_webhook_status: webhook_status_200 / webhook_status_200: <response text>
+_WEBHOOK_STATUS = re.compile(rf"^{STATUS_WEBHOOK_PREFIX}_(\d{{3}})(?:: (.*))?$", re.DOTALL)
+
+
+def history_now() -> datetime.datetime:
+    """UTC now at millisecond precision (what BSON stores), so entries compare equal after a round trip"""
+    now = datetime.datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def to_utc(value: datetime.datetime) -> datetime.datetime:
+    """Naive UTC datetime (like the stored ones) from a naive or aware datetime"""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_entry(status: str, timestamp: Optional[datetime.datetime] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Encode a status string as a compact history entry
+
+    Returns:
+        (entry, webhook_body) - webhook_body is the response text of a webhook_status_<code>
+        status, to be stored separately (None for every other status)
+    """
+    entry: Dict[str, Any] = {CODE_KEY: HISTORY_CODE_OTHER, TIME_KEY: timestamp or history_now()}
+    if status in _CODES:
+        entry[CODE_KEY] = _CODES[status]
+        return entry, None
+    webhook = _WEBHOOK_STATUS.match(status)
+    if webhook:
+        entry[CODE_KEY] = HISTORY_CODE_WEBHOOK_STATUS_BASE + int(webhook.group(1))
+        return entry, webhook.group(2)
+    prefix, _, detail = status.partition(": ")
+    if prefix in _DETAIL_PREFIXES:
+        entry[CODE_KEY] = _DETAIL_PREFIXES[prefix]
+        entry[DETAIL_KEY] = detail
+        return entry, None
+    entry[DETAIL_KEY] = status
+    return entry, None
+
+
+def build_entry(status: str, timestamp: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """encode_entry for statuses that have no webhook body"""
+    return encode_entry(status, timestamp)[0]
+
+
+def history_code(status: str) -> Optional[int]:
+    """The code of a status without detail (main and processing statuses), or None"""
+    return _CODES.get(status)
+
+
+def decode_entry(entry: Dict[str, Any], webhook_body: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Expand a stored entry to {"status", "timestamp"} (the API shape)
+    Entries written before the compact encoding are returned as they are.
+    """
+    if CODE_KEY not in entry:
+        return entry
+    code = entry[CODE_KEY]
+    detail = entry.get(DETAIL_KEY)
+    if code in _NAMES:
+        status = _NAMES[code]
+    elif code in _DETAIL_NAMES:
+        status = f"{_DETAIL_NAMES[code]}: {detail}" if detail is not None else _DETAIL_NAMES[code]
+    elif code >= HISTORY_CODE_WEBHOOK_STATUS_BASE:
+        status = f"{STATUS_WEBHOOK_PREFIX}_{code - HISTORY_CODE_WEBHOOK_STATUS_BASE}"
+        if webhook_body:
+            status += f": {webhook_body}"
+    else:
+        status = detail or ""
+    timestamp = entry.get(TIME_KEY)
+    if isinstance(timestamp, datetime.datetime):
+        timestamp = to_utc(timestamp).isoformat(timespec="milliseconds") + "Z"
+    return {"status": status, "timestamp": timestamp}
+
+
+def has_webhook_entries(doc: Dict[str, Any]) -> bool:
+    """True if the projected status_history has webhook_status entries (whose body is stored separately)"""
+    history = doc.get(HISTORY_FIELD)
+    return isinstance(history, list) and any(
+        isinstance(entry.get(CODE_KEY), int) and entry[CODE_KEY] >= HISTORY_CODE_WEBHOOK_STATUS_BASE
+        for entry in history
+    )
+
+
+def expand_history(doc: Dict[str, Any], webhook_bodies: Optional[Dict[Tuple[int, datetime.datetime], str]] = None) -> Dict[str, Any]:
+    """
+    Expand doc["status_history"] in place (if it was projected)
+
+    Args:
+        webhook_bodies: (code, time) -> response text, from get_webhook_responses.
+                        Without it webhook entries expand to "webhook_status_<code>".
+    """
+    history = doc.get(HISTORY_FIELD)
+    if isinstance(history, list):
+        webhook_bodies = webhook_bodies or {}
+        doc[HISTORY_FIELD] = [
+            decode_entry(entry, webhook_bodies.get((entry.get(CODE_KEY), entry.get(TIME_KEY))))
+            for entry in history
+        ]
+    return doc
+
+
+def build_entered_query(
+    status: str,
+    entered_from: Optional[datetime.datetime] = None,
+    entered_to: Optional[datetime.datetime] = None
+) -> Dict[str, Any]:
+    """
+    Query on the history archive (app.services.status_history_store): entries of
+    status with from <= t < to. Runs on the archive and not on the document, since
+    the document keeps only the last entries - served by status_history_entered (c, t, cv_id).
+    """
+    query: Dict[str, Any] = {CODE_KEY: history_code(status)}
+    time_range = {}
+    if entered_from is not None:
+        time_range["$gte"] = to_utc(entered_from)
+    if entered_to is not None:
+        time_range["$lt"] = to_utc(entered_to)
+    if time_range:
+        query[TIME_KEY] = time_range
+    return query
+
+
+def validate_entered_range(
+    status: Optional[str],
+    entered_from: Optional[datetime.datetime],
+    entered_to: Optional[datetime.datetime]
+) -> None:
+    """
+    Raises:
+        ValidationError: If the status has no history code, a time bound is given
+                         without a status, or the range is empty
+    """
+    if not status:
+        if entered_from is not None or entered_to is not None:
+            raise ValidationError("entered_from / entered_to דורשים entered_status")
+        return
+    if history_code(status) is None:
+        raise ValidationError(f"ערך לא תקף ל-entered_status: '{status}'")
+    if entered_from is not None and entered_to is not None and to_utc(entered_from) >= to_utc(entered_to):
+        raise ValidationError("entered_from חייב להיות לפני entered_to")
+
+
+def legacy_entry_time(timestamp: Any) -> Optional[datetime.datetime]:
+    """The datetime of a legacy ISO timestamp string ("...Z"), or None if it can't be parsed"""
+    if isinstance(timestamp, datetime.datetime):
+        return to_utc(timestamp)
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return to_utc(datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def compact_legacy_history(history: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+    """
+    Encode the legacy entries of a history list (used by the migration)
+
+    Returns:
+        (history, webhook_bodies) - webhook_bodies is (entry, body) for every webhook entry with a response text
+    """
+    compacted, bodies = [], []
+    for entry in history:
+        if CODE_KEY in entry or "status" not in entry:
+            compacted.append(entry)
+            continue
+        timestamp = legacy_entry_time(entry.get("timestamp"))
+        if timestamp is not None:
+            # כמו ב-BSON - דיוק של מילישניות
+            timestamp = timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+        new_entry, body = encode_entry(str(entry["status"]), timestamp)
+        if timestamp is None:
+            new_entry[TIME_KEY] = None
+        compacted.append(new_entry)
+        if body:
+            bodies.append((new_entry, body))
+    return compacted, bodies
@@ -0,0 +1,280 @@
+"""
+Streaming upload utilities
+Uploads are read in chunks into a spooled buffer with a hard size cap, while the
+SHA-256 and size are computed incrementally - memory per upload stays bounded.
+The request body itself is capped while it is received (UploadSizeLimitMiddleware),
+before the framework spools the multipart form.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from starlette.responses import JSONResponse
+
+from app.core.config import (
+    MAX_UPLOAD_BYTES, UPLOAD_SPOOL_MAX_MEMORY_BYTES, UPLOAD_CHUNK_SIZE, UPLOAD_REQUEST_OVERHEAD_BYTES
+)
+from app.core.exceptions import TooManyFilesError, UploadTooLargeError
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that caps the request body of the upload endpoints
+
+    FastAPI parses the whole multipart form (spooling every file) before the
+    endpoint runs, so a cap applied only in the endpoint comes after the body was
+    received. Here a Content-Length above the cap is answered with 413 without
+    reading the body, and a body without Content-Length (chunked) is cut off with
+    413 as soon as it crosses the cap.
+    """
+
+    def __init__(self, app, limits: Dict[str, int], overhead_bytes: int = UPLOAD_REQUEST_OVERHEAD_BYTES):
+        """
+        Args:
+            app: The wrapped ASGI app
+            limits: Path -> maximum upload size in bytes (the body may add overhead_bytes of form fields)
+            overhead_bytes: Allowance for the multipart boundaries and the other form fields
+        """
+        self.app = app
+        self.limits = limits
+        self.overhead_bytes = overhead_bytes
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+        max_body_bytes = max_bytes + self.overhead_bytes
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_body_bytes:
+            error = UploadTooLargeError(max_bytes)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    # HTTPException - עובר את ה-parsing של הטופס ומטופל כמו כל 413
+                    raise UploadTooLargeError(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class SpooledUpload:
+    """
+    Upload buffer kept in memory up to a threshold, then moved to a named temp file
+
+    Unlike tempfile.SpooledTemporaryFile the on-disk file has a path, so it can be
+    handed to an extraction worker process without copying the bytes.
+    """
+
+    def __init__(self, max_memory_bytes: int = UPLOAD_SPOOL_MAX_MEMORY_BYTES):
+        """
+        Initialize upload buffer
+
+        Args:
+            max_memory_bytes: Size above which the upload is moved to disk
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.size_bytes = 0
+        self._hash = hashlib.sha256()
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+
+    @property
+    def sha256(self) -> str:
+        """SHA-256 (hex) of everything written so far"""
+        return self._hash.hexdigest()
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the temp file, or None while the upload is still in memory"""
+        return self._file.name if self._file is not None else None
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, rolling over to disk when the memory threshold is crossed"""
+        self._hash.update(chunk)
+        self.size_bytes += len(chunk)
+        if self._file is None and self.size_bytes > self.max_memory_bytes:
+            self._rollover()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def _rollover(self) -> None:
+        self._file = tempfile.NamedTemporaryFile(prefix="cv-upload-", suffix=".pdf", delete=False)
+        self._file.write(self._buffer.getbuffer())
+        self._buffer.close()
+        self._buffer = None
+
+    def extraction_source(self) -> Union[bytes, str]:
+        """
+        Get the upload in the form the PDF extractor accepts
+
+        Returns:
+            Path of the temp file if spooled to disk, otherwise the (small) bytes
+        """
+        if self._file is not None:
+            self._file.flush()
+            return self._file.name
+        return self._buffer.getvalue()
+
+    def open(self):
+        """
+        Open the upload for reading from the start
+
+        Returns:
+            Binary file object (caller is responsible for closing it)
+        """
+        if self._file is not None:
+            self._file.flush()
+            return open(self._file.name, "rb")
+        return io.BytesIO(self._buffer.getbuffer())
+
+    def persist(self, path: str) -> None:
+        """
+        Move the upload to a permanent path (the temp file is moved, not copied)
+
+        The file appears at path atomically, so directory scanners never see a partial file.
+        After this call the upload no longer owns the file and close() won't delete it.
+        """
+        staging_path = path + ".partial"
+        if self._file is not None:
+            self._file.close()
+            shutil.move(self._file.name, staging_path)
+            self._file = None
+        else:
+            with open(staging_path, "wb") as f:
+                f.write(self._buffer.getbuffer())
+        os.replace(staging_path, path)
+
+    def close(self) -> None:
+        """Release the buffer and delete the temp file"""
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+            self._file = None
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def spool_upload(
+    file,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    max_memory_bytes: int = UPLOAD_SPOOL_MAX_MEMORY_BYTES
+) -> SpooledUpload:
+    """
+    Copy an UploadFile into a SpooledUpload in chunks, computing the SHA-256 and size
+
+    The framework has already received the request body by the time this runs
+    (the request-level cap is UploadSizeLimitMiddleware); max_bytes is the cap
+    per file, which also applies to each file of a batch.
+
+    Args:
+        file: FastAPI UploadFile
+        max_bytes: Hard size cap
+        chunk_size: Read size per chunk
+        max_memory_bytes: Size above which the upload is moved to disk
+
+    Returns:
+        SpooledUpload with sha256 and size_bytes computed
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_bytes
+    """
+    upload = SpooledUpload(max_memory_bytes)
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if upload.size_bytes + len(chunk) > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            upload.write(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+def spool_zip_members(
+    archive: BinaryIO,
+    max_member_bytes: int = MAX_UPLOAD_BYTES,
+    max_members: Optional[int] = None,
+    max_memory_bytes: int = UPLOAD_SPOOL_MAX_MEMORY_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> List[Tuple[str, Optional[SpooledUpload], Optional[str]]]:
+    """
+    Spool every PDF in a zip archive into its own SpooledUpload
+
+    Blocking (decompression is CPU-bound) - run it in a thread.
+    The size cap is enforced on decompressed bytes, so zip bombs are cut off.
+
+    Args:
+        archive: Seekable binary file containing the zip
+        max_member_bytes: Hard size cap per member
+        max_members: Maximum number of PDFs the archive may contain
+        max_memory_bytes: Size above which a member is moved to disk
+        chunk_size: Read size per chunk
+
+    Returns:
+        List of (filename, upload, error) - upload is None when error is set
+
+    Raises:
+        zipfile.BadZipFile: If the archive is not a valid zip
+        TooManyFilesError: If the archive contains more than max_members PDFs (checked before any is read)
+    """
+    members = []
+    with zipfile.ZipFile(archive) as zf:
+        infos = [
+            info for info in zf.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/") and info.filename.lower().endswith(".pdf")
+        ]
+        if max_members is not None and len(infos) > max_members:
+            raise TooManyFilesError(max_members)
+        for info in infos:
+            name = info.filename
+            upload = SpooledUpload(max_memory_bytes)
+            try:
+                with zf.open(info) as member:
+                    while True:
+                        chunk = member.read(chunk_size)
+                        if not chunk:
+                            break
+                        if upload.size_bytes + len(chunk) > max_member_bytes:
+                            raise UploadTooLargeError(max_member_bytes)
+                        upload.write(chunk)
+            except UploadTooLargeError as e:
+                upload.close()
+                members.append((name, None, e.detail))
+                continue
+            except Exception as e:
+                upload.close()
+                members.append((name, None, f"cannot read from archive: {str(e)}"))
+                continue
+            members.append((name, upload, None))
+    return members
@@ -0,0 +1 @@
+"""Benchmarks for the CV backend (run with python -m benchmarks.<module>)"""
@@ -0,0 +1,333 @@
+"""
+Benchmark for the PDF extraction path (app.services.pdf_parser)
+
+Runs the synthetic corpus from benchmarks.pdf_corpus through
+extract_text_from_pdf and reports, per corpus case:
+
+- latency percentiles per document (single process, sequential)
+- peak Python memory per document (tracemalloc) and peak RSS
+- throughput per core through a process pool (like the API's extraction pool)
+
+Results are written to a JSON file; --compare prints the change against a
+previous result file.
+
+Usage:
+    python -m benchmarks.extraction_bench
+    python -m benchmarks.extraction_bench --workers 4 --repeat 5 --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import PDF_MAX_PAGES, PDF_EXTRACTION_TIMEOUT_SECONDS
+from app.services.pdf_parser import extract_text_from_pdf, extract_text_from_file
+from benchmarks.pdf_corpus import generate_corpus
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS_DIR = os.path.join(BENCHMARKS_DIR, "corpus")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+# הפרש (באחוזים) שמעליו השוואה מסומנת כשיפור/הרעה
+COMPARE_THRESHOLD_PERCENT = 5.0
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Percentile with linear interpolation between the closest ranks"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * percent / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _summarize_ms(samples: List[float]) -> Dict[str, float]:
+    values = sorted(sample * 1000 for sample in samples)
+    return {
+        "p50": round(_percentile(values, 50), 3),
+        "p90": round(_percentile(values, 90), 3),
+        "p99": round(_percentile(values, 99), 3),
+        "mean": round(sum(values) / len(values), 3),
+        "min": round(values[0], 3),
+        "max": round(values[-1], 3)
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss ב-KB בלינוקס וב-bytes ב-macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _manifest_digest(manifest: Dict) -> str:
+    """Digest of the corpus contents - comparisons are only meaningful on the same corpus"""
+    digest = hashlib.sha256()
+    for doc in manifest["documents"]:
+        digest.update(doc["sha256"].encode())
+    return digest.hexdigest()[:16]
+
+
+def load_corpus(corpus_dir: str, docs_per_case: int, seed: int) -> Dict:
+    """Load the corpus manifest, generating the corpus first if it doesn't exist"""
+    manifest_path = os.path.join(corpus_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        print(f"Generating corpus in {corpus_dir} ...")
+        return generate_corpus(corpus_dir, docs_per_case, seed)
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def run_latency(corpus_dir: str, documents: List[Dict], repeat: int, max_pages: int, timeout: Optional[float]) -> Dict:
+    """Sequential extraction of every document, repeat times - samples per case"""
+    samples: Dict[str, List[float]] = {}
+    chars: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    for doc in documents:
+        with open(os.path.join(corpus_dir, doc["file"]), "rb") as f:
+            pdf_bytes = f.read()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text, error = extract_text_from_pdf(pdf_bytes, max_pages, timeout)
+            samples.setdefault(doc["case"], []).append(time.perf_counter() - start)
+        chars[doc["case"]] = chars.get(doc["case"], 0) + len(text)
+        errors[doc["case"]] = errors.get(doc["case"], 0) + (1 if error else 0)
+    return {"samples": samples, "chars": chars, "errors": errors}
+
+
+def run_memory(corpus_dir: str, documents: List[Dict], max_pages: int, timeout: Optional[float]) -> Dict[str, float]:
+    """Peak traced Python memory (MB) per document, max per case"""
+    peaks: Dict[str, float] = {}
+    tracemalloc.start()
+    try:
+        for doc in documents:
+            with open(os.path.join(corpus_dir, doc["file"]), "rb") as f:
+                pdf_bytes = f.read()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            extract_text_from_pdf(pdf_bytes, max_pages, timeout)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_mb = (peak - baseline) / (1024 * 1024)
+            peaks[doc["case"]] = round(max(peaks.get(doc["case"], 0.0), peak_mb), 2)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def _init_worker():
+    import pdfminer.high_level  # noqa: F401
+
+
+def _extract_in_worker(path: str, max_pages: int, timeout: Optional[float]) -> Tuple[int, float]:
+    text, _ = extract_text_from_file(path, max_pages, timeout)
+    return len(text), _peak_rss_mb()
+
+
+def run_throughput(
+    corpus_dir: str,
+    documents: List[Dict],
+    workers: int,
+    repeat: int,
+    max_pages: int,
+    timeout: Optional[float]
+) -> Dict:
+    """The whole corpus through a warmed-up process pool (spawn, like the API)"""
+    paths = [os.path.join(corpus_dir, doc["file"]) for doc in documents] * repeat
+    pages = sum(doc["pages"] for doc in documents) * repeat
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker
+    ) as executor:
+        # חימום - כל ה-workers עולים לפני המדידה
+        list(executor.map(_extract_in_worker, paths[:workers], [max_pages] * workers, [timeout] * workers))
+        start = time.perf_counter()
+        results = list(executor.map(_extract_in_worker, paths, [max_pages] * len(paths), [timeout] * len(paths)))
+        elapsed = time.perf_counter() - start
+
+    docs_per_sec = len(paths) / elapsed
+    return {
+        "workers": workers,
+        "documents": len(paths),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(docs_per_sec, 2),
+        "docs_per_sec_per_core": round(docs_per_sec / workers, 2),
+        "pages_per_sec_per_core": round(pages / elapsed / workers, 2),
+        "worker_peak_rss_mb": max(rss for _, rss in results)
+    }
+
+
+def run_benchmark(args) -> Dict:
+    manifest = load_corpus(args.corpus, args.docs_per_case, args.seed)
+    documents = manifest["documents"]
+    if args.cases:
+        wanted = set(args.cases.split(","))
+        documents = [doc for doc in documents if doc["case"] in wanted]
+    max_pages = PDF_MAX_PAGES if args.budgets else 0
+    timeout = PDF_EXTRACTION_TIMEOUT_SECONDS if args.budgets else None
+
+    # חימום - ה-import והאתחול של pdfminer לא נכנסים למדידה
+    with open(os.path.join(args.corpus, documents[0]["file"]), "rb") as f:
+        extract_text_from_pdf(f.read())
+
+    print(f"Latency: {len(documents)} documents x {args.repeat} ...")
+    latency = run_latency(args.corpus, documents, args.repeat, max_pages, timeout)
+    print("Memory ...")
+    memory = run_memory(args.corpus, documents, max_pages, timeout)
+    print(f"Throughput: {args.workers} workers ...")
+    throughput = run_throughput(args.corpus, documents, args.workers, args.repeat, max_pages, timeout)
+
+    cases = {}
+    for doc in documents:
+        case = cases.setdefault(doc["case"], {
+            "kind": doc["kind"],
+            "pages": doc["pages"],
+            "documents": 0,
+            "avg_size_bytes": 0
+        })
+        case["documents"] += 1
+        case["avg_size_bytes"] += doc["size_bytes"]
+    for name, case in cases.items():
+        case["avg_size_bytes"] //= case["documents"]
+        case["latency_ms"] = _summarize_ms(latency["samples"][name])
+        case["ms_per_page"] = round(case["latency_ms"]["p50"] / case["pages"], 3)
+        case["avg_chars"] = latency["chars"][name] // case["documents"]
+        case["errors"] = latency["errors"][name]
+        case["peak_traced_mb"] = memory[name]
+
+    all_samples = [sample for samples in latency["samples"].values() for sample in samples]
+    return {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "pdfminer": metadata.version("pdfminer.six"),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "budgets": bool(args.budgets),
+            "corpus_seed": manifest["seed"],
+            "corpus_digest": _manifest_digest({"documents": documents})
+        },
+        "overall": {
+            "documents": len(documents),
+            "latency_ms": _summarize_ms(all_samples),
+            "single_process_docs_per_sec": round(len(all_samples) / sum(all_samples), 2),
+            "peak_rss_mb": _peak_rss_mb()
+        },
+        "throughput": throughput,
+        "cases": cases
+    }
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    percent = (after - before) / before * 100
+    return f"{percent:+.1f}%"
+
+
+def print_report(result: Dict) -> None:
+    print()
+    print(f"{'case':<18} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'ms/page':>9} {'peak MB':>8} {'chars':>8}")
+    for name, case in result["cases"].items():
+        latency = case["latency_ms"]
+        print(
+            f"{name:<18} {latency['p50']:>9.1f} {latency['p90']:>9.1f} {latency['p99']:>9.1f} "
+            f"{case['ms_per_page']:>9.1f} {case['peak_traced_mb']:>8.1f} {case['avg_chars']:>8}"
+        )
+    throughput = result["throughput"]
+    print()
+    print(
+        f"throughput: {throughput['docs_per_sec']} docs/s on {throughput['workers']} workers "
+        f"({throughput['docs_per_sec_per_core']} docs/s/core, {throughput['pages_per_sec_per_core']} pages/s/core)"
+    )
+    print(f"peak RSS: {result['overall']['peak_rss_mb']} MB (main), {throughput['worker_peak_rss_mb']} MB (worker)")
+
+
+def print_comparison(baseline: Dict, result: Dict) -> None:
+    """
+    Print the change from baseline to result - positive latency deltas and
+    negative throughput deltas are regressions
+    """
+    print()
+    if baseline["meta"].get("corpus_digest") != result["meta"].get("corpus_digest"):
+        print("WARNING: the corpora differ - the comparison is not like for like")
+    print(f"compare: {baseline['meta'].get('label') or baseline['meta'].get('git_commit')} -> "
+          f"{result['meta'].get('label') or result['meta'].get('git_commit')}")
+    print(f"{'case':<18} {'p50 before':>11} {'p50 after':>10} {'delta':>8} {'p90 delta':>10} {'peak MB delta':>14}")
+    for name, case in result["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            print(f"{name:<18} {'(new case)':>11}")
+            continue
+        p50_before, p50_after = before["latency_ms"]["p50"], case["latency_ms"]["p50"]
+        change = (p50_after - p50_before) / p50_before * 100 if p50_before else 0.0
+        marker = " regression" if change > COMPARE_THRESHOLD_PERCENT else (" faster" if change < -COMPARE_THRESHOLD_PERCENT else "")
+        print(
+            f"{name:<18} {p50_before:>11.1f} {p50_after:>10.1f} {_delta(p50_before, p50_after):>8} "
+            f"{_delta(before['latency_ms']['p90'], case['latency_ms']['p90']):>10} "
+            f"{_delta(before['peak_traced_mb'], case['peak_traced_mb']):>14}{marker}"
+        )
+    before_tp = baseline["throughput"]["docs_per_sec_per_core"]
+    after_tp = result["throughput"]["docs_per_sec_per_core"]
+    print(f"throughput per core: {before_tp} -> {after_tp} docs/s ({_delta(before_tp, after_tp)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="corpus directory (generated if missing)")
+    parser.add_argument("--docs-per-case", type=int, default=3, help="when generating the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="when generating the corpus")
+    parser.add_argument("--cases", help="comma-separated case names to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="extractions per document")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size for throughput")
+    parser.add_argument("--budgets", action="store_true", help="apply PDF_MAX_PAGES / PDF_EXTRACTION_TIMEOUT_SECONDS")
+    parser.add_argument("--label", help="name for this run in comparisons")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/extraction-<time>.json)")
+    parser.add_argument("--compare", help="previous result JSON to compare against")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR,
+        f"extraction-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_report(result)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), result)
+    print()
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
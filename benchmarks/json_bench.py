@@ -0,0 +1,182 @@
+"""
+Benchmark for JSON serialization of list responses (app.utils.json_response)
+
+Builds realistic CV documents (the shape get_all_documents returns: known_data,
+file_metadata, status_history, Hebrew and Latin text) and encodes lists of them
+two ways:
+
+- generic: what FastAPI does with a returned list - jsonable_encoder, then
+  JSONResponse (stdlib json)
+- fast: FastJSONResponse (orjson, no jsonable_encoder walk)
+
+Both bodies are decoded and compared once, so the fast path is checked to
+produce the same JSON.
+
+Usage:
+    python -m benchmarks.json_bench
+    python -m benchmarks.json_bench --sizes 100,1000,5000 --repeat 20 --output json.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import time
+from importlib import metadata
+from typing import Dict, List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.constants import STATUS_ID_MAP
+from app.utils.json_response import FastJSONResponse, orjson
+from benchmarks.extraction_bench import DEFAULT_RESULTS_DIR, _git_commit, _summarize_ms
+
+DEFAULT_SIZES = "100,1000,5000"
+
+_FIRST_NAMES = ["Dana", "Yossi", "Maria", "Ivan", "Sophie", "Lukas", "Noa", "Ahmed"]
+_HEBREW_NAMES = ["דנה כהן", "יוסי לוי", "מריה פטרוב", "נועה ישראלי", "אחמד חורי"]
+_COUNTRIES = ["France", "Germany", "Ukraine", "Israel", "Spain", "Poland"]
+_CAMPAIGNS = ["Spring 2025", "Europe Tech", "Relocation", "Summer Interns"]
+_JOB_TYPES = ["Backend Developer", "QA Engineer", "Data Analyst", "DevOps", "Support"]
+
+
+def generate_documents(count: int, seed: int) -> List[Dict]:
+    """CV documents as the storage layer returns them (id already a string)"""
+    rng = random.Random(seed)
+    statuses = list(STATUS_ID_MAP.values())
+    start = datetime.datetime(2025, 1, 1)
+    docs = []
+    for index in range(count):
+        uploaded = start + datetime.timedelta(minutes=rng.randint(0, 500_000))
+        history = [
+            {"status": status, "timestamp": (uploaded + datetime.timedelta(hours=step)).isoformat() + "Z"}
+            for step, status in enumerate(statuses[:rng.randint(1, len(statuses))])
+        ]
+        name = rng.choice(_FIRST_NAMES)
+        docs.append({
+            "id": str(ObjectId()),
+            "file_metadata": {
+                "filename": f"cv_{name.lower()}_{index}.pdf",
+                "size": rng.randint(20_000, 2_000_000),
+                "content_type": "application/pdf",
+                "uploaded_at": uploaded.isoformat() + "Z",
+            },
+            "known_data": {
+                "name": name,
+                "latin_name": f"{name} {index}",
+                "hebrew_name": rng.choice(_HEBREW_NAMES),
+                "phone_number": f"+972-5{rng.randint(0, 9)}-{rng.randint(1000000, 9999999)}",
+                "email": f"{name.lower()}.{index}@example.com",
+                "campaign": rng.choice(_CAMPAIGNS),
+                "age": rng.randint(20, 60),
+                "nationality": rng.choice(_COUNTRIES),
+                "can_travel_europe": rng.choice([True, False, None]),
+                "can_visit_israel": rng.choice([True, False, None]),
+                "lives_in_europe": rng.choice([True, False]),
+                "native_israeli": rng.choice([True, False]),
+                "english_level": rng.choice(["basic", "good", "fluent"]),
+                "remembers_job_application": rng.choice([True, False]),
+                "skills_summary": " ".join(rng.choice(_JOB_TYPES) for _ in range(12)),
+                "job_type": rng.choice(_JOB_TYPES),
+                "match_score": str(rng.randint(40, 100)),
+                "class_explain": "מתאים לתפקיד לפי ניסיון וכישורים " * 3,
+                "notes": None,
+            },
+            "current_status": history[-1]["status"],
+            "status_history": history,
+            "is_deleted": False,
+            "version": len(history),
+        })
+    return docs
+
+
+def _time_encode(encode, payload, repeat: int) -> List[float]:
+    encode(payload)  # חימום
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(payload)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _generic_body(docs: List[Dict]) -> bytes:
+    return JSONResponse(jsonable_encoder(docs)).body
+
+
+def _fast_body(docs: List[Dict]) -> bytes:
+    return FastJSONResponse(docs).body
+
+
+def run_benchmark(args) -> Dict:
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    cases = {}
+    for size in sizes:
+        docs = generate_documents(size, args.seed)
+        generic_body, fast_body = _generic_body(docs), _fast_body(docs)
+        if json.loads(generic_body) != json.loads(fast_body):
+            raise SystemExit(f"Encoders disagree for {size} documents")
+        generic = _summarize_ms(_time_encode(_generic_body, docs, args.repeat))
+        fast = _summarize_ms(_time_encode(_fast_body, docs, args.repeat))
+        cases[str(size)] = {
+            "documents": size,
+            "body_bytes": {"generic": len(generic_body), "fast": len(fast_body)},
+            "generic_ms": generic,
+            "fast_ms": fast,
+            "speedup": round(generic["p50"] / fast["p50"], 2) if fast["p50"] else None,
+        }
+    return {
+        "meta": {
+            "label": args.label,
+            "time": datetime.datetime.utcnow().isoformat() + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "orjson": metadata.version("orjson") if orjson is not None else None,
+            "fastapi": metadata.version("fastapi"),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "cases": cases,
+    }
+
+
+def print_report(result: Dict) -> None:
+    meta = result["meta"]
+    print(f"orjson {meta['orjson'] or 'not installed (stdlib fallback)'}, fastapi {meta['fastapi']}")
+    print(f"{'docs':>7} {'body KB':>9} {'generic p50':>12} {'fast p50':>10} {'speedup':>8} {'fast MB/s':>10}")
+    for case in result["cases"].values():
+        fast_p50 = case["fast_ms"]["p50"]
+        body = case["body_bytes"]["fast"]
+        rate = body / (1024 * 1024) / (fast_p50 / 1000) if fast_p50 else 0.0
+        print(
+            f"{case['documents']:>7} {body / 1024:>9.1f} {case['generic_ms']['p50']:>10.2f}ms"
+            f" {fast_p50:>8.2f}ms {case['speedup'] or 0:>7.1f}x {rate:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of CV list responses")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated document counts per response")
+    parser.add_argument("--repeat", type=int, default=10, help="encodings per size")
+    parser.add_argument("--seed", type=int, default=0, help="document generator seed")
+    parser.add_argument("--label", help="name for this run")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/json-<time>.json)")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"json-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
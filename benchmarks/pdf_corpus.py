@@ -0,0 +1,378 @@
+"""
+Synthetic PDF corpus for the extraction benchmark
+
+Every PDF is written by hand (no PDF library needed) from a fixed seed, so the
+corpus is byte-for-byte reproducible between machines and runs. Cases cover:
+
+- text_*           Latin text in a base-14 font, by page count
+- embedded_font_*  Latin text in an embedded Type3 font (glyph programs + ToUnicode)
+- scanned_*        Full-page grayscale images with no text layer
+- scanned_ocr_*    Scanned pages with an invisible OCR text layer
+- hebrew_*         Hebrew RTL text in a Type0 / Identity-H font with a ToUnicode CMap
+- mixed_*          Hebrew and Latin lines on the same page
+
+Usage:
+    python -m benchmarks.pdf_corpus --output benchmarks/corpus
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+LINES_PER_PAGE = 42
+FONT_SIZE = 10
+LINE_HEIGHT = 16
+
+# גודל התמונה בעמוד סרוק (בערך 100 DPI)
+SCAN_WIDTH = 850
+SCAN_HEIGHT = 1100
+
+LATIN_WORDS = (
+    "experience manager senior developer python backend team lead project logistics "
+    "warehouse customer service sales driver security officer university degree "
+    "certificate english hebrew fluent responsible motivated years skills languages "
+    "excel communication operations training shift supervisor kitchen cook technician"
+).split()
+
+HEBREW_WORDS = (
+    "ניסיון מנהל צוות מפתח תוכנה מחסן לוגיסטיקה שירות לקוחות מכירות נהג "
+    "אבטחה תואר ראשון אוניברסיטה תעודה אנגלית עברית שפות אחראי מוטיבציה "
+    "שנים כישורים משמרת אחמש מטבח טבח טכנאי הדרכה תפעול עבודה"
+).split()
+
+LATIN_CHARSET = [chr(code) for code in range(32, 127)]
+HEBREW_CHARSET = [chr(code) for code in range(0x05D0, 0x05EB)] + list(" 0123456789.,-:()@")
+
+
+class PdfWriter:
+    """Minimal PDF writer - numbered objects, streams and a classic xref table"""
+
+    def __init__(self):
+        self.objects: List[Optional[bytes]] = []
+
+    def reserve(self) -> int:
+        """Reserve an object number (for objects that reference each other)"""
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, obj_id: int, body: bytes) -> int:
+        self.objects[obj_id - 1] = body
+        return obj_id
+
+    def add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def add_stream(self, data: bytes, extra: bytes = b"", compress: bool = True) -> int:
+        if compress:
+            data = zlib.compress(data, 6)
+            extra += b" /Filter /FlateDecode"
+        return self.add(b"<< /Length %d%s >>\nstream\n" % (len(data), extra) + data + b"\nendstream")
+
+    def build(self, root_id: int) -> bytes:
+        out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref_offset = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1)
+        for offset in offsets:
+            out += b"%010d 00000 n \n" % offset
+        out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self.objects) + 1, root_id, xref_offset
+        )
+        return bytes(out)
+
+
+def _pdf_string(text: str) -> bytes:
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1") + b")"
+
+
+def _latin_line(rng: random.Random) -> str:
+    words = [rng.choice(LATIN_WORDS) for _ in range(rng.randint(8, 13))]
+    if rng.random() < 0.3:
+        words.append(f"{rng.randint(2005, 2025)}-{rng.randint(2006, 2026)}")
+    return " ".join(words).capitalize()
+
+
+def _hebrew_line(rng: random.Random) -> str:
+    words = [rng.choice(HEBREW_WORDS) for _ in range(rng.randint(7, 11))]
+    if rng.random() < 0.3:
+        words.append(str(rng.randint(2005, 2025)))
+    return " ".join(words)
+
+
+class _Fonts:
+    """Font objects shared by all pages of one document"""
+
+    def __init__(self, writer: PdfWriter):
+        self.writer = writer
+        self.resources: Dict[str, int] = {}
+        self._hebrew_cids: Dict[str, int] = {}
+
+    def base14(self) -> str:
+        if "F1" not in self.resources:
+            self.resources["F1"] = self.writer.add(
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+            )
+        return "F1"
+
+    def type3(self) -> str:
+        """
+        Embedded Type3 font - every glyph is its own content stream, the way
+        subset fonts from some PDF producers look; pdfminer has to resolve all of them
+        """
+        if "T3" in self.resources:
+            return "T3"
+        writer = self.writer
+        char_procs = []
+        differences = []
+        widths = []
+        for char in LATIN_CHARSET:
+            code = ord(char)
+            glyph_name = b"g%d" % code
+            width = 280 if char == " " else 500 + (code * 37) % 200
+            widths.append(b"%d" % width)
+            glyph = b"%d 0 0 0 %d 700 d1" % (width, width - 40)
+            if char != " ":
+                # גליף "אמיתי" - כמה מלבנים לפי קוד התו
+                glyph += b" 20 0 %d 80 re 20 0 80 %d re f" % (width - 80, 300 + code % 400)
+            char_procs.append(b"/%s %d 0 R" % (glyph_name, writer.add_stream(glyph, compress=False)))
+            differences.append(b"%d /%s" % (code, glyph_name))
+
+        cmap = _to_unicode_cmap([(code, ord(char)) for code, char in zip(range(32, 127), LATIN_CHARSET)], 1)
+        to_unicode = writer.add_stream(cmap)
+        self.resources["T3"] = writer.add(
+            b"<< /Type /Font /Subtype /Type3 /FontBBox [0 0 750 750] /FontMatrix [0.001 0 0 0.001 0 0]"
+            b" /CharProcs << " + b" ".join(char_procs) + b" >>"
+            b" /Encoding << /Type /Encoding /Differences [" + b" ".join(differences) + b"] >>"
+            b" /FirstChar 32 /LastChar 126 /Widths [" + b" ".join(widths) + b"]"
+            b" /Resources << >> /ToUnicode %d 0 R >>" % to_unicode
+        )
+        return "T3"
+
+    def hebrew(self) -> str:
+        """Type0 font with Identity-H encoding - text is stored as 2-byte CIDs"""
+        if "H1" in self.resources:
+            return "H1"
+        writer = self.writer
+        self._hebrew_cids = {char: cid for cid, char in enumerate(HEBREW_CHARSET, 1)}
+        cmap = _to_unicode_cmap([(cid, ord(char)) for char, cid in self._hebrew_cids.items()], 2)
+        to_unicode = writer.add_stream(cmap)
+        descriptor = writer.add(
+            b"<< /Type /FontDescriptor /FontName /ArialHebrew /Flags 32 /FontBBox [-500 -300 1500 1000]"
+            b" /ItalicAngle 0 /Ascent 900 /Descent -200 /CapHeight 700 /StemV 80 >>"
+        )
+        descendant = writer.add(
+            b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /ArialHebrew"
+            b" /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >>"
+            b" /FontDescriptor %d 0 R /DW 550 /CIDToGIDMap /Identity >>" % descriptor
+        )
+        self.resources["H1"] = writer.add(
+            b"<< /Type /Font /Subtype /Type0 /BaseFont /ArialHebrew /Encoding /Identity-H"
+            b" /DescendantFonts [%d 0 R] /ToUnicode %d 0 R >>" % (descendant, to_unicode)
+        )
+        return "H1"
+
+    def encode_hebrew(self, text: str) -> bytes:
+        # יצרני PDF רבים שומרים עברית בסדר ויזואלי (הפוך) - כך גם כאן
+        cids = [self._hebrew_cids.get(char, self._hebrew_cids[" "]) for char in reversed(text)]
+        return b"<" + "".join(f"{cid:04X}" for cid in cids).encode() + b">"
+
+    def resource_dict(self) -> bytes:
+        return b"<< " + b" ".join(b"/%s %d 0 R" % (name.encode(), obj) for name, obj in self.resources.items()) + b" >>"
+
+
+def _to_unicode_cmap(mapping: List[Tuple[int, int]], code_bytes: int) -> bytes:
+    width = code_bytes * 2
+    lines = [
+        "/CIDInit /ProcSet findresource begin 12 dict begin begincmap",
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        "/CMapName /Adobe-Identity-UCS def /CMapType 2 def",
+        "1 begincodespacerange",
+        f"<{0:0{width}X}> <{(1 << (8 * code_bytes)) - 1:0{width}X}>",
+        "endcodespacerange",
+    ]
+    for start in range(0, len(mapping), 100):
+        block = mapping[start:start + 100]
+        lines.append(f"{len(block)} beginbfchar")
+        lines.extend(f"<{code:0{width}X}> <{unicode:04X}>" for code, unicode in block)
+        lines.append("endbfchar")
+    lines.append("endcmap CMapName currentdict /CMap defineresource pop end end")
+    return "\n".join(lines).encode()
+
+
+def _text_content(lines: List[Tuple[str, bytes]], render_mode: int = 0) -> bytes:
+    """Content stream for (font, encoded string) lines, top to bottom"""
+    ops = [b"BT", b"%d Tr" % render_mode, b"%d TL" % LINE_HEIGHT]
+    ops.append(b"1 0 0 1 56 %d Tm" % (PAGE_HEIGHT - 60))
+    current_font = None
+    for font, encoded in lines:
+        if font != current_font:
+            ops.append(b"/%s %d Tf" % (font.encode(), FONT_SIZE))
+            current_font = font
+        ops.append(encoded + b" Tj T*")
+    ops.append(b"ET")
+    return b"\n".join(ops)
+
+
+def _scan_image(writer: PdfWriter, rng: random.Random) -> int:
+    """Grayscale 'scan': paper noise with darker bands where text lines would be"""
+    rows = []
+    paper = bytes(rng.randint(236, 255) for _ in range(SCAN_WIDTH * 4))
+    for y in range(SCAN_HEIGHT):
+        offset = (y * 97) % (len(paper) - SCAN_WIDTH)
+        row = bytearray(paper[offset:offset + SCAN_WIDTH])
+        if 80 < y < SCAN_HEIGHT - 80 and (y // 6) % 4 == 0:
+            start = rng.randint(60, 120)
+            ink = rng.randbytes(SCAN_WIDTH - start - 60)
+            row[start:SCAN_WIDTH - 60] = bytes(b // 2 for b in ink)
+        rows.append(bytes(row))
+    return writer.add_stream(
+        b"".join(rows),
+        b" /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray /BitsPerComponent 8"
+        % (SCAN_WIDTH, SCAN_HEIGHT)
+    )
+
+
+def build_pdf(kind: str, pages: int, seed: int) -> bytes:
+    """
+    Build one synthetic PDF
+
+    Args:
+        kind: text / embedded_font / scanned / scanned_ocr / hebrew / mixed
+        pages: Number of pages
+        seed: Seed for the content (same seed -> same bytes)
+    """
+    rng = random.Random(f"{kind}:{pages}:{seed}")
+    writer = PdfWriter()
+    fonts = _Fonts(writer)
+    catalog_id = writer.reserve()
+    pages_id = writer.reserve()
+    page_ids = []
+
+    for _ in range(pages):
+        xobjects = b""
+        content = b""
+        if kind in ("scanned", "scanned_ocr"):
+            image_id = _scan_image(writer, rng)
+            xobjects = b" /XObject << /Im1 %d 0 R >>" % image_id
+            content = b"q %d 0 0 %d 0 0 cm /Im1 Do Q\n" % (PAGE_WIDTH, PAGE_HEIGHT)
+            if kind == "scanned_ocr":
+                font = fonts.base14()
+                content += _text_content([(font, _pdf_string(_latin_line(rng))) for _ in range(LINES_PER_PAGE)], 3)
+        elif kind == "text":
+            font = fonts.base14()
+            content = _text_content([(font, _pdf_string(_latin_line(rng))) for _ in range(LINES_PER_PAGE)])
+        elif kind == "embedded_font":
+            font = fonts.type3()
+            content = _text_content([(font, _pdf_string(_latin_line(rng))) for _ in range(LINES_PER_PAGE)])
+        elif kind == "hebrew":
+            font = fonts.hebrew()
+            content = _text_content([(font, fonts.encode_hebrew(_hebrew_line(rng))) for _ in range(LINES_PER_PAGE)])
+        elif kind == "mixed":
+            latin, hebrew = fonts.base14(), fonts.hebrew()
+            lines = []
+            for _ in range(LINES_PER_PAGE):
+                if rng.random() < 0.5:
+                    lines.append((hebrew, fonts.encode_hebrew(_hebrew_line(rng))))
+                else:
+                    lines.append((latin, _pdf_string(_latin_line(rng))))
+            content = _text_content(lines)
+        else:
+            raise ValueError(f"Unknown corpus kind: {kind}")
+
+        content_id = writer.add_stream(content)
+        font_resources = b" /Font %s" % fonts.resource_dict() if fonts.resources else b""
+        page_ids.append(writer.add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R /Resources <<%s%s >> >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id, font_resources, xobjects)
+        ))
+
+    writer.set(pages_id, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    ))
+    writer.set(catalog_id, b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    return writer.build(catalog_id)
+
+
+# (case name, kind, pages)
+CORPUS_CASES: List[Tuple[str, str, int]] = [
+    ("text_1p", "text", 1),
+    ("text_5p", "text", 5),
+    ("text_20p", "text", 20),
+    ("text_50p", "text", 50),
+    ("embedded_font_1p", "embedded_font", 1),
+    ("embedded_font_5p", "embedded_font", 5),
+    ("scanned_1p", "scanned", 1),
+    ("scanned_3p", "scanned", 3),
+    ("scanned_ocr_2p", "scanned_ocr", 2),
+    ("hebrew_1p", "hebrew", 1),
+    ("hebrew_5p", "hebrew", 5),
+    ("mixed_2p", "mixed", 2),
+]
+
+
+def generate_corpus(
+    output_dir: str,
+    docs_per_case: int = 3,
+    seed: int = 0,
+    progress: Optional[Callable[[str], None]] = None
+) -> Dict:
+    """
+    Write the corpus and a manifest.json describing it
+
+    Args:
+        output_dir: Directory for the PDFs
+        docs_per_case: Number of documents per case (different content, same shape)
+        seed: Base seed - change it to get a different but equally reproducible corpus
+
+    Returns:
+        The manifest (also written to <output_dir>/manifest.json)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    documents = []
+    for case, kind, pages in CORPUS_CASES:
+        for index in range(docs_per_case):
+            pdf = build_pdf(kind, pages, seed * 1000 + index)
+            filename = f"{case}_{index}.pdf"
+            with open(os.path.join(output_dir, filename), "wb") as f:
+                f.write(pdf)
+            documents.append({
+                "file": filename,
+                "case": case,
+                "kind": kind,
+                "pages": pages,
+                "size_bytes": len(pdf),
+                "sha256": hashlib.sha256(pdf).hexdigest()
+            })
+            if progress:
+                progress(filename)
+
+    manifest = {"seed": seed, "docs_per_case": docs_per_case, "documents": documents}
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic PDF corpus for the extraction benchmark")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--docs-per-case", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.output, args.docs_per_case, args.seed)
+    total_bytes = sum(doc["size_bytes"] for doc in manifest["documents"])
+    print(f"Wrote {len(manifest['documents'])} PDFs ({total_bytes / 1024 / 1024:.1f} MB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark for the storage backends (app.repositories)
+
+Loads the same generated CV documents into each backend and times the same
+operation mix through the StorageBackend interface:
+
+- insert: insert_cv_documents in batches
+- get: get_document_by_id (with extracted_text)
+- list_page: get_documents_page, summary view
+- search: search_documents_advanced over a fixed set of filters
+- update_status: update_document_status
+- update_fields: update_document_fields_with_transition
+- stats: get_document_stats (the stats cache is cleared before every call)
+
+The documents get fixed _ids, so the search results of the backends are
+compared once - a backend that selects different documents fails the run.
+The mongo backend runs against --mongo-db on MONGO_URI, which is dropped
+before and after the run.
+
+Usage:
+    python -m benchmarks.storage_bench
+    python -m benchmarks.storage_bench --backends memory,mongo --documents 5000 --output storage.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from bson import ObjectId
+
+from app.core.config import MONGO_URI
+from app.core.constants import STATUS_ID_MAP, UPDATE_STATUS_TRANSITIONS
+from app.repositories import (
+    StorageBackend, MongoStorageBackend, InMemoryStorageBackend, STORAGE_BACKEND_MONGO, STORAGE_BACKEND_MEMORY
+)
+from app.services import cv_stats
+from app.services.status_history_store import flush_archive
+from app.utils.projection import VIEW_SUMMARY
+from benchmarks.extraction_bench import DEFAULT_RESULTS_DIR, _git_commit, _summarize_ms
+
+DEFAULT_BACKENDS = STORAGE_BACKEND_MEMORY
+DEFAULT_MONGO_DB = "noizz25HR_bench"
+
+_FIRST_NAMES = ["Dana", "Yossi", "Maria", "Ivan", "Sophie", "Lukas", "Noa", "Ahmed"]
+_COUNTRIES = ["France", "Germany", "Ukraine", "Israel", "Spain", "Poland"]
+_CAMPAIGNS = ["Spring 2025", "Europe Tech", "Relocation", "Summer Interns"]
+_JOB_TYPES = ["Backend Developer", "QA Engineer", "Data Analyst", "DevOps", "Support"]
+_SKILLS = ["python", "java", "sql", "docker", "kubernetes", "react", "excel", "linux"]
+
+# הפילטרים של פעולת search - גם ההשוואה בין ה-backends רצה עליהם
+SEARCH_CASES = [
+    {"current_status": "Submitted"},
+    {"campaign": "europe"},
+    {"country": "france", "match_mode": "exact"},
+    {"min_score": 80},
+    {"job_type": "qa", "max_score": 70},
+    {"free_text": "kubernetes"},
+]
+
+
+def generate_documents(count: int, seed: int) -> List[Dict]:
+    """CV documents as the upload endpoints build them, with fixed _ids"""
+    rng = random.Random(seed)
+    docs = []
+    for index in range(count):
+        name = rng.choice(_FIRST_NAMES)
+        docs.append({
+            "_id": ObjectId(f"{index + 1:024x}"),
+            "file_metadata": {
+                "filename": f"cv_{name.lower()}_{index}.pdf",
+                "size": rng.randint(20_000, 2_000_000),
+                "content_type": "application/pdf",
+            },
+            "known_data": {
+                "name": name,
+                "latin_name": f"{name} {index}",
+                "phone_number": f"+972-5{rng.randint(0, 9)}-{rng.randint(1000000, 9999999)}",
+                "email": f"{name.lower()}.{index}@example.com",
+                "campaign": rng.choice(_CAMPAIGNS),
+                "nationality": rng.choice(_COUNTRIES),
+                "job_type": rng.choice(_JOB_TYPES),
+                "match_score": str(rng.randint(40, 100)),
+                "notes": None,
+            },
+            "extracted_text": " ".join(rng.choice(_SKILLS) for _ in range(200)),
+        })
+    return docs
+
+
+async def _time_async(operation: Callable[[int], Awaitable[Any]], repeat: int) -> List[float]:
+    samples = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        await operation(index)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _summarize(samples: List[float], items_per_sample: int = 1) -> Dict[str, float]:
+    summary = _summarize_ms(samples)
+    total = sum(samples)
+    summary["ops_per_sec"] = round(len(samples) * items_per_sample / total, 1) if total else 0.0
+    return summary
+
+
+async def run_backend(storage: StorageBackend, args) -> Dict:
+    rng = random.Random(args.seed)
+    docs = generate_documents(args.documents, args.seed)
+    ids = [str(doc["_id"]) for doc in docs]
+    operations = {}
+
+    batches = [docs[start:start + args.batch_size] for start in range(0, len(docs), args.batch_size)]
+    samples = await _time_async(lambda index: storage.insert_cv_documents(batches[index]), len(batches))
+    operations["insert"] = _summarize(samples, args.batch_size)
+
+    samples = await _time_async(lambda _: storage.get_document_by_id(rng.choice(ids)), args.repeat)
+    operations["get"] = _summarize(samples)
+
+    async def list_page(_):
+        after = ObjectId(rng.choice(ids))
+        await storage.get_documents_page(None, args.page_size, after, VIEW_SUMMARY)
+    operations["list_page"] = _summarize(await _time_async(list_page, args.repeat))
+
+    # ההשוואה לפני הכתיבות - כל ה-backends מחזיקים עדיין אותם מסמכים
+    search_results = []
+    for filters in SEARCH_CASES:
+        found = await storage.search_documents_advanced(view=VIEW_SUMMARY, **filters)
+        search_results.append(sorted(doc["id"] for doc in found))
+    samples = await _time_async(
+        lambda index: storage.search_documents_advanced(view=VIEW_SUMMARY, **SEARCH_CASES[index % len(SEARCH_CASES)]),
+        args.repeat
+    )
+    operations["search"] = _summarize(samples)
+
+    statuses = list(STATUS_ID_MAP.values())
+    samples = await _time_async(lambda _: storage.update_document_status(rng.choice(ids), rng.choice(statuses)), args.repeat)
+    operations["update_status"] = _summarize(samples)
+
+    samples = await _time_async(
+        lambda index: storage.update_document_fields_with_transition(
+            rng.choice(ids), {"match_score": str(rng.randint(40, 100)), "recruit_note": f"note {index}"},
+            UPDATE_STATUS_TRANSITIONS
+        ),
+        args.repeat
+    )
+    operations["update_fields"] = _summarize(samples)
+
+    async def stats(_):
+        cv_stats.invalidate_stats_cache()
+        await storage.get_document_stats()
+    operations["stats"] = _summarize(await _time_async(stats, max(args.repeat // 10, 1)))
+
+    return {"operations": operations, "search_results": search_results}
+
+
+async def _run_mongo(args) -> Dict:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(MONGO_URI)
+    await client.drop_database(args.mongo_db)
+    try:
+        return await run_backend(MongoStorageBackend(client[args.mongo_db]), args)
+    finally:
+        # כתיבות הארכיון שברקע - לפני מחיקת ה-DB
+        await flush_archive()
+        await client.drop_database(args.mongo_db)
+        client.close()
+
+
+async def run_benchmark(args) -> Dict:
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    results = {}
+    for backend in backends:
+        if backend == STORAGE_BACKEND_MEMORY:
+            results[backend] = await run_backend(InMemoryStorageBackend(), args)
+        elif backend == STORAGE_BACKEND_MONGO:
+            results[backend] = await _run_mongo(args)
+        else:
+            raise SystemExit(f"Unknown storage backend: {backend}")
+
+    search_results = [result.pop("search_results") for result in results.values()]
+    if any(found != search_results[0] for found in search_results[1:]):
+        raise SystemExit(f"Backends disagree on search results: {', '.join(results)}")
+    return {
+        "meta": {
+            "label": args.label,
+            "time": datetime.datetime.utcnow().isoformat() + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "documents": args.documents,
+            "batch_size": args.batch_size,
+            "page_size": args.page_size,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "search_matches": [len(found) for found in search_results[0]] if search_results else [],
+        },
+        "backends": results,
+    }
+
+
+def print_report(result: Dict) -> None:
+    backends = result["backends"]
+    print(f"{result['meta']['documents']} documents")
+    print(f"{'operation':<14}" + "".join(f"{name + ' p50':>14}{name + ' ops/s':>15}" for name in backends))
+    operations = next(iter(backends.values()))["operations"] if backends else {}
+    for operation in operations:
+        row = f"{operation:<14}"
+        for backend in backends.values():
+            summary = backend["operations"][operation]
+            row += f"{summary['p50']:>12.3f}ms{summary['ops_per_sec']:>15.1f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storage backends through the StorageBackend interface")
+    parser.add_argument("--backends", default=DEFAULT_BACKENDS, help="comma-separated: memory, mongo")
+    parser.add_argument("--documents", type=int, default=2000, help="documents loaded into each backend")
+    parser.add_argument("--batch-size", type=int, default=100, help="documents per insert_cv_documents call")
+    parser.add_argument("--page-size", type=int, default=100, help="documents per list page")
+    parser.add_argument("--repeat", type=int, default=200, help="calls per read / update operation")
+    parser.add_argument("--seed", type=int, default=0, help="document generator seed")
+    parser.add_argument("--mongo-db", default=DEFAULT_MONGO_DB, help="database for the mongo backend (dropped!)")
+    parser.add_argument("--label", help="name for this run")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/storage-<time>.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"storage-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+POST /upload-cv/batch: a zip archive is held to the same file limit as the
+multipart files - too many PDFs is a 400, not a silently truncated batch
+"""
+import io
+import zipfile
+
+import pytest
+
+import app.main as main
+from app.core.exceptions import TooManyFilesError
+from app.utils.upload_stream import spool_zip_members
+from benchmarks.pdf_corpus import build_pdf
+
+
+def _zip_of_pdfs(count: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for index in range(count):
+            zf.writestr(f"cv/{index}.pdf", build_pdf("text", 1, seed=index))
+        zf.writestr("cv/readme.txt", "not a pdf")
+    return buffer.getvalue()
+
+
+def test_spool_zip_members_within_limit():
+    members = spool_zip_members(io.BytesIO(_zip_of_pdfs(2)), max_members=2)
+    try:
+        assert [(name, error) for name, _, error in members] == [("cv/0.pdf", None), ("cv/1.pdf", None)]
+    finally:
+        for _, upload, _ in members:
+            upload.close()
+
+
+def test_spool_zip_members_over_limit():
+    with pytest.raises(TooManyFilesError):
+        spool_zip_members(io.BytesIO(_zip_of_pdfs(3)), max_members=2)
+
+
+@pytest.mark.parametrize("files_count", [0, 1])
+def test_batch_zip_over_limit_is_rejected(client, monkeypatch, files_count):
+    monkeypatch.setattr(main, "MAX_BATCH_FILES", 3)
+    files = [("files", (f"f{index}.pdf", build_pdf("text", 1, seed=index), "application/pdf")) for index in range(files_count)]
+    files.append(("archive", ("cvs.zip", _zip_of_pdfs(4 - files_count), "application/zip")))
+
+    response = client.post("/upload-cv/batch", files=files)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Too many files in batch (max 3)"
@@ -0,0 +1,67 @@
+"""
+The document cache is process-local: a write made by another instance (straight
+to Mongo here) must not be undone by a write, or hidden from reads, in this one
+"""
+import pytest
+from bson import ObjectId
+
+from app.core.config import COLLECTION_NAME
+from app.repositories import MongoStorageBackend
+
+pytestmark = pytest.mark.anyio
+
+
+async def _cached_document(mongo_db):
+    backend = MongoStorageBackend(mongo_db)
+    document_id = await backend.insert_cv_document({"known_data": {"name": "C", "email": "a@a", "campaign": "Summer"}})
+    # נטען ל-cache
+    assert (await backend.get_document_by_id(document_id))["known_data"]["email"] == "a@a"
+    return backend, document_id
+
+
+async def _write_from_other_instance(mongo_db, document_id, path, value):
+    await mongo_db[COLLECTION_NAME].update_one(
+        {"_id": ObjectId(document_id)}, {"$set": {path: value}, "$inc": {"version": 1}}
+    )
+
+
+async def test_field_write_keeps_other_instance_write(mongo_db):
+    backend, document_id = await _cached_document(mongo_db)
+    await _write_from_other_instance(mongo_db, document_id, "known_data.email", "b@b")
+
+    assert await backend.update_document_fields_only(document_id, {"recruit_note": "call back"})
+    assert await backend.update_document_full(document_id, {"campaign": "Winter"})
+
+    stored = await mongo_db[COLLECTION_NAME].find_one({"_id": ObjectId(document_id)})
+    assert stored["known_data"]["email"] == "b@b"
+    assert stored["known_data"]["recruit_note"] == "call back"
+    assert stored["search_keys"]["campaign"] == "winter"
+
+
+async def test_unchanged_field_write_is_skipped(mongo_db):
+    backend, document_id = await _cached_document(mongo_db)
+    version = await backend.get_document_version(document_id)
+
+    assert not await backend.update_document_fields_only(document_id, {"email": "a@a"})
+    assert await backend.update_document_fields_only(document_id, {}) is True
+    assert await backend.get_document_version(document_id) == version
+
+
+async def test_partial_write_reads_the_stored_document(mongo_db):
+    backend, document_id = await _cached_document(mongo_db)
+    await _write_from_other_instance(mongo_db, document_id, "known_data.hebrew_name", "שם")
+
+    # השדה כבר לא ריק ב-Mongo - אין מה לעדכן, גם אם ב-cache הוא חסר
+    assert await backend.update_document_partial(document_id, {"hebrew_name": "אחר"}) is True
+    assert (await backend.get_document_by_id(document_id))["known_data"]["hebrew_name"] == "שם"
+
+
+async def test_version_and_body_follow_other_instance_writes(mongo_db):
+    backend, document_id = await _cached_document(mongo_db)
+    version = await backend.get_document_version(document_id)
+    await _write_from_other_instance(mongo_db, document_id, "known_data.email", "b@b")
+
+    assert await backend.get_document_version(document_id) == version + 1
+    doc = await backend.get_document_by_id(document_id)
+    assert doc["known_data"]["email"] == "b@b"
+    assert doc["version"] == version + 1
@@ -0,0 +1,79 @@
+"""
+GET /cv/{id}/file - the original PDF, whole or a single byte range
+"""
+import pytest
+
+from app.core.exceptions import RangeNotSatisfiableError
+from app.utils.http_range import parse_range_header
+from benchmarks.pdf_corpus import build_pdf
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=999-999", (999, 999)),
+    # לא נתמך / לא תקין - הקובץ המלא
+    ("bytes=0-9,20-29", None),
+    ("items=0-9", None),
+    ("bytes=abc-", None),
+    ("bytes=50-10", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiableError) as error:
+        parse_range_header(header, 1000)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */1000"
+
+
+@pytest.fixture
+def stored_pdf(upload):
+    pdf = build_pdf("text", 3, seed=7)
+    return upload("range test", pdf), pdf
+
+
+def test_download_whole_file(client, stored_pdf):
+    document_id, pdf = stored_pdf
+    response = client.get(f"/cv/{document_id}/file")
+    assert response.status_code == 200
+    assert response.content == pdf
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(pdf))
+    assert "Content-Range" not in response.headers
+
+
+def test_download_range(client, stored_pdf):
+    document_id, pdf = stored_pdf
+    response = client.get(f"/cv/{document_id}/file", headers={"Range": "bytes=10-109"})
+    assert response.status_code == 206
+    assert response.content == pdf[10:110]
+    assert response.headers["Content-Range"] == f"bytes 10-109/{len(pdf)}"
+    assert response.headers["Content-Length"] == "100"
+
+
+def test_download_suffix_range(client, stored_pdf):
+    document_id, pdf = stored_pdf
+    response = client.get(f"/cv/{document_id}/file", headers={"Range": "bytes=-50"})
+    assert response.status_code == 206
+    assert response.content == pdf[-50:]
+    assert response.headers["Content-Range"] == f"bytes {len(pdf) - 50}-{len(pdf) - 1}/{len(pdf)}"
+
+
+def test_download_range_beyond_file(client, stored_pdf):
+    document_id, pdf = stored_pdf
+    response = client.get(f"/cv/{document_id}/file", headers={"Range": f"bytes={len(pdf)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(pdf)}"
+
+
+def test_download_without_stored_file(client, upload):
+    document_id = upload("metadata only")
+    assert client.get(f"/cv/{document_id}/file").status_code == 404
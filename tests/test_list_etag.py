@@ -0,0 +1,70 @@
+"""
+Conditional GET on the lists (GET /cv, GET /cv/search) and on a single document
+"""
+from app.utils.etag import etag_matches, hash_params, make_etag
+
+
+def test_hash_params_is_normalized():
+    assert hash_params({"a": 1, "b": None, "c": ["x"]}) == hash_params({"c": ["x"], "a": 1})
+    assert hash_params({"a": 1}) != hash_params({"a": 2})
+
+
+def test_etag_matches():
+    etag = make_etag("cv", 3, "abc")
+    assert etag == '"cv-3-abc"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{etag}', etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"cv-2-abc"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_list_not_modified_until_a_write(client, upload):
+    document_id = upload("etag list")
+    response = client.get("/cv", params={"view": "summary"})
+    etag = response.headers["ETag"]
+
+    for candidate in (etag, f"W/{etag}"):
+        not_modified = client.get("/cv", params={"view": "summary"}, headers={"If-None-Match": candidate})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+    assert client.patch(f"/cv/{document_id}", json={"skills_summary": "changed"}).json()["status"] == "updated"
+    changed = client.get("/cv", params={"view": "summary"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_etag_ignores_how_the_request_is_spelled(client, upload):
+    upload("etag spelling")
+    plain = client.get("/cv?view=summary&limit=2").headers["ETag"]
+    assert client.get("/cv?limit=2&view=summary&deleted=false").headers["ETag"] == plain
+    assert client.get("/cv?limit=2&view=summary", headers={"Accept": "*/*"}).headers["ETag"] == plain
+
+    assert client.get("/cv?view=full&limit=2").headers["ETag"] != plain
+    ndjson = client.get("/cv?view=summary&limit=2", headers={"Accept": "application/x-ndjson"})
+    assert ndjson.headers["ETag"] != plain
+
+
+def test_search_not_modified(client, upload):
+    upload("etag search")
+    params = {"free_text": "etag", "view": "summary"}
+    response = client.get("/cv/search", params=params)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    reordered = client.get("/cv/search?view=summary&free_text=etag", headers={"If-None-Match": etag})
+    assert reordered.status_code == 304
+    other = client.get("/cv/search", params={**params, "free_text": "other"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_document_not_modified(client, upload):
+    document_id = upload("etag document")
+    etag = client.get(f"/cv/{document_id}").headers["ETag"]
+    assert client.get(f"/cv/{document_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.patch(f"/cv/{document_id}", json={"skills_summary": "changed"}).json()["status"] == "updated"
+    assert client.get(f"/cv/{document_id}", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,101 @@
+"""
+Keyset pagination: cursor tokens, page boundaries on both backends, and GET /cv?limit=
+"""
+import pytest
+from bson import ObjectId
+
+from app.core.exceptions import InvalidCursorError
+from app.repositories import InMemoryStorageBackend, MongoStorageBackend
+from app.utils.pagination import decode_cursor, encode_cursor
+from benchmarks.storage_bench import generate_documents
+
+
+def test_cursor_round_trip():
+    object_id = ObjectId()
+    token = encode_cursor(object_id)
+    assert "=" not in token
+    assert decode_cursor(token) == object_id
+
+
+@pytest.mark.parametrize("token", ["", "abc", "not a cursor!", encode_cursor(ObjectId()) + "AA"])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursorError) as error:
+        decode_cursor(token)
+    assert error.value.status_code == 400
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def storage(request, mongo_db):
+    if request.param == "memory":
+        return InMemoryStorageBackend()
+    return MongoStorageBackend(mongo_db)
+
+
+async def _all_pages(storage, limit, deleted=None):
+    pages, after = [], None
+    while True:
+        docs, after = await storage.get_documents_page(deleted, limit, after, "summary")
+        pages.append([doc["id"] for doc in docs])
+        if after is None:
+            return pages
+        assert after == ObjectId(docs[-1]["id"])
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [1, 3, 5, 7])
+async def test_pages_cover_every_document_once(storage, limit):
+    docs = generate_documents(7, seed=1)
+    ids = [str(doc["_id"]) for doc in docs]
+    await storage.insert_cv_documents(docs)
+    await storage.delete_document_by_id(ids[2])
+
+    pages = await _all_pages(storage, limit)
+    expected = [document_id for document_id in ids if document_id != ids[2]]
+    assert [document_id for page in pages for document_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+    # limit שווה בדיוק למספר המסמכים - עמוד אחד, בלי עמוד ריק אחריו
+    if limit >= len(expected):
+        assert len(pages) == 1
+
+    assert await _all_pages(storage, limit, deleted=True) == [[ids[2]]]
+
+
+@pytest.mark.anyio
+async def test_page_after_last_document_is_empty(storage):
+    docs = generate_documents(3, seed=2)
+    await storage.insert_cv_documents(docs)
+
+    assert await storage.get_documents_page(None, 10, docs[-1]["_id"]) == ([], None)
+    assert await storage.get_documents_page(None, 10, ObjectId("f" * 24)) == ([], None)
+
+
+@pytest.mark.anyio
+async def test_page_on_empty_collection(storage):
+    assert await storage.get_documents_page(None, 5) == ([], None)
+
+
+def test_list_endpoint_pages(client, upload):
+    for index in range(5):
+        upload(f"page {index}")
+    everything = [doc["id"] for doc in client.get("/cv", params={"view": "summary"}).json()]
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 2, "view": "summary"}
+        if after:
+            params["after"] = after
+        response = client.get("/cv", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["items"])
+        after = page["next_after"]
+        if after is None:
+            break
+        assert decode_cursor(after) == ObjectId(page["items"][-1]["id"])
+    assert seen == everything
+
+
+def test_list_endpoint_rejects_bad_cursor(client):
+    response = client.get("/cv", params={"limit": 2, "after": "not a cursor!"})
+    assert response.status_code == 400
+    assert "Invalid pagination cursor" in response.json()["detail"]
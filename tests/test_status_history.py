@@ -0,0 +1,151 @@
+"""
+Compact status_history entries: encoding round trip, webhook bodies stored
+apart from the entry, and the migration of legacy entries
+"""
+import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.core.config import COLLECTION_NAME, STATUS_HISTORY_COLLECTION_NAME
+from app.core.constants import (
+    STATUS_ID_MAP,
+    STATUS_PROCESSING_FAILED,
+    STATUS_PROCESSING_SUCCESS,
+    get_processing_error_status,
+    get_webhook_error_status,
+    get_webhook_status,
+)
+from app.migrations import compact_status_history
+from app.repositories import InMemoryStorageBackend, MongoStorageBackend
+from app.services.status_history_store import flush_archive
+from app.utils.status_history import (
+    compact_legacy_history,
+    decode_entry,
+    encode_entry,
+    expand_history,
+    has_webhook_entries,
+)
+
+TIME = datetime.datetime(2025, 3, 1, 12, 30, 45, 123000)
+TIMESTAMP = "2025-03-01T12:30:45.123Z"
+
+STATUSES = [
+    *STATUS_ID_MAP.values(),
+    STATUS_PROCESSING_SUCCESS,
+    STATUS_PROCESSING_FAILED,
+    get_processing_error_status("PDF has too many pages"),
+    get_webhook_error_status("timeout"),
+    get_webhook_status(200),
+    get_webhook_status(500, "Internal Server Error"),
+    get_webhook_status(200, '{"ok": true, "text": "multi\nline"}'),
+    "note: free text status",
+]
+
+
+@pytest.mark.parametrize("status", STATUSES)
+def test_entry_round_trip(status):
+    entry, body = encode_entry(status, TIME)
+    assert isinstance(entry["c"], int)
+    assert entry["t"] == TIME
+    assert decode_entry(entry, body) == {"status": status, "timestamp": TIMESTAMP}
+
+
+def test_webhook_body_is_not_in_the_entry():
+    entry, body = encode_entry(get_webhook_status(201, "created"), TIME)
+    assert body == "created"
+    assert "d" not in entry
+    # בלי הגוף - רק קוד ה-HTTP
+    assert decode_entry(entry)["status"] == get_webhook_status(201)
+
+
+def test_legacy_entry_is_returned_as_is():
+    legacy = {"status": "Submitted", "timestamp": "2024-01-01T00:00:00Z"}
+    assert decode_entry(legacy) is legacy
+
+
+def test_expand_history_joins_webhook_bodies():
+    webhook, body = encode_entry(get_webhook_status(200, "accepted"), TIME)
+    doc = {"status_history": [encode_entry("Submitted", TIME)[0], webhook]}
+    assert has_webhook_entries(doc)
+    assert not has_webhook_entries({"status_history": doc["status_history"][:1]})
+
+    expand_history(doc, {(webhook["c"], webhook["t"]): body})
+    assert [entry["status"] for entry in doc["status_history"]] == ["Submitted", get_webhook_status(200, "accepted")]
+
+
+def test_compact_legacy_history():
+    compact, _ = encode_entry("Extracting", TIME)
+    history = [
+        {"status": "Submitted", "timestamp": "2025-03-01T12:30:45.123456Z"},
+        {"status": get_webhook_status(200, "accepted"), "timestamp": TIMESTAMP},
+        {"status": "custom", "timestamp": "not a date"},
+        compact,
+    ]
+
+    compacted, bodies = compact_legacy_history(history)
+
+    assert compacted[3] is compact
+    assert compacted[0]["t"] == TIME
+    assert compacted[2]["t"] is None
+    assert bodies == [(compacted[1], "accepted")]
+    assert [decode_entry(entry, body)["status"] for entry, body in zip(compacted, [None, "accepted", None, None])] == [
+        "Submitted", get_webhook_status(200, "accepted"), "custom", "Extracting"
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend_name", ["memory", "mongo"])
+async def test_webhook_body_round_trip(backend_name, mongo_db):
+    backend = InMemoryStorageBackend() if backend_name == "memory" else MongoStorageBackend(mongo_db)
+    document_id = await backend.insert_cv_document({"known_data": {"name": "W"}})
+    status = get_webhook_status(200, '{"id": "' + "x" * 300 + '"}')
+    await backend.record_webhook_result(document_id, status, "Extracting")
+    await flush_archive()
+
+    doc = await backend.get_document_by_id(document_id)
+    assert [entry["status"] for entry in doc["status_history"]] == ["Submitted", status, "Extracting"]
+    history, next_after = await backend.get_document_history(document_id, 10)
+    assert [entry["status"] for entry in history] == ["Submitted", status, "Extracting"]
+    assert next_after is None
+
+
+@pytest.mark.anyio
+async def test_entries_are_archived_after_the_document_update(mongo_db):
+    backend = MongoStorageBackend(mongo_db)
+    document_id = await backend.insert_cv_document({"known_data": {"name": "A"}})
+    archive = mongo_db[STATUS_HISTORY_COLLECTION_NAME]
+    assert await archive.count_documents({"cv_id": ObjectId(document_id)}) == 1
+
+    assert await backend.add_status_to_history(document_id, "note")
+    assert not await backend.add_status_to_history(str(ObjectId()), "note")
+    await flush_archive()
+
+    assert await archive.count_documents({"cv_id": ObjectId(document_id)}) == 2
+    assert await archive.count_documents({}) == 2
+
+
+@pytest.mark.anyio
+async def test_compact_migration(mongo_db):
+    document_id = ObjectId()
+    legacy = [
+        {"status": "Submitted", "timestamp": TIMESTAMP},
+        {"status": get_webhook_status(200, "accepted"), "timestamp": TIMESTAMP},
+        {"status": get_processing_error_status("boom"), "timestamp": TIMESTAMP},
+    ]
+    await mongo_db[COLLECTION_NAME].insert_one({
+        "_id": document_id,
+        "known_data": {"name": "L"},
+        "current_status": "Submitted",
+        "status_history": legacy,
+        "is_deleted": False,
+    })
+
+    assert (await compact_status_history.run(mongo_db))["updated"] == 1
+    assert (await compact_status_history.run(mongo_db))["updated"] == 0
+
+    stored = await mongo_db[COLLECTION_NAME].find_one({"_id": document_id})
+    assert all("status" not in entry for entry in stored["status_history"])
+    assert await mongo_db[STATUS_HISTORY_COLLECTION_NAME].count_documents({"cv_id": document_id, "body": "accepted"}) == 1
+    doc = await MongoStorageBackend(mongo_db).get_document_by_id(str(document_id))
+    assert doc["status_history"] == legacy
@@ -0,0 +1,129 @@
+"""
+The in-memory backend returns what the Mongo backend returns for the same operations
+"""
+import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.core.constants import UPDATE_STATUS_TRANSITIONS
+from app.repositories import InMemoryStorageBackend, MongoStorageBackend
+from app.services.status_history_store import flush_archive
+
+pytestmark = pytest.mark.anyio
+
+MISSING_ID = "507f1f77bcf86cd799439011"
+SEARCH_CASES = [
+    {"free_text": "PYTHON"},
+    {"free_text": "f2.pdf"},
+    {"campaign": "summer"},
+    {"country": "france", "match_mode": "exact"},
+    {"min_score": 70, "max_score": 90},
+    {"match_score": "all match_score"},
+    {"match_score": "80-89"},
+    {"current_status": "Submitted"},
+    {"entered_status": "Extracting"},
+    {"entered_status": "Submitted", "entered_from": datetime.datetime(2030, 1, 1)},
+]
+
+
+def _without_times(value):
+    """ה-timestamps נקבעים בזמן הכתיבה - שונים בין שתי ההרצות"""
+    if isinstance(value, dict):
+        return {
+            key: _without_times(item) for key, item in value.items()
+            if key not in ("timestamp", "generated_at")
+        }
+    if isinstance(value, list):
+        return [_without_times(item) for item in value]
+    return value
+
+
+async def _run_scenario(storage):
+    ids = [str(ObjectId(f"{index + 1:024x}")) for index in range(6)]
+    docs = [
+        {
+            "_id": ObjectId(document_id),
+            "file_metadata": {"filename": f"f{index}.pdf"},
+            "known_data": {
+                "name": f"N{index}",
+                "campaign": ["Summer 2025", "Europe Tech"][index % 2],
+                "nationality": ["France", "unknown", "Israel"][index % 3],
+                "match_score": str(60 + index * 7),
+                "job_type": "QA",
+            },
+            "extracted_text": f"text {index} python" if index % 2 else "",
+        }
+        for index, document_id in enumerate(ids)
+    ]
+    results = {}
+    results["insert_many"] = await storage.insert_cv_documents(docs[:4], ["processing_success"] * 4)
+    results["insert_failed"] = await storage.insert_cv_document(docs[4], ["processing_failed"])
+    results["insert"] = await storage.insert_cv_document(docs[5])
+    results["webhook"] = await storage.record_webhook_result(ids[0], 'webhook_status_200: {"ok": 1}', "Extracting")
+    results["webhook_error"] = await storage.record_webhook_result(ids[1], "webhook_error: boom")
+    results["transition"] = await storage.update_document_fields_with_transition(
+        ids[0], {"match_score": "95", "campaign": "X"}, UPDATE_STATUS_TRANSITIONS
+    )
+    results["transition_unchanged"] = await storage.update_document_fields_with_transition(
+        ids[0], {"match_score": "95"}, UPDATE_STATUS_TRANSITIONS
+    )
+    results["fields_only"] = await storage.update_document_fields_only(ids[3], {"recruit_note": "hi", "phone_number": "1"})
+    results["full"] = await storage.update_document_full(ids[3], {"email": "unknown", "age": 30})
+    results["partial"] = await storage.update_document_partial(ids[3], {"email": "a@b.c", "hebrew_name": "", "job_type": None})
+    results["partial_again"] = await storage.update_document_partial(ids[3], {"email": "z@z"})
+    results["status"] = await storage.update_document_status(ids[4], "Ready For Classification")
+    results["add_history"] = await storage.add_status_to_history(ids[4], "note")
+    results["extraction"] = await storage.set_extraction_result(ids[5], "late python text", "processing_success")
+    results["extraction_missing"] = await storage.set_extraction_result(MISSING_ID, "x", "processing_success")
+    results["delete"] = await storage.delete_document_by_id(ids[1])
+    results["delete_again"] = await storage.delete_document_by_id(ids[1])
+    results["update_deleted"] = await storage.update_document_full(ids[1], {"email": "q"})
+    # ב-Mongo ה-entries נכתבים לארכיון ברקע
+    await flush_archive()
+
+    results["get"] = await storage.get_document_by_id(ids[0])
+    results["get_deleted"] = await storage.get_document_by_id(ids[1], include_text=False)
+    results["get_missing"] = await storage.get_document_by_id(MISSING_ID)
+    results["versions"] = [await storage.get_document_version(document_id) for document_id in ids]
+    results["all"] = await storage.get_all_documents()
+    results["all_deleted"] = await storage.get_all_documents(True)
+    results["page"] = await storage.get_documents_page(None, 2, ObjectId(ids[0]), "summary")
+    results["fields"] = await storage.get_all_documents(None, "full", ["known_data.campaign", "status_history"])
+    results["by_status"] = await storage.get_documents_by_status("Ready For Classification")
+    results["search"] = [
+        sorted(doc["id"] for doc in await storage.search_documents_advanced(view="summary", **case))
+        for case in SEARCH_CASES
+    ]
+    results["stats"] = await storage.get_document_stats()
+    results["stats_filtered"] = await storage.get_document_stats(campaign="europe")
+    history, next_after = await storage.get_document_history(ids[0], 2)
+    results["history"] = [history, next_after is not None]
+    results["history_missing"] = await storage.get_document_history(MISSING_ID, 2)
+    results["restore"] = await storage.restore_document_by_id(ids[1])
+    results["restore_again"] = await storage.restore_document_by_id(ids[1])
+    return results
+
+
+async def test_memory_backend_matches_mongo_backend(mongo_db):
+    memory = _without_times(await _run_scenario(InMemoryStorageBackend()))
+    mongo = _without_times(await _run_scenario(MongoStorageBackend(mongo_db)))
+
+    assert memory.keys() == mongo.keys()
+    for operation in memory:
+        assert memory[operation] == mongo[operation], operation
+
+
+async def test_webhook_body_is_returned_by_every_read(mongo_db):
+    for storage in (InMemoryStorageBackend(), MongoStorageBackend(mongo_db)):
+        document_id = await storage.insert_cv_document({"known_data": {"name": "A"}})
+        await storage.record_webhook_result(document_id, 'webhook_status_200: {"ok": 1}', "Extracting")
+        await flush_archive()
+
+        expected = 'webhook_status_200: {"ok": 1}'
+        doc = await storage.get_document_by_id(document_id)
+        listed = [item for item in await storage.get_all_documents() if item["id"] == document_id]
+        by_status = await storage.get_documents_by_status("Extracting")
+        found = await storage.search_documents_advanced(current_status="Extracting")
+        for result in (doc, listed[0], by_status[0], found[0]):
+            assert expected in [entry["status"] for entry in result["status_history"]], storage.name
@@ -0,0 +1,155 @@
+"""
+PATCH /cv/{id} status transitions: the fields and the transition in one update,
+and exactly one history entry (embedded and archived) per transition
+"""
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.core.config import COLLECTION_NAME, STATUS_HISTORY_COLLECTION_NAME
+from app.core.constants import (
+    STATUS_EXTRACTING,
+    STATUS_IN_CLASSIFICATION,
+    STATUS_READY_FOR_BOT_INTERVIEW,
+    STATUS_READY_FOR_RECRUIT,
+    UPDATE_STATUS_TRANSITIONS,
+)
+from app.repositories import InMemoryStorageBackend, MongoStorageBackend
+from app.services.status_history_store import flush_archive
+from app.utils.status_history import history_code
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def backend(request, mongo_db):
+    if request.param == "memory":
+        return InMemoryStorageBackend()
+    return MongoStorageBackend(mongo_db)
+
+
+async def _extracting_document(backend) -> str:
+    # כל השדות קיימים: ב-mongomock {$ne: [שדה חסר, ערך]} הוא false (ב-MongoDB - true)
+    known_data = {"name": "T", "match_score": "50", "email": "", "job_type": "", "campaign": "", "age": ""}
+    document_id = await backend.insert_cv_document({"known_data": known_data})
+    await backend.update_document_status(document_id, STATUS_EXTRACTING)
+    return document_id
+
+
+def _entered(doc, status):
+    return [entry for entry in doc["status_history"] if entry["status"] == status]
+
+
+async def _archived(mongo_db, document_id, status):
+    await flush_archive()
+    return await mongo_db[STATUS_HISTORY_COLLECTION_NAME].count_documents(
+        {"cv_id": ObjectId(document_id), "c": history_code(status)}
+    )
+
+
+async def test_update_transitions_once(backend):
+    document_id = await _extracting_document(backend)
+    version = await backend.get_document_version(document_id)
+
+    result = await backend.update_document_fields_with_transition(
+        document_id, {"match_score": "90"}, UPDATE_STATUS_TRANSITIONS
+    )
+    assert result == {
+        "modified": True, "previous_status": STATUS_EXTRACTING, "current_status": STATUS_READY_FOR_BOT_INTERVIEW
+    }
+    # המסמך כבר לא ב-Extracting - עדכון נוסף לא מוסיף מעבר
+    await backend.update_document_fields_with_transition(document_id, {"match_score": "91"}, UPDATE_STATUS_TRANSITIONS)
+
+    doc = await backend.get_document_by_id(document_id)
+    assert doc["current_status"] == STATUS_READY_FOR_BOT_INTERVIEW
+    assert doc["known_data"]["match_score"] == "91"
+    assert len(_entered(doc, STATUS_READY_FOR_BOT_INTERVIEW)) == 1
+    assert await backend.get_document_version(document_id) == version + 2
+
+
+async def test_unchanged_update_does_not_write(backend):
+    document_id = await _extracting_document(backend)
+    version = await backend.get_document_version(document_id)
+
+    result = await backend.update_document_fields_with_transition(
+        document_id, {"match_score": "50"}, UPDATE_STATUS_TRANSITIONS
+    )
+    assert result == {"modified": False, "previous_status": STATUS_EXTRACTING, "current_status": STATUS_EXTRACTING}
+    assert await backend.get_document_version(document_id) == version
+    doc = await backend.get_document_by_id(document_id)
+    assert doc["current_status"] == STATUS_EXTRACTING
+    assert not _entered(doc, STATUS_READY_FOR_BOT_INTERVIEW)
+
+
+async def test_deleted_document_is_not_updated(backend):
+    document_id = await _extracting_document(backend)
+    await backend.delete_document_by_id(document_id)
+    assert await backend.update_document_fields_with_transition(
+        document_id, {"match_score": "90"}, UPDATE_STATUS_TRANSITIONS
+    ) is None
+
+
+async def test_concurrent_updates_transition_once(backend):
+    document_id = await _extracting_document(backend)
+
+    results = await asyncio.gather(*(
+        backend.update_document_fields_with_transition(document_id, {field: "x"}, UPDATE_STATUS_TRANSITIONS)
+        for field in ("email", "job_type", "campaign", "age")
+    ))
+
+    assert [result["modified"] for result in results] == [True] * 4
+    assert sum(result["previous_status"] == STATUS_EXTRACTING for result in results) == 1
+    doc = await backend.get_document_by_id(document_id)
+    assert doc["current_status"] == STATUS_READY_FOR_BOT_INTERVIEW
+    assert {doc["known_data"][field] for field in ("email", "job_type", "campaign", "age")} == {"x"}
+    assert len(_entered(doc, STATUS_READY_FOR_BOT_INTERVIEW)) == 1
+
+
+async def test_transition_is_archived_once(mongo_db):
+    backend = MongoStorageBackend(mongo_db)
+    document_id = await _extracting_document(backend)
+
+    await asyncio.gather(*(
+        backend.update_document_fields_with_transition(document_id, {"match_score": score}, UPDATE_STATUS_TRANSITIONS)
+        for score in ("70", "80", "90")
+    ))
+    await backend.update_document_fields_with_transition(document_id, {"match_score": "90"}, UPDATE_STATUS_TRANSITIONS)
+
+    assert await _archived(mongo_db, document_id, STATUS_READY_FOR_BOT_INTERVIEW) == 1
+    history, _ = await backend.get_document_history(document_id, 100)
+    assert len(_entered({"status_history": history}, STATUS_READY_FOR_BOT_INTERVIEW)) == 1
+
+
+async def test_transition_from_the_status_at_update_time(mongo_db):
+    """הסטטוס השתנה אחרי שהמסמך נקרא: המעבר והארכיון נגזרים מהסטטוס שה-update ראה"""
+    backend = MongoStorageBackend(mongo_db)
+    document_id = await _extracting_document(backend)
+    await backend.get_document_by_id(document_id)
+    await mongo_db[COLLECTION_NAME].update_one(
+        {"_id": ObjectId(document_id)}, {"$set": {"current_status": STATUS_IN_CLASSIFICATION}}
+    )
+
+    result = await backend.update_document_fields_with_transition(
+        document_id, {"match_score": "90"}, UPDATE_STATUS_TRANSITIONS
+    )
+
+    assert result["previous_status"] == STATUS_IN_CLASSIFICATION
+    assert result["current_status"] == STATUS_READY_FOR_RECRUIT
+    assert await _archived(mongo_db, document_id, STATUS_READY_FOR_BOT_INTERVIEW) == 0
+    assert await _archived(mongo_db, document_id, STATUS_READY_FOR_RECRUIT) == 1
+    doc = await backend.get_document_by_id(document_id)
+    assert len(_entered(doc, STATUS_READY_FOR_RECRUIT)) == 1
+    assert not _entered(doc, STATUS_READY_FOR_BOT_INTERVIEW)
+
+
+async def test_cleared_field_drops_its_search_key(mongo_db):
+    backend = MongoStorageBackend(mongo_db)
+    document_id = await _extracting_document(backend)
+    await backend.update_document_fields_with_transition(document_id, {"campaign": "Summer"}, UPDATE_STATUS_TRANSITIONS)
+
+    await backend.update_document_fields_with_transition(document_id, {"campaign": None}, UPDATE_STATUS_TRANSITIONS)
+
+    stored = await mongo_db[COLLECTION_NAME].find_one({"_id": ObjectId(document_id)})
+    assert "campaign" not in stored["search_keys"]
+    assert not [field for field in stored if field.startswith("_") and field != "_id"]